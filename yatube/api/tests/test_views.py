@@ -0,0 +1,98 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiViewsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="author")
+        cls.reader = User.objects.create_user(username="reader")
+        cls.group = Group.objects.create(
+            title="Группа", slug="group", description="Описание"
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f"Пост {number}", author=cls.author,
+                group=cls.group if number % 2 else None,
+            )
+            for number in range(5)
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.reader, text="Комментарий"
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def walk(self, url):
+        """Все элементы ленты, пройденной по ссылкам next."""
+        items = []
+        while url:
+            data = self.client.get(url).json()
+            items += data["results"]
+            url = data["next"]
+        return items
+
+    def test_cursor_walks_whole_feed(self):
+        """Курсоры проходят ленту без пропусков и повторов."""
+        items = self.walk(reverse("api:index") + "?limit=2")
+        self.assertEqual(
+            [item["id"] for item in items],
+            [post.id for post in reversed(self.posts)],
+        )
+
+    def test_feeds(self):
+        """Ленты группы, автора и подписок фильтруют посты."""
+        group = self.walk(reverse("api:group_list", args=["group"]))
+        self.assertEqual(len(group), 2)
+        self.assertEqual(
+            len(self.walk(reverse("api:profile", args=["author"]))), 5
+        )
+        self.client.force_login(self.reader)
+        self.assertEqual(len(self.walk(reverse("api:follow_index"))), 5)
+
+    def test_sparse_fields(self):
+        """?fields= оставляет в ответе только запрошенные поля."""
+        data = self.client.get(
+            reverse("api:index"), {"fields": "id,author"}
+        ).json()
+        self.assertEqual(
+            data["results"][0], {"id": self.posts[-1].id, "author": "author"}
+        )
+
+    def test_detail(self):
+        """Пост отдаётся с комментариями."""
+        data = self.client.get(
+            reverse("api:post_detail", args=[self.posts[0].id])
+        ).json()
+        self.assertEqual(data["text"], "Пост 0")
+        self.assertEqual(data["comments"][0]["author"], "reader")
+
+    def test_etag(self):
+        """Повторный запрос с If-None-Match получает 304."""
+        url = reverse("api:index")
+        etag = self.client.get(url)["ETag"]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_errors(self):
+        """Ошибки возвращаются в JSON с подходящим статусом."""
+        cases = (
+            (reverse("api:index"), {"cursor": "bad"}, 400),
+            (reverse("api:index"), {"fields": "password"}, 400),
+            (reverse("api:group_list", args=["missing"]), {}, 404),
+            (reverse("api:post_detail", args=[0]), {}, 404),
+            (reverse("api:follow_index"), {}, 401),
+        )
+        for url, query, status in cases:
+            with self.subTest(url=url, query=query):
+                response = self.client.get(url, query)
+                self.assertEqual(response.status_code, status)
+                self.assertIn("error", response.json())
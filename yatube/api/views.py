@@ -0,0 +1,175 @@
+"""Read-only JSON API лент для мобильных клиентов.
+
+Ленты отдаются курсорными страницами из values() по колонкам
+проекции поста (posts.projection), без join и экземпляров моделей.
+?fields= сужает и ответ, и список колонок в SELECT. Ответ получает
+ETag, и повторный запрос с If-None-Match обходится ответом 304 без
+тела.
+"""
+from functools import wraps
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import Http404, JsonResponse
+from django.utils.cache import get_conditional_response, set_response_etag
+from django.views.decorators.http import require_GET
+from posts.cursor import CursorError, cursor_page
+from posts.models import Follow, Post
+from posts.negative_cache import lookup_or_404
+
+FIELDS = {
+    "id": "id",
+    "text": "text",
+    "pub_date": "pub_date",
+    "author": "author_username",
+    "group": "group_slug",
+    "image": "image",
+}
+DETAIL_FIELDS = (*FIELDS, "comments")
+JSON_PARAMS = {"ensure_ascii": False, "separators": (",", ":")}
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def error(message, status):
+    return JsonResponse(
+        {"error": message}, status=status, json_dumps_params=JSON_PARAMS
+    )
+
+
+def api_view(view):
+    """Ошибки в JSON, ETag и условный GET для всех ответов API."""
+
+    @require_GET
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            data = view(request, *args, **kwargs)
+        except Http404:
+            return error("не найдено", 404)
+        except CursorError as exception:
+            return error(str(exception), 400)
+        except ApiError as exception:
+            return error(str(exception), exception.status)
+        response = JsonResponse(data, json_dumps_params=JSON_PARAMS)
+        set_response_etag(response)
+        return get_conditional_response(
+            request, etag=response["ETag"], response=response
+        )
+
+    return wrapper
+
+
+def requested_fields(request, allowed):
+    value = request.GET.get("fields")
+    if not value:
+        return tuple(allowed)
+    fields = tuple(dict.fromkeys(value.split(",")))
+    unknown = set(fields) - set(allowed)
+    if unknown:
+        raise ApiError(f"неизвестные поля: {', '.join(sorted(unknown))}")
+    return fields
+
+
+def page_size(request):
+    try:
+        limit = int(request.GET.get("limit", settings.API_PAGE_SIZE))
+    except ValueError:
+        raise ApiError("limit должен быть числом")
+    return max(1, min(limit, settings.API_MAX_PAGE_SIZE))
+
+
+def image_url(name):
+    return default_storage.url(name) if name else None
+
+
+def serialize(row, fields):
+    item = {field: row[FIELDS[field]] for field in fields}
+    if "image" in item:
+        item["image"] = image_url(item["image"])
+    if "group" in item:
+        item["group"] = item["group"] or None
+    return item
+
+
+def feed(request, queryset):
+    """Курсорная страница ленты с выбранными полями."""
+    fields = requested_fields(request, FIELDS)
+    columns = {FIELDS[field] for field in fields} | {"id", "pub_date"}
+    rows, next_cursor = cursor_page(
+        queryset.values(*columns),
+        request.GET.get("cursor"),
+        page_size(request),
+        key=lambda row: (row["pub_date"], row["id"]),
+    )
+    next_url = None
+    if next_cursor:
+        query = request.GET.copy()
+        query["cursor"] = next_cursor
+        next_url = f"{request.path}?{query.urlencode()}"
+    return {
+        "results": [serialize(row, fields) for row in rows],
+        "next": next_url,
+    }
+
+
+@api_view
+def index(request):
+    return feed(request, Post.objects.all())
+
+
+@api_view
+def group_posts(request, slug):
+    group = lookup_or_404("group", slug)
+    return feed(request, Post.objects.filter(group=group))
+
+
+@api_view
+def profile(request, username):
+    author = lookup_or_404("user", username)
+    return feed(request, Post.objects.filter(author=author))
+
+
+@api_view
+def follow_index(request):
+    if not request.user.is_authenticated:
+        raise ApiError("нужна авторизация", 401)
+    authors = Follow.objects.filter(user=request.user).values("author_id")
+    return feed(request, Post.objects.filter(author_id__in=authors))
+
+
+@api_view
+def post_detail(request, post_id):
+    fields = requested_fields(request, DETAIL_FIELDS)
+    try:
+        post = Post.objects.get(pk=post_id)
+    except Post.DoesNotExist:
+        raise Http404
+    item = serialize(
+        {
+            "id": post.id,
+            "text": post.text,
+            "pub_date": post.pub_date,
+            "author_username": post.author_username,
+            "group_slug": post.group_slug,
+            "image": post.image.name,
+        },
+        [field for field in fields if field in FIELDS],
+    )
+    if "comments" in fields:
+        item["comments"] = [
+            {
+                "id": comment_id,
+                "author": author,
+                "text": text,
+                "created": created,
+            }
+            for comment_id, author, text, created in post.comments.order_by(
+                "created", "id"
+            ).values_list("id", "author__username", "text", "created")
+        ]
+    return item
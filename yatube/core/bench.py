@@ -0,0 +1,85 @@
+"""Общие средства для бенчмарков: сводка замеров и сравнение с эталоном."""
+import json
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+
+from core.querylog import percentile
+
+
+def summarize(latencies, wall_time=None):
+    """Сводка по задержкам в секундах: перцентили и пропускная способность."""
+    count = len(latencies)
+    wall_time = wall_time if wall_time is not None else sum(latencies)
+    return {
+        "count": count,
+        "throughput": count / wall_time if wall_time else 0.0,
+        "mean_ms": sum(latencies) / count * 1000 if count else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+class QueryCounter:
+    """Считает SQL-запросы на всех соединениях без включения DEBUG."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    @contextmanager
+    def capture(self):
+        self.count = 0
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+
+@contextmanager
+def timer():
+    result = {}
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result["elapsed"] = time.perf_counter() - start
+
+
+def save_results(path, results):
+    with open(path, "w") as results_file:
+        json.dump(results, results_file, indent=2, ensure_ascii=False)
+
+
+def load_results(path):
+    with open(path) as results_file:
+        return json.load(results_file)
+
+
+def compare(results, baseline, threshold, metrics=("p95_ms",)):
+    """Список регрессий: сценарии, где метрика выросла больше порога.
+
+    Число SQL-запросов сравнивается точно, без порога.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for metric in metrics:
+            if previous.get(metric) and current[metric] > previous[metric] * (
+                1 + threshold
+            ):
+                regressions.append(
+                    (name, metric, previous[metric], current[metric])
+                )
+        if current.get("queries", 0) > previous.get("queries", 0):
+            regressions.append(
+                (name, "queries", previous["queries"], current["queries"])
+            )
+    return regressions
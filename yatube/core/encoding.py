@@ -0,0 +1,82 @@
+"""Разбор Accept-Encoding и необязательные кодеки.
+
+brotli и zstandard ставятся отдельно. Без них .br не пишутся, br и zstd
+не предлагаются, а клиенты получают gzip.
+"""
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def accepted_encodings(header):
+    """Словарь кодировка -> q из заголовка Accept-Encoding."""
+    encodings = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        encodings[coding] = quality
+    return encodings
+
+
+def negotiate(header, available):
+    """Первая из available, которую клиент принимает, или None."""
+    encodings = accepted_encodings(header or "")
+    default = encodings.get("*", 0.0)
+    for coding in available:
+        if encodings.get(coding, default) > 0:
+            return coding
+    return None
+
+
+def available_codings(preferred):
+    """Кодировки из preferred, для которых установлен кодек."""
+    installed = {"br": brotli, "zstd": zstandard, "gzip": zlib}
+    return tuple(
+        coding for coding in preferred if installed.get(coding) is not None
+    )
+
+
+class _BrotliStream:
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.finish()
+
+
+def compressobj(coding, level):
+    """Потоковый компрессор с compress(data) и завершающим flush()."""
+    if coding == "gzip":
+        return zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS)
+    if coding == "zstd":
+        return zstandard.ZstdCompressor(level=level).compressobj()
+    if coding == "br":
+        return _BrotliStream(level)
+    raise ValueError(coding)
+
+
+def compress(coding, data, level):
+    stream = compressobj(coding, level)
+    return stream.compress(data) + stream.flush()
@@ -0,0 +1,93 @@
+"""Окружение Jinja2 с теми же помощниками, что у шаблонов Django.
+
+Глобальные функции url, static и thumbnail, фильтры addclass и date,
+тег {% cache timeout, "имя", ключи... %} с ключами фрагментного кэша
+Django. Год, пользователь и сообщения приходят из context_processors
+движка, как и в шаблонах Django.
+"""
+import logging
+
+from django.core.cache import InvalidCacheBackendError, caches
+from django.core.cache.utils import make_template_fragment_key
+from django.template import defaultfilters
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils.timezone import template_localtime
+from jinja2 import Environment, nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+from sorl.thumbnail import get_thumbnail
+from sorl.thumbnail.conf import settings as thumbnail_settings
+
+from core.templatetags.user_filters import addclass
+
+logger = logging.getLogger("yatube.templates")
+
+
+def url(name, *args, **kwargs):
+    return reverse(name, args=args or None, kwargs=kwargs or None)
+
+
+def thumbnail(file, geometry, **options):
+    """Миниатюра как у тега sorl {% thumbnail %} или None.
+
+    Как и тег, без THUMBNAIL_DEBUG не роняет страницу из-за битой
+    картинки, а пишет ошибку в журнал.
+    """
+    if not file:
+        return None
+    try:
+        return get_thumbnail(file, geometry, **options)
+    except Exception:
+        if thumbnail_settings.THUMBNAIL_DEBUG:
+            raise
+        logger.exception("Не удалось построить миниатюру %s", file)
+        return None
+
+
+def date(value, arg=None):
+    return defaultfilters.date(template_localtime(value), arg)
+
+
+def fragment_cache():
+    try:
+        return caches["template_fragments"]
+    except InvalidCacheBackendError:
+        return caches["default"]
+
+
+class FragmentCacheExtension(Extension):
+    """{% cache 20, "index_page", page_obj %} ... {% endcache %}."""
+
+    tags = {"cache"}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        timeout = parser.parse_expression()
+        parser.stream.expect("comma")
+        name = parser.parse_expression()
+        vary_on = []
+        while parser.stream.skip_if("comma"):
+            vary_on.append(parser.parse_expression())
+        body = parser.parse_statements(["name:endcache"], drop_needle=True)
+        call = self.call_method(
+            "_render", [timeout, name, nodes.List(vary_on)]
+        )
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render(self, timeout, name, vary_on, caller):
+        cache = fragment_cache()
+        key = make_template_fragment_key(name, vary_on)
+        value = cache.get(key)
+        if value is None:
+            value = caller()
+            cache.set(key, value, timeout)
+        return Markup(value)
+
+
+def environment(**options):
+    options.setdefault("extensions", []).append(FragmentCacheExtension)
+    env = Environment(**options)
+    env.globals.update(url=url, static=static, thumbnail=thumbnail)
+    env.filters.update(addclass=addclass, date=date)
+    return env
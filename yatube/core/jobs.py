@@ -0,0 +1,273 @@
+"""Фоновые задачи в таблице core.Job.
+
+Обработчик объявляется в модуле jobs.py приложения декоратором register,
+а представление ставит задачу через enqueue(name, payload). Строка задачи
+пишется в ту же базу и в той же транзакции, что и данные запроса, поэтому
+воркер увидит её только после коммита. Команда run_workers держит пул
+потоков или процессов. Воркер берёт готовую задачу с наибольшим
+приоритетом: через SELECT ... FOR UPDATE SKIP LOCKED там, где база это
+умеет (PostgreSQL, MySQL 8, Oracle), а на SQLite — условным UPDATE по
+статусу. SQLite выполняет запись по очереди, и строку получает один
+воркер.
+
+Упавшая задача повторяется с удвоением паузы от JOBS_RETRY_DELAY, пока
+не исчерпает max_attempts. Пока задача выполняется, поток-heartbeat
+обновляет её locked_at каждую треть JOBS_LOCK_TIMEOUT. Задача, чей
+locked_at не обновлялся JOBS_LOCK_TIMEOUT секунд, считается брошенной
+пропавшим воркером и возвращается в очередь. Итог выполнения
+записывается только в ту попытку, которую воркер взял: если задачу
+уже вернули и взяли снова, новую попытку он не тронет.
+"""
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Count, F, Min
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from core.metrics import (
+    JOB_DURATION, JOB_WAIT, JOBS_ENQUEUED, JOBS_FINISHED, REGISTRY,
+)
+from core.models import Job
+
+logger = logging.getLogger("yatube.jobs")
+
+HANDLERS = {}
+
+# Сколько готовых задач перебирает воркер на SQLite, если первые уже взяли.
+CLAIM_CANDIDATES = 10
+
+ERROR_LENGTH = 4000
+
+
+def register(name):
+    """Декоратор обработчика задачи name; аргументы — ключи payload."""
+    def decorator(handler):
+        HANDLERS[name] = handler
+        return handler
+    return decorator
+
+
+def autodiscover():
+    autodiscover_modules("jobs")
+
+
+def enqueue(name, payload=None, priority=0, delay=0, max_attempts=None):
+    """Ставит задачу в очередь; payload должен сериализоваться в JSON."""
+    job = Job.objects.create(
+        name=name,
+        payload=json.dumps(payload or {}, cls=DjangoJSONEncoder),
+        priority=priority,
+        run_after=timezone.now() + timedelta(seconds=delay),
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+    )
+    JOBS_ENQUEUED.inc(name=name)
+    if settings.JOBS_EAGER and not delay:
+        transaction.on_commit(lambda: run_pending(pk=job.pk))
+    return job
+
+
+def worker_name():
+    return "{}:{}:{}".format(
+        socket.gethostname(), os.getpid(), threading.current_thread().name
+    )[:100]
+
+
+def ready_jobs(now):
+    return Job.objects.filter(
+        status=Job.QUEUED, run_after__lte=now
+    ).order_by("-priority", "run_after", "pk")
+
+
+def claim(worker, pk=None):
+    """Забирает одну готовую задачу для worker или возвращает None."""
+    now = timezone.now()
+    ready = ready_jobs(now)
+    if pk is not None:
+        ready = ready.filter(pk=pk)
+    taken = {
+        "status": Job.RUNNING,
+        "locked_by": worker,
+        "locked_at": now,
+        "attempts": F("attempts") + 1,
+    }
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            job = ready.select_for_update(skip_locked=True).first()
+            if job is None:
+                return None
+            Job.objects.filter(pk=job.pk).update(**taken)
+    else:
+        for candidate in ready.values_list("pk", flat=True)[
+            :CLAIM_CANDIDATES
+        ]:
+            if Job.objects.filter(
+                pk=candidate, status=Job.QUEUED
+            ).update(**taken):
+                break
+        else:
+            return None
+        job = Job(pk=candidate)
+    job.refresh_from_db()
+    return job
+
+
+def claimed(job):
+    """Строка задачи, пока её не взяли снова после release_stale()."""
+    return Job.objects.filter(pk=job.pk, attempts=job.attempts)
+
+
+@contextmanager
+def heartbeat(job):
+    """Обновляет locked_at задачи в отдельном потоке, пока она идёт."""
+    done = threading.Event()
+    thread = threading.Thread(
+        target=beat, args=(job, done, settings.JOBS_LOCK_TIMEOUT / 3),
+        daemon=True,
+    )
+    thread.start()
+    try:
+        yield
+    finally:
+        done.set()
+        thread.join()
+
+
+def beat(job, done, interval):
+    try:
+        while not done.wait(interval):
+            try:
+                claimed(job).filter(status=Job.RUNNING).update(
+                    locked_at=timezone.now()
+                )
+            except DatabaseError:
+                logger.exception("Не удалось продлить задачу %s", job)
+    finally:
+        connection.close()
+
+
+def retry_delay(attempts):
+    return settings.JOBS_RETRY_DELAY * 2 ** (attempts - 1)
+
+
+def execute(job):
+    """Выполняет взятую задачу: удаляет её, повторяет позже или помечает."""
+    JOB_WAIT.observe(
+        max((job.locked_at - job.run_after).total_seconds(), 0),
+        name=job.name,
+    )
+    start = time.perf_counter()
+    try:
+        handler = HANDLERS.get(job.name)
+        if handler is None:
+            raise LookupError(f"Нет обработчика задачи {job.name}")
+        with heartbeat(job):
+            handler(**json.loads(job.payload))
+    except Exception:
+        logger.exception("Задача %s упала", job)
+        status = fail(job, traceback.format_exc())
+    else:
+        claimed(job).delete()
+        status = "done"
+    JOB_DURATION.observe(time.perf_counter() - start, name=job.name)
+    JOBS_FINISHED.inc(name=job.name, status=status)
+    return status
+
+
+def fail(job, error):
+    values = {
+        "locked_by": "", "locked_at": None, "last_error": error[-ERROR_LENGTH:]
+    }
+    if job.attempts >= job.max_attempts:
+        claimed(job).update(status=Job.FAILED, **values)
+        return "failed"
+    claimed(job).update(
+        status=Job.QUEUED,
+        run_after=timezone.now() + timedelta(
+            seconds=retry_delay(job.attempts)
+        ),
+        **values,
+    )
+    return "retry"
+
+
+def run_pending(worker=None, pk=None, stop=None):
+    """Выполняет готовые задачи, пока они есть; возвращает их число."""
+    worker = worker or worker_name()
+    done = 0
+    while stop is None or not stop.is_set():
+        job = claim(worker, pk=pk)
+        if job is None:
+            break
+        execute(job)
+        done += 1
+    return done
+
+
+def release_stale():
+    """Возвращает в очередь задачи без heartbeat дольше JOBS_LOCK_TIMEOUT."""
+    deadline = timezone.now() - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT)
+    stale = Job.objects.filter(status=Job.RUNNING, locked_at__lt=deadline)
+    released = {"locked_by": "", "locked_at": None}
+    stale.filter(attempts__gte=F("max_attempts")).update(
+        status=Job.FAILED, last_error="Воркер не завершил задачу", **released
+    )
+    return stale.update(status=Job.QUEUED, **released)
+
+
+def work(stop, poll_interval):
+    """Цикл потока воркера до stop."""
+    worker = worker_name()
+    try:
+        while not stop.is_set():
+            try:
+                run_pending(worker, stop=stop)
+            except DatabaseError:
+                logger.exception("Воркер %s не смог взять задачу", worker)
+            stop.wait(poll_interval)
+    finally:
+        connection.close()
+
+
+def depth():
+    """Число задач по статусам."""
+    try:
+        counts = dict(
+            Job.objects.order_by().values_list("status").annotate(Count("pk"))
+        )
+    except DatabaseError:
+        return {}
+    return {
+        (status,): counts.get(status, 0) for status, _ in Job.STATUSES
+    }
+
+
+def oldest_ready():
+    """Сколько секунд ждёт самая старая готовая задача."""
+    now = timezone.now()
+    try:
+        oldest = ready_jobs(now).aggregate(oldest=Min("run_after"))["oldest"]
+    except DatabaseError:
+        return {}
+    return {(): (now - oldest).total_seconds() if oldest else 0}
+
+
+REGISTRY.gauge(
+    "yatube_jobs", "Задачи в таблице по статусам.",
+    labels=("status",), collect=depth,
+)
+REGISTRY.gauge(
+    "yatube_jobs_oldest_ready_seconds",
+    "Ожидание самой старой готовой задачи.",
+    collect=oldest_ready,
+)
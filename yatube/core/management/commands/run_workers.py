@@ -0,0 +1,124 @@
+import multiprocessing
+import signal
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connections
+
+from core import jobs
+from core.metrics import REGISTRY
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Метрики процесса воркеров: задержки и исходы задач."""
+
+    def do_GET(self):
+        body = REGISTRY.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(port):
+    server = ThreadingHTTPServer(("127.0.0.1", port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+
+def run_pool(threads, poll_interval, metrics_port=None):
+    """Потоки воркеров одного процесса; по SIGTERM доделывают задачи."""
+    stop = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *args: stop.set())
+    if metrics_port:
+        serve_metrics(metrics_port)
+    pool = [
+        threading.Thread(
+            target=jobs.work, args=(stop, poll_interval),
+            name=f"worker-{number}",
+        )
+        for number in range(threads)
+    ]
+    for thread in pool:
+        thread.start()
+    released = 0
+    while not stop.is_set():
+        if time.monotonic() - released >= settings.JOBS_LOCK_TIMEOUT / 2:
+            try:
+                jobs.release_stale()
+            except DatabaseError:
+                jobs.logger.exception("Не удалось вернуть зависшие задачи")
+            released = time.monotonic()
+        stop.wait(poll_interval)
+    for thread in pool:
+        thread.join()
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        "Запускает воркеры фоновых задач core.Job: процессы с пулом "
+        "потоков в каждом."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=1)
+        parser.add_argument("--threads", type=int, default=4)
+        parser.add_argument(
+            "--poll-interval", type=float,
+            default=settings.JOBS_POLL_INTERVAL,
+        )
+        parser.add_argument(
+            "--metrics-port", type=int,
+            help="Порт метрик первого процесса, у следующих на 1 больше.",
+        )
+        parser.add_argument(
+            "--burst", action="store_true",
+            help="Выполнить готовые задачи в этом процессе и выйти.",
+        )
+
+    def handle(self, *args, **options):
+        if options["burst"]:
+            jobs.release_stale()
+            done = jobs.run_pending()
+            self.stdout.write(f"Выполнено задач: {done}.")
+            return
+        processes, threads = options["processes"], options["threads"]
+        self.stdout.write(
+            f"Воркеры: процессов {processes}, потоков в каждом {threads}."
+        )
+        port = options["metrics_port"]
+        if processes == 1:
+            run_pool(threads, options["poll_interval"], port)
+            return
+        # Соединения с базой не должны достаться детям после fork.
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        children = [
+            context.Process(
+                target=run_pool,
+                args=(
+                    threads, options["poll_interval"],
+                    port + number if port else None,
+                ),
+            )
+            for number in range(processes)
+        ]
+        for child in children:
+            child.start()
+
+        def stop(*args):
+            for child in children:
+                child.terminate()
+
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, stop)
+        for child in children:
+            child.join()
@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.querylog import load_stats
+
+SORT_KEYS = ("total", "count", "p99", "mean", "max")
+
+
+class Command(BaseCommand):
+    help = "Печатает самые дорогие отпечатки SQL-запросов."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=10)
+        parser.add_argument("--sort", choices=SORT_KEYS, default="total")
+        parser.add_argument(
+            "--stats-dir", default=settings.QUERY_LOG_STATS_DIR
+        )
+
+    def handle(self, *args, **options):
+        stats = load_stats(options["stats_dir"])
+        if not stats:
+            self.stdout.write("Статистика запросов пока не собрана.")
+            return
+        top = sorted(
+            stats.items(), key=lambda item: item[1][options["sort"]],
+            reverse=True,
+        )[:options["limit"]]
+        for query, entry in top:
+            self.stdout.write(
+                "{count:>8} calls  total {total:9.3f} s  "
+                "mean {mean_ms:8.2f} ms  p99 {p99_ms:8.2f} ms  "
+                "max {max_ms:8.2f} ms".format(
+                    count=entry["count"],
+                    total=entry["total"],
+                    mean_ms=entry["mean"] * 1000,
+                    p99_ms=entry["p99"] * 1000,
+                    max_ms=entry["max"] * 1000,
+                )
+            )
+            self.stdout.write("    views: " + ", ".join(entry["views"]))
+            self.stdout.write("    " + query + "\n")
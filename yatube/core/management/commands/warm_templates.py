@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.template import engines
+
+from core.templating import is_cached, warm
+
+
+class Command(BaseCommand):
+    help = (
+        "Компилирует все шаблоны каждого движка и печатает время разбора. "
+        "Воркеры делают то же при старте, если включён TEMPLATES_WARMUP."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=10)
+
+    def handle(self, *args, **options):
+        if not is_cached(engines["django"]):
+            self.stderr.write(
+                "Кэширующий загрузчик выключен (DEBUG = True): "
+                "скомпилированные шаблоны Django не сохранятся."
+            )
+        errors = []
+        for engine in engines.all():
+            errors.extend(self.warm(engine, options["limit"]))
+        for name, error in errors:
+            self.stderr.write(f"{name}: {error}")
+        if errors:
+            raise CommandError(f"Шаблонов с ошибками: {len(errors)}")
+
+    def warm(self, engine, limit):
+        results = warm(engine)
+        timings = sorted(
+            (
+                (seconds, name) for name, seconds in results
+                if not isinstance(seconds, Exception)
+            ),
+            reverse=True,
+        )
+        total = sum(seconds for seconds, _ in timings)
+        self.stdout.write(
+            f"{engine.name}: скомпилировано шаблонов {len(timings)} "
+            f"за {total * 1000:.1f} мс"
+        )
+        for seconds, name in timings[:limit]:
+            self.stdout.write(f"{seconds * 1000:9.2f} мс  {name}")
+        return [
+            (f"{engine.name}:{name}", error) for name, error in results
+            if isinstance(error, Exception)
+        ]
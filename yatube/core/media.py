@@ -0,0 +1,143 @@
+"""Отдача файлов из MEDIA_ROOT без занятого воркера.
+
+MEDIA_SERVE_MODE выбирает способ:
+- "x-accel" отдаёт файл через nginx по заголовку X-Accel-Redirect
+  (internal location MEDIA_ACCEL_PREFIX);
+- "x-sendfile" отдаёт файл через Apache или lighttpd по заголовку
+  X-Sendfile;
+- "sendfile" отдаёт FileResponse, который WSGI-сервер с
+  wsgi.file_wrapper (gunicorn, uWSGI) пишет в сокет через os.sendfile.
+  Range и ETag в этом режиме обрабатываются здесь.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseNotModified,
+)
+from django.utils._os import safe_join
+from django.utils.http import http_date
+
+RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeFile:
+    """Файл, из которого можно прочитать не больше length байт.
+
+    fileno() отдаётся как есть: sendfile начнёт с текущей позиции и
+    возьмёт ровно Content-Length байт.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """(start, end) для одного диапазона, None — отдать весь файл.
+
+    Несколько диапазонов не поддерживаются, и тогда отдаётся весь файл,
+    что допускает RFC 7233. ValueError — диапазон вне файла.
+    """
+    match = RANGE.match(header.replace(" ", ""))
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def make_etag(stat):
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def _etag_matches(header, etag):
+    return header is not None and (
+        header.strip() == "*"
+        or etag in [value.strip() for value in header.split(",")]
+    )
+
+
+def serve(request, name):
+    """Отдаёт MEDIA_ROOT/name способом из MEDIA_SERVE_MODE."""
+    try:
+        path = safe_join(settings.MEDIA_ROOT, name)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(path):
+        raise Http404
+    content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    mode = settings.MEDIA_SERVE_MODE
+    if mode == "x-accel":
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = settings.MEDIA_ACCEL_PREFIX + quote(
+            name
+        )
+        return response
+    if mode == "x-sendfile":
+        response = HttpResponse(content_type=content_type)
+        response["X-Sendfile"] = path
+        return response
+    return _file_response(request, path, content_type)
+
+
+def _file_response(request, path, content_type):
+    stat = os.stat(path)
+    etag = make_etag(stat)
+    if _etag_matches(request.META.get("HTTP_IF_NONE_MATCH"), etag):
+        response = HttpResponseNotModified()
+        response["ETag"] = etag
+        return response
+    byte_range = None
+    if_range = request.META.get("HTTP_IF_RANGE")
+    if "HTTP_RANGE" in request.META and if_range in (None, etag):
+        try:
+            byte_range = parse_range(request.META["HTTP_RANGE"], stat.st_size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{stat.st_size}"
+            return response
+    source = open(path, "rb")
+    if byte_range is None:
+        response = FileResponse(source, content_type=content_type)
+        response["Content-Length"] = stat.st_size
+    else:
+        start, end = byte_range
+        response = FileResponse(
+            RangeFile(source, start, end - start + 1),
+            content_type=content_type,
+            status=206,
+        )
+        response["Content-Length"] = end - start + 1
+        response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    response["Cache-Control"] = f"public, max-age={settings.MEDIA_MAX_AGE}"
+    return response
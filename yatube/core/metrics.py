@@ -0,0 +1,386 @@
+"""Лёгкие метрики процесса в формате Prometheus.
+
+Метрики копятся в памяти воркера: гистограммы хранят счётчики по
+корзинам, поэтому запись одного наблюдения — это bisect и сложение под
+блокировкой. Статистика текущего запроса (запросы к БД, рендер шаблонов,
+обращения к кэшу) лежит в thread-local и заполняется обёртками,
+которые ставит instrument().
+"""
+import bisect
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.template.base import Template
+
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(name, str(value).replace('"', '\\"'))
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(labels[name] for name in self.labels), 0)
+
+    def samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in sorted(values):
+            yield self.name, _format_labels(self.labels, key), value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 3)
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        series = self._series.get(key)
+        return series[-1] if series else 0
+
+    def samples(self):
+        with self._lock:
+            series = [
+                (key, list(values)) for key, values in self._series.items()
+            ]
+        names = self.labels + ("le",)
+        for key, values in sorted(series):
+            cumulative = 0
+            for bound, hits in zip(self.buckets + ("+Inf",), values):
+                cumulative += hits
+                yield (
+                    self.name + "_bucket",
+                    _format_labels(names, key + (bound,)),
+                    cumulative,
+                )
+            labels = _format_labels(self.labels, key)
+            yield self.name + "_sum", labels, values[-2]
+            yield self.name + "_count", labels, values[-1]
+
+
+class Gauge:
+    """Значения, которые collect() считает при каждой выдаче метрик."""
+
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labels=(), collect=dict):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.collect = collect
+
+    def samples(self):
+        for key, value in sorted(self.collect().items()):
+            yield self.name, _format_labels(self.labels, key), value
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self._get_or_create(Counter, name, help_text, labels)
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        return self._get_or_create(
+            Histogram, name, help_text, labels, buckets=buckets
+        )
+
+    def gauge(self, name, help_text, labels=(), collect=dict):
+        return self._get_or_create(
+            Gauge, name, help_text, labels, collect=collect
+        )
+
+    def render(self):
+        lines = []
+        for name, metric in sorted(self._metrics.items()):
+            lines.append(f"# HELP {name} {metric.help_text}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for sample, labels, value in metric.samples():
+                lines.append(f"{sample}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUEST_DURATION = REGISTRY.histogram(
+    "yatube_request_duration_seconds",
+    "Полное время обработки запроса.",
+    labels=("view", "method"),
+)
+REQUESTS = REGISTRY.counter(
+    "yatube_requests_total",
+    "Количество обработанных запросов.",
+    labels=("view", "method", "status"),
+)
+DB_QUERIES = REGISTRY.histogram(
+    "yatube_db_queries_per_request",
+    "Количество SQL-запросов за один запрос.",
+    labels=("view",),
+    buckets=COUNT_BUCKETS,
+)
+DB_DURATION = REGISTRY.histogram(
+    "yatube_db_duration_seconds",
+    "Время SQL-запросов за один запрос.",
+    labels=("view",),
+)
+TEMPLATE_DURATION = REGISTRY.histogram(
+    "yatube_template_render_seconds",
+    "Время рендера шаблонов за один запрос.",
+    labels=("view",),
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    "yatube_cache_requests_total",
+    "Обращения к кэшу по результату.",
+    labels=("view", "result"),
+)
+COMPRESSION_BYTES = REGISTRY.counter(
+    "yatube_compression_bytes_total",
+    "Байты тел ответов до и после сжатия.",
+    labels=("coding", "stage"),
+)
+PASSWORD_HASH_DURATION = REGISTRY.histogram(
+    "yatube_password_hash_seconds",
+    "Время одного хеширования пароля.",
+    labels=("algorithm",),
+)
+PASSWORD_HASH_REJECTED = REGISTRY.counter(
+    "yatube_password_hash_rejected_total",
+    "Хеширования, не дождавшиеся бюджета CPU воркера.",
+    labels=("algorithm",),
+)
+RATELIMIT_REJECTED = REGISTRY.counter(
+    "yatube_ratelimit_rejected_total",
+    "Запросы, отклонённые ограничением частоты.",
+    labels=("rule", "key"),
+)
+RATELIMIT_FALLBACK = REGISTRY.counter(
+    "yatube_ratelimit_fallback_total",
+    "Проверки корзин в памяти процесса из-за ошибки кэша.",
+)
+WRITE_BEHIND_ENTRIES = REGISTRY.counter(
+    "yatube_write_behind_entries_total",
+    "Записи очереди отложенной записи по этапам.",
+    labels=("kind", "stage"),
+)
+WRITE_BEHIND_DURATION = REGISTRY.histogram(
+    "yatube_write_behind_flush_seconds",
+    "Время записи одной пачки очереди в базу.",
+)
+JOBS_ENQUEUED = REGISTRY.counter(
+    "yatube_jobs_enqueued_total",
+    "Фоновые задачи, поставленные в очередь.",
+    labels=("name",),
+)
+JOBS_FINISHED = REGISTRY.counter(
+    "yatube_jobs_finished_total",
+    "Попытки выполнения фоновых задач по исходу.",
+    labels=("name", "status"),
+)
+JOB_WAIT = REGISTRY.histogram(
+    "yatube_job_wait_seconds",
+    "Время от готовности задачи до её взятия воркером.",
+    labels=("name",),
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900),
+)
+JOB_DURATION = REGISTRY.histogram(
+    "yatube_job_duration_seconds",
+    "Время выполнения фоновой задачи.",
+    labels=("name",),
+)
+
+
+class RequestStats:
+    __slots__ = (
+        "queries",
+        "db_time",
+        "template_time",
+        "template_depth",
+        "cache_hits",
+        "cache_misses",
+    )
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+_local = threading.local()
+
+
+def current_stats():
+    return getattr(_local, "stats", None)
+
+
+def start_request():
+    _local.stats = RequestStats()
+    return _local.stats
+
+
+def finish_request():
+    _local.stats = None
+
+
+def db_wrapper(execute, sql, params, many, context):
+    stats = current_stats()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_time += time.perf_counter() - start
+        stats.queries += 1
+
+
+_MISSING = object()
+_instrumented = False
+_instrument_lock = threading.Lock()
+
+
+def _instrument_template():
+    original = Template.render
+
+    def render(self, context):
+        stats = current_stats()
+        if stats is None or stats.template_depth:
+            return original(self, context)
+        stats.template_depth += 1
+        start = time.perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            stats.template_time += time.perf_counter() - start
+            stats.template_depth -= 1
+
+    Template.render = render
+
+
+def _instrument_cache_class(cls):
+    original_get = cls.get
+    original_get_many = cls.get_many
+
+    def get(self, key, default=None, version=None):
+        value = original_get(self, key, _MISSING, version)
+        stats = current_stats()
+        if value is _MISSING:
+            if stats is not None:
+                stats.cache_misses += 1
+            return default
+        if stats is not None:
+            stats.cache_hits += 1
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = original_get_many(self, keys, version)
+        stats = current_stats()
+        if stats is not None:
+            stats.cache_hits += len(found)
+            stats.cache_misses += len(keys) - len(found)
+        return found
+
+    cls.get = get
+    # BaseCache.get_many вызывает get для каждого ключа, и он уже посчитан.
+    if original_get_many is not BaseCache.get_many:
+        cls.get_many = get_many
+
+
+def instrument():
+    """Ставит обёртки на рендер шаблонов и кэши. Вызывается один раз."""
+    global _instrumented
+    with _instrument_lock:
+        if _instrumented:
+            return
+        _instrument_template()
+        patched = set()
+        for alias in settings.CACHES:
+            cls = type(caches[alias])
+            if cls not in patched:
+                _instrument_cache_class(cls)
+                patched.add(cls)
+        _instrumented = True
+
+
+def server_timing(stats, total):
+    return ", ".join((
+        f'db;dur={stats.db_time * 1000:.2f};desc="{stats.queries} queries"',
+        f"tpl;dur={stats.template_time * 1000:.2f}",
+        f'cache;desc="{stats.cache_hits} hits, {stats.cache_misses} misses"',
+        f"total;dur={total * 1000:.2f}",
+    ))
+
+
+def record(view, method, status, stats, total):
+    REQUEST_DURATION.observe(total, view=view, method=method)
+    REQUESTS.inc(view=view, method=method, status=status)
+    DB_QUERIES.observe(stats.queries, view=view)
+    DB_DURATION.observe(stats.db_time, view=view)
+    TEMPLATE_DURATION.observe(stats.template_time, view=view)
+    if stats.cache_hits:
+        CACHE_REQUESTS.inc(stats.cache_hits, view=view, result="hit")
+    if stats.cache_misses:
+        CACHE_REQUESTS.inc(stats.cache_misses, view=view, result="miss")
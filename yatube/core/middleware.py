@@ -0,0 +1,227 @@
+import itertools
+import random
+import threading
+import time
+from contextlib import ExitStack
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+
+from core import encoding, metrics, profiler, querylog, ratelimit
+
+
+class MetricsMiddleware:
+    """Считает время запроса, SQL, рендер шаблонов и обращения к кэшу.
+
+    Итог отдаётся клиенту в заголовке Server-Timing и копится
+    в гистограммах, которые публикует страница /metrics/.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        metrics.instrument()
+
+    def __call__(self, request):
+        stats = metrics.start_request()
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(metrics.db_wrapper)
+                    )
+                response = self.get_response(request)
+        finally:
+            metrics.finish_request()
+        total = time.perf_counter() - start
+        match = request.resolver_match
+        view = match.view_name if match else "unmatched"
+        response["Server-Timing"] = metrics.server_timing(stats, total)
+        metrics.record(
+            view, request.method, response.status_code, stats, total
+        )
+        return response
+
+
+class QueryLogMiddleware:
+    """Пишет медленные SQL-запросы и статистику по отпечаткам.
+
+    Учитываются только запросы из представлений, чьи модули перечислены
+    в QUERY_LOG_VIEW_MODULES. Статистика собирается для доли запросов
+    QUERY_LOG_SAMPLE_RATE, медленные запросы журналируются всегда.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sampled = random.random() < settings.QUERY_LOG_SAMPLE_RATE
+        wrapper = querylog.QueryLogger(request, sampled)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(wrapper))
+            response = self.get_response(request)
+        if sampled:
+            querylog.STATS.flush()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        module = getattr(view_func, "__module__", "") or ""
+        if module.startswith(settings.QUERY_LOG_VIEW_MODULES):
+            request.querylog_view = request.resolver_match.view_name
+
+
+class ProfilerMiddleware:
+    """Профилирует каждый PROFILER_SAMPLE_RATE-й запрос.
+
+    Запрос с подписанным заголовком PROFILER_HEADER профилируется всегда.
+    Собранные стеки доступны персоналу на странице admin/profiler/.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILER_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self._requests = itertools.count(1)
+
+    def _should_profile(self, request):
+        token = request.META.get(settings.PROFILER_HEADER)
+        if token and profiler.check_token(token):
+            return True
+        rate = settings.PROFILER_SAMPLE_RATE
+        return bool(rate) and next(self._requests) % rate == 0
+
+    def __call__(self, request):
+        if not self._should_profile(request):
+            return self.get_response(request)
+        sampler = profiler.Sampler(
+            threading.get_ident(), settings.PROFILER_INTERVAL
+        )
+        sampler.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            stacks = sampler.stop()
+        match = request.resolver_match
+        profiler.STORE.add(match.view_name if match else "unmatched", stacks)
+        return response
+
+
+class RateLimitMiddleware:
+    """Правила RATELIMIT_VIEWS для представлений без декоратора ratelimit.
+
+    Ключ словаря — имя URL вида "users:login", значение — имя правила.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        name = settings.RATELIMIT_VIEWS.get(request.resolver_match.view_name)
+        if name is None:
+            return None
+        retry_after = ratelimit.check(request, name)
+        if retry_after is None:
+            return None
+        return ratelimit.rejected(request, retry_after)
+
+
+class CompressionMiddleware:
+    """Сжимает ответы br, zstd или gzip по Accept-Encoding.
+
+    Сжимаются только типы из COMPRESSION_LEVELS, у каждого свой уровень
+    для каждой кодировки. Картинки, архивы, /media/ и ответы, уже
+    имеющие Content-Encoding, проходят как есть. Потоковые ответы
+    сжимаются по частям. Сжатое тело обычного ответа кэшируется по хэшу
+    содержимого в отдельном COMPRESSION_CACHE: страница, собранная из
+    кэша, не сжимается заново.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.codings = encoding.available_codings(settings.COMPRESSION_CODINGS)
+
+    def _levels(self, request, response):
+        if response.status_code != 200 or response.has_header(
+            "Content-Encoding"
+        ):
+            return None
+        if "no-transform" in response.get("Cache-Control", ""):
+            return None
+        if request.path.startswith(settings.MEDIA_URL):
+            return None
+        content_type = response.get("Content-Type", "").partition(";")[0]
+        return settings.COMPRESSION_LEVELS.get(content_type.strip().lower())
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        levels = self._levels(request, response)
+        if levels is None:
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+        coding = encoding.negotiate(
+            request.META.get("HTTP_ACCEPT_ENCODING"),
+            [coding for coding in self.codings if coding in levels],
+        )
+        if coding is None:
+            return response
+        level = levels[coding]
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                response.streaming_content, coding, level
+            )
+            del response["Content-Length"]
+        else:
+            content = response.content
+            if len(content) < settings.COMPRESSION_MIN_SIZE:
+                return response
+            body = compress_cached(content, coding, level)
+            if len(body) >= len(content):
+                return response
+            response.content = body
+            response["Content-Length"] = len(body)
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        response["Content-Encoding"] = coding
+        return response
+
+
+def compress_cached(content, coding, level):
+    """Сжатое тело из кэша по md5 содержимого или сжатое заново."""
+    cache, key = caches[settings.COMPRESSION_CACHE], None
+    if len(content) <= settings.COMPRESSION_CACHE_MAX_SIZE:
+        digest = md5(content).hexdigest()
+        key = f"compressed:{coding}:{level}:{digest}"
+        body = cache.get(key)
+        if body is not None:
+            return body
+    body = encoding.compress(coding, content, level)
+    metrics.COMPRESSION_BYTES.inc(len(content), coding=coding, stage="in")
+    metrics.COMPRESSION_BYTES.inc(len(body), coding=coding, stage="out")
+    if key is not None:
+        cache.set(key, body, settings.COMPRESSION_CACHE_TIMEOUT)
+    return body
+
+
+def compress_stream(chunks, coding, level):
+    """Сжимает поток по частям; пустые куски компрессора не отдаются."""
+    stream = encoding.compressobj(coding, level)
+    for chunk in chunks:
+        data = stream.compress(chunk)
+        metrics.COMPRESSION_BYTES.inc(len(chunk), coding=coding, stage="in")
+        if data:
+            metrics.COMPRESSION_BYTES.inc(
+                len(data), coding=coding, stage="out"
+            )
+            yield data
+    data = stream.flush()
+    metrics.COMPRESSION_BYTES.inc(len(data), coding=coding, stage="out")
+    yield data
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 
 class CreatedModel(models.Model):
@@ -8,3 +9,41 @@ class CreatedModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class Job(models.Model):
+    """Отложенная задача для run_workers, см. core.jobs."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    FAILED = "failed"
+    STATUSES = (
+        (QUEUED, "В очереди"),
+        (RUNNING, "Выполняется"),
+        (FAILED, "Ошибка"),
+    )
+
+    name = models.CharField("Задача", max_length=100)
+    payload = models.TextField("Аргументы в JSON", default="{}")
+    priority = models.SmallIntegerField("Приоритет", default=0)
+    status = models.CharField(
+        "Статус", max_length=10, choices=STATUSES, default=QUEUED
+    )
+    attempts = models.PositiveSmallIntegerField("Попыток", default=0)
+    max_attempts = models.PositiveSmallIntegerField("Предел попыток")
+    run_after = models.DateTimeField("Не раньше", default=timezone.now)
+    created = models.DateTimeField("Дата создания", auto_now_add=True)
+    locked_by = models.CharField("Воркер", max_length=100, blank=True)
+    locked_at = models.DateTimeField("Взята", null=True, blank=True)
+    last_error = models.TextField("Последняя ошибка", blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["status", "-priority", "run_after"],
+                name="job_claim_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk}"
@@ -0,0 +1,114 @@
+"""Сэмплирующий профилировщик запросов.
+
+Пока идёт профилируемый запрос, отдельный поток раз в PROFILER_INTERVAL
+снимает стек рабочего потока через sys._current_frames(). Стеки
+сворачиваются в формат folded (`a;b;c 42`), который понимают
+flamegraph.pl и speedscope, и копятся по имени URL в ограниченном буфере.
+"""
+import sys
+import threading
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core import signing
+from django.template.base import Template
+
+TOKEN_SALT = "core.profiler"
+TOKEN_VALUE = "profile"
+
+_TEMPLATE_RENDER_CODE = Template._render.__code__
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    if code is _TEMPLATE_RENDER_CODE:
+        template = frame.f_locals.get("self")
+        return f"template:{getattr(template, 'name', None) or '?'}"
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{code.co_name}"
+
+
+def collapse(frame):
+    """Сворачивает стек от корня к листу в строку folded-формата."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class Sampler(threading.Thread):
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse(frame)] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+        return self.stacks
+
+
+class ProfileStore:
+    """Ограниченный буфер профилей: последние имена URL и частые стеки."""
+
+    def __init__(self, max_views, max_stacks):
+        self.max_views = max_views
+        self.max_stacks = max_stacks
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, view, stacks):
+        with self._lock:
+            requests, profile = self._profiles.pop(view, (0, Counter()))
+            profile.update(stacks)
+            if len(profile) > self.max_stacks:
+                profile = Counter(dict(profile.most_common(self.max_stacks)))
+            self._profiles[view] = (requests + 1, profile)
+            while len(self._profiles) > self.max_views:
+                self._profiles.popitem(last=False)
+
+    def summary(self):
+        with self._lock:
+            return [
+                (view, requests, sum(profile.values()))
+                for view, (requests, profile) in self._profiles.items()
+            ]
+
+    def folded(self, view):
+        with self._lock:
+            _, profile = self._profiles.get(view, (0, Counter()))
+            stacks = profile.most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def clear(self):
+        with self._lock:
+            self._profiles.clear()
+
+
+STORE = ProfileStore(
+    settings.PROFILER_MAX_VIEWS, settings.PROFILER_MAX_STACKS
+)
+
+
+def make_token():
+    """Подписанное значение заголовка, включающего профилирование."""
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign(TOKEN_VALUE)
+
+
+def check_token(token):
+    try:
+        value = signing.TimestampSigner(salt=TOKEN_SALT).unsign(
+            token, max_age=settings.PROFILER_TOKEN_MAX_AGE
+        )
+    except signing.BadSignature:
+        return False
+    return value == TOKEN_VALUE
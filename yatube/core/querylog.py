@@ -0,0 +1,184 @@
+"""Журнал медленных SQL-запросов и статистика по отпечаткам запросов.
+
+Отпечаток — текст запроса без литералов и параметров, так что все
+выборки одного вида складываются в одну строку статистики. Статистика
+копится в памяти процесса и периодически сбрасывается в JSON-файл,
+откуда её читает команда top_queries.
+"""
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+import traceback
+from functools import lru_cache
+
+from django.conf import settings
+
+logger = logging.getLogger("yatube.slow_queries")
+
+RESERVOIR_SIZE = 512
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_RE = re.compile(r"%s|\?")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(sql):
+    """Убирает из запроса литералы, чтобы похожие запросы совпадали."""
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _PLACEHOLDER_RE.sub("?", sql)
+    sql = _IN_LIST_RE.sub("(...)", sql)
+    return _SPACE_RE.sub(" ", sql).strip()
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class FingerprintStats:
+    __slots__ = ("count", "total", "max", "samples", "views")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = []
+        self.views = set()
+
+    def add(self, duration, view):
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+        self.views.add(view)
+        if len(self.samples) < RESERVOIR_SIZE:
+            self.samples.append(duration)
+        else:
+            index = random.randrange(self.count)
+            if index < RESERVOIR_SIZE:
+                self.samples[index] = duration
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "total": self.total,
+            "max": self.max,
+            "samples": self.samples,
+            "views": sorted(self.views),
+        }
+
+
+class QueryStats:
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+
+    def add(self, sql, duration, view):
+        key = fingerprint(sql)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = FingerprintStats()
+            stats.add(duration, view)
+
+    def snapshot(self):
+        with self._lock:
+            return {key: stats.as_dict() for key, stats in self._stats.items()}
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def flush(self, force=False):
+        """Сохраняет статистику процесса в каталог QUERY_LOG_STATS_DIR."""
+        now = time.monotonic()
+        if not force and now - self._flushed_at < (
+            settings.QUERY_LOG_FLUSH_INTERVAL
+        ):
+            return
+        self._flushed_at = now
+        os.makedirs(settings.QUERY_LOG_STATS_DIR, exist_ok=True)
+        path = os.path.join(
+            settings.QUERY_LOG_STATS_DIR, f"querystats-{os.getpid()}.json"
+        )
+        temp_path = path + ".tmp"
+        with open(temp_path, "w") as stats_file:
+            json.dump(self.snapshot(), stats_file)
+        os.replace(temp_path, path)
+
+
+STATS = QueryStats()
+
+
+def load_stats(directory):
+    """Сливает снимки всех процессов в одну таблицу по отпечаткам."""
+    merged = {}
+    if not os.path.isdir(directory):
+        return merged
+    for name in os.listdir(directory):
+        if not name.endswith(".json"):
+            continue
+        with open(os.path.join(directory, name)) as stats_file:
+            snapshot = json.load(stats_file)
+        for key, stats in snapshot.items():
+            entry = merged.setdefault(key, {
+                "count": 0, "total": 0.0, "max": 0.0,
+                "samples": [], "views": set(),
+            })
+            entry["count"] += stats["count"]
+            entry["total"] += stats["total"]
+            entry["max"] = max(entry["max"], stats["max"])
+            entry["samples"].extend(stats["samples"])
+            entry["views"].update(stats["views"])
+    for entry in merged.values():
+        entry["p99"] = percentile(entry.pop("samples"), 0.99)
+        entry["mean"] = entry["total"] / entry["count"]
+    return merged
+
+
+def _stack_excerpt():
+    frames = [
+        frame for frame in traceback.extract_stack()[:-3]
+        if frame.filename.startswith(settings.BASE_DIR)
+        and not frame.filename.endswith(("querylog.py", "middleware.py"))
+    ]
+    return "".join(traceback.format_list(frames[-settings.QUERY_LOG_STACK:]))
+
+
+class QueryLogger:
+    """Обёртка для connection.execute_wrapper на время одного запроса."""
+
+    def __init__(self, request, sampled):
+        self.request = request
+        self.sampled = sampled
+
+    def __call__(self, execute, sql, params, many, context):
+        view = getattr(self.request, "querylog_view", None)
+        if view is None:
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            if self.sampled:
+                STATS.add(sql, duration, view)
+            if duration * 1000 >= settings.QUERY_LOG_SLOW_MS:
+                logger.warning(
+                    "slow query %.1f ms in %s: %s\n%s",
+                    duration * 1000,
+                    view,
+                    sql,
+                    _stack_excerpt(),
+                )
@@ -0,0 +1,225 @@
+"""Ограничение частоты запросов корзинами токенов.
+
+Правило из RATELIMIT_RULES задаёт скорость пополнения и размер корзины;
+корзины ведутся отдельно для пользователя и для IP. В кэше RATELIMIT_CACHE
+корзина — одно целое число, теоретическое время прихода следующего
+запроса в миллисекундах (GCRA, равносильно корзине токенов). Его двигают
+атомарные incr и decr, поэтому воркеры делят корзину без блокировок.
+Если кэш не поддерживает incr или недоступен, корзины ведутся в памяти
+процесса.
+
+За обратным прокси из RATELIMIT_TRUSTED_PROXIES адрес клиента берётся
+из X-Forwarded-For, иначе все клиенты делили бы корзину прокси.
+
+Функциональные представления оборачивает декоратор ratelimit, а
+RateLimitMiddleware применяет правила RATELIMIT_VIEWS к остальным,
+например к LoginView.
+"""
+import ipaddress
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from functools import lru_cache, wraps
+
+from django.conf import settings
+from django.core.cache import InvalidCacheBackendError, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.shortcuts import render
+
+from core.metrics import RATELIMIT_FALLBACK, RATELIMIT_REJECTED
+
+logger = logging.getLogger("yatube.ratelimit")
+
+PERIODS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+DEFAULT_KEYS = ("user", "ip")
+DEFAULT_METHODS = ("POST",)
+
+Rule = namedtuple("Rule", "name interval burst keys methods")
+
+
+def parse_rate(rate):
+    """Миллисекунды между токенами для скорости вида "10/m"."""
+    count, period = rate.split("/")
+    return PERIODS[period] * 1000 / int(count)
+
+
+def get_rule(name):
+    config = settings.RATELIMIT_RULES[name]
+    return Rule(
+        name=name,
+        interval=max(1, round(parse_rate(config["rate"]))),
+        burst=config["burst"],
+        keys=config.get("keys", DEFAULT_KEYS),
+        methods=config.get("methods", DEFAULT_METHODS),
+    )
+
+
+def _timeout(milliseconds):
+    return math.ceil(milliseconds / 1000) + 1
+
+
+class CacheBuckets:
+    def __init__(self, cache):
+        self.cache = cache
+
+    def take(self, key, interval, burst, now):
+        """Забирает токен: (разрешено, мс до следующего токена)."""
+        try:
+            tat = self.cache.incr(key, interval)
+        except ValueError:
+            if self.cache.add(key, now + interval, _timeout(interval)):
+                return True, 0
+            tat = self.cache.incr(key, interval)
+        if tat - interval < now:
+            # Корзина полна: время отстало от часов, его догоняет set.
+            # При гонке пропадёт несколько токенов, а не лишние запросы.
+            self.cache.set(key, now + interval, _timeout(interval))
+            return True, 0
+        wait = tat - now - burst * interval
+        if wait > 0:
+            try:
+                self.cache.decr(key, interval)
+            except ValueError:
+                pass
+            return False, wait
+        self.cache.touch(key, _timeout(tat - now))
+        return True, 0
+
+
+class LocalBuckets:
+    """Те же корзины в памяти процесса, не больше max_keys штук."""
+
+    def __init__(self, max_keys):
+        self.max_keys = max_keys
+        self._tats = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, interval, burst, now):
+        with self._lock:
+            tat = max(self._tats.pop(key, now), now) + interval
+            wait = tat - now - burst * interval
+            if wait > 0:
+                self._tats[key] = tat - interval
+                return False, wait
+            self._tats[key] = tat
+            while len(self._tats) > self.max_keys:
+                self._tats.popitem(last=False)
+        return True, 0
+
+
+_local = None
+
+
+def local_buckets():
+    global _local
+    if _local is None:
+        _local = LocalBuckets(settings.RATELIMIT_LOCAL_MAX_KEYS)
+    return _local
+
+
+def take(key, interval, burst, now):
+    try:
+        cache = caches[settings.RATELIMIT_CACHE]
+    except InvalidCacheBackendError:
+        cache = None
+    if cache is None or isinstance(cache, DummyCache):
+        return local_buckets().take(key, interval, burst, now)
+    try:
+        return CacheBuckets(cache).take(key, interval, burst, now)
+    except Exception:
+        logger.warning("Кэш корзин недоступен", exc_info=True)
+        RATELIMIT_FALLBACK.inc()
+        return local_buckets().take(key, interval, burst, now)
+
+
+@lru_cache(maxsize=None)
+def trusted_networks(proxies):
+    return tuple(
+        ipaddress.ip_network(proxy, strict=False) for proxy in proxies
+    )
+
+
+def is_trusted(address):
+    try:
+        address = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(
+        address in network
+        for network in trusted_networks(
+            tuple(settings.RATELIMIT_TRUSTED_PROXIES)
+        )
+    )
+
+
+def client_ip(request):
+    """Адрес клиента с учётом X-Forwarded-For от доверенных прокси.
+
+    Цепочка читается справа налево, пока адреса принадлежат доверенным
+    прокси: первый чужой адрес добавил последний доверенный прокси, и
+    подделать его клиент не может.
+    """
+    address = request.META.get("REMOTE_ADDR", "")
+    if not is_trusted(address):
+        return address
+    forwarded = request.META.get("HTTP_X_FORWARDED_FOR", "")
+    for hop in reversed(forwarded.split(",")):
+        hop = hop.strip()
+        if not hop:
+            continue
+        address = hop
+        if not is_trusted(hop):
+            break
+    return address
+
+
+def client_keys(request, rule):
+    """Пары (вид ключа, значение), по которым считается запрос."""
+    for kind in rule.keys:
+        if kind == "user":
+            if request.user.is_authenticated:
+                yield kind, str(request.user.pk)
+        elif kind == "ip":
+            yield kind, client_ip(request)
+
+
+def check(request, name):
+    """None, если запрос укладывается в правило, иначе секунды до повтора."""
+    if not settings.RATELIMIT_ENABLED:
+        return None
+    rule = get_rule(name)
+    if request.method not in rule.methods:
+        return None
+    now = int(time.time() * 1000)
+    for kind, value in client_keys(request, rule):
+        allowed, wait = take(
+            f"ratelimit:{name}:{kind}:{value}", rule.interval, rule.burst, now
+        )
+        if not allowed:
+            RATELIMIT_REJECTED.inc(rule=name, key=kind)
+            return math.ceil(wait / 1000)
+    return None
+
+
+def rejected(request, retry_after):
+    response = render(
+        request, settings.RATELIMIT_TEMPLATE, {"retry_after": retry_after},
+        status=settings.RATELIMIT_STATUS,
+    )
+    response["Retry-After"] = retry_after
+    return response
+
+
+def ratelimit(name):
+    """Декоратор представления: правило name из RATELIMIT_RULES."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            retry_after = check(request, name)
+            if retry_after is not None:
+                return rejected(request, retry_after)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
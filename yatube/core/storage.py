@@ -0,0 +1,56 @@
+import gzip
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+from core.encoding import brotli
+
+HASHED_NAME = re.compile(r"\.[0-9a-f]{12}\.[^./]+$")
+
+
+def is_hashed(name):
+    """Имя файла с хэшем содержимого, который добавляет Manifest-хранилище."""
+    return bool(HASHED_NAME.search(name))
+
+
+def compress_file(path):
+    """Пишет рядом .gz и, если есть brotli, .br; возвращает их суффиксы.
+
+    Сжатая копия остаётся, только если она заметно меньше оригинала.
+    """
+    with open(path, "rb") as source:
+        data = source.read()
+    variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(data, quality=11)
+    written = []
+    for suffix, compressed in variants.items():
+        if len(compressed) < len(data) * settings.STATIC_COMPRESS_RATIO:
+            with open(path + suffix, "wb") as output:
+                output.write(compressed)
+            written.append(suffix)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Manifest-хранилище, которое после collectstatic сжимает файлы."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = set()
+        for name, hashed_name, processed in super().post_process(
+            paths, dry_run, **options
+        ):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_names.add(hashed_name)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for hashed_name in sorted(hashed_names):
+            extension = os.path.splitext(hashed_name)[1].lower()
+            if extension not in settings.STATIC_COMPRESS_EXTENSIONS:
+                continue
+            path = self.path(hashed_name)
+            if os.path.getsize(path) >= settings.STATIC_COMPRESS_MIN_SIZE:
+                compress_file(path)
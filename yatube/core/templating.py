@@ -0,0 +1,100 @@
+"""Кэширующий загрузчик шаблонов и его прогрев.
+
+С cached.Loader шаблон читается с диска и разбирается один раз на
+процесс. warm() делает это для всех шаблонов из TEMPLATES_DIR и папок
+templates приложений при старте воркера, поэтому первый запрос к
+странице не платит за разбор. Окружение Jinja2 тоже хранит
+скомпилированные шаблоны, и warm_all() прогревает все движки.
+"""
+import copy
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.template import TemplateSyntaxError, engines
+from django.template.loaders.cached import Loader as CachedLoader
+
+logger = logging.getLogger("yatube.templates")
+
+CACHED_LOADER = "django.template.loaders.cached.Loader"
+
+
+def engine_config(cached):
+    """Настройки движка Django из TEMPLATES с кэширующим загрузчиком или без.
+
+    APP_DIRS заменяется явным списком TEMPLATE_LOADERS: Django не
+    разрешает задавать их вместе.
+    """
+    config = copy.deepcopy(settings.TEMPLATES[0])
+    config["APP_DIRS"] = False
+    loaders = list(settings.TEMPLATE_LOADERS)
+    config["OPTIONS"]["loaders"] = (
+        [(CACHED_LOADER, loaders)] if cached else loaders
+    )
+    return config
+
+
+def is_cached(engine):
+    return any(
+        isinstance(loader, CachedLoader)
+        for loader in engine.engine.template_loaders
+    )
+
+
+def _loaders(loaders):
+    for loader in loaders:
+        if isinstance(loader, CachedLoader):
+            yield from _loaders(loader.loaders)
+        else:
+            yield loader
+
+
+def template_dirs(engine):
+    """Папки шаблонов движка; у Django они берутся из его загрузчиков."""
+    if not hasattr(engine, "engine"):
+        return [str(directory) for directory in engine.template_dirs]
+    dirs = []
+    for loader in _loaders(engine.engine.template_loaders):
+        if hasattr(loader, "get_dirs"):
+            dirs.extend(str(directory) for directory in loader.get_dirs())
+    return list(dict.fromkeys(dirs))
+
+
+def template_names(engine):
+    """Имена всех шаблонов в папках загрузчиков движка."""
+    names = set()
+    for directory in template_dirs(engine):
+        for root, _, files in os.walk(directory):
+            for file_name in files:
+                if file_name.endswith(settings.TEMPLATES_WARMUP_EXTENSIONS):
+                    path = os.path.relpath(
+                        os.path.join(root, file_name), directory
+                    )
+                    names.add(path.replace(os.sep, "/"))
+    return sorted(names)
+
+
+def warm(engine=None):
+    """Компилирует все шаблоны движка.
+
+    Возвращает список (имя, секунды); для шаблона с ошибкой вместо
+    секунд стоит исключение, а прогрев продолжается.
+    """
+    engine = engine or engines["django"]
+    results = []
+    for name in template_names(engine):
+        start = time.perf_counter()
+        try:
+            engine.get_template(name)
+        except TemplateSyntaxError as error:
+            logger.warning("Шаблон %s не компилируется: %s", name, error)
+            results.append((name, error))
+            continue
+        results.append((name, time.perf_counter() - start))
+    return results
+
+
+def warm_all():
+    """Прогревает все движки из TEMPLATES: {имя движка: результат warm}."""
+    return {engine.name: warm(engine) for engine in engines.all()}
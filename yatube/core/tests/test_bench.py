@@ -0,0 +1,27 @@
+from django.test import SimpleTestCase
+
+from ..bench import compare, summarize
+
+
+class BenchTests(SimpleTestCase):
+    def test_summarize(self):
+        summary = summarize([0.001] * 98 + [0.01, 0.1])
+        self.assertEqual(summary["count"], 100)
+        self.assertAlmostEqual(summary["p50_ms"], 1)
+        self.assertAlmostEqual(summary["p99_ms"], 10)
+
+    def test_compare_reports_regressions(self):
+        """Рост p95 выше порога и лишние запросы считаются регрессией."""
+        baseline = {
+            "index": {"p95_ms": 10.0, "queries": 3},
+            "group": {"p95_ms": 10.0, "queries": 3},
+        }
+        results = {
+            "index": {"p95_ms": 11.0, "queries": 3},
+            "group": {"p95_ms": 13.0, "queries": 4},
+            "new": {"p95_ms": 100.0, "queries": 10},
+        }
+        self.assertEqual(
+            compare(results, baseline, threshold=0.2),
+            [("group", "p95_ms", 10.0, 13.0), ("group", "queries", 3, 4)],
+        )
@@ -0,0 +1,151 @@
+import gzip
+from unittest import mock
+
+from django.core.cache import cache, caches
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from core import encoding
+from core.middleware import CompressionMiddleware
+
+HTML = b"<article><p>Text of the post</p></article>\n" * 200
+
+
+def middleware(response):
+    return CompressionMiddleware(lambda request: response)
+
+
+@override_settings(COMPRESSION_CODINGS=("gzip",))
+class CompressionMiddlewareTests(TestCase):
+    def setUp(self):
+        caches["compression"].clear()
+        self.factory = RequestFactory()
+
+    def get(self, response, path="/", **headers):
+        request = self.factory.get(path, **headers)
+        return middleware(response)(request)
+
+    def test_html_compressed(self):
+        """HTML сжимается gzip, если клиент его принимает."""
+        response = self.get(
+            HttpResponse(HTML), HTTP_ACCEPT_ENCODING="gzip, deflate"
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(gzip.decompress(response.content), HTML)
+        self.assertEqual(
+            int(response["Content-Length"]), len(response.content)
+        )
+
+    def test_not_accepted(self):
+        """Без Accept-Encoding тело не меняется, но Vary выставлен."""
+        response = self.get(HttpResponse(HTML))
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(response.content, HTML)
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+
+    def test_skipped(self):
+        """Картинки, /media/, маленькие и уже сжатые ответы не трогаются."""
+        encoded = HttpResponse(HTML)
+        encoded["Content-Encoding"] = "br"
+        no_transform = HttpResponse(HTML)
+        no_transform["Cache-Control"] = "no-transform"
+        cases = (
+            ("image", HttpResponse(HTML, content_type="image/png"), "/"),
+            ("media", HttpResponse(HTML), "/media/posts/page.html"),
+            ("small", HttpResponse(b"<p>short</p>"), "/"),
+            ("encoded", encoded, "/"),
+            ("no-transform", no_transform, "/"),
+            ("partial", HttpResponse(HTML, status=206), "/"),
+        )
+        for name, response, path in cases:
+            with self.subTest(name):
+                response = self.get(
+                    response, path, HTTP_ACCEPT_ENCODING="gzip"
+                )
+                self.assertNotEqual(
+                    response.get("Content-Encoding"), "gzip"
+                )
+
+    def test_streaming(self):
+        """Потоковый ответ сжимается по частям без Content-Length."""
+        response = StreamingHttpResponse(
+            iter([HTML, HTML]), content_type="application/x-ndjson"
+        )
+        response["Content-Length"] = len(HTML) * 2
+        response = self.get(response, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertFalse(response.has_header("Content-Length"))
+        body = b"".join(response.streaming_content)
+        self.assertEqual(gzip.decompress(body), HTML * 2)
+
+    def test_event_stream_not_compressed(self):
+        """Server-Sent Events уходят без сжатия, чтобы не копить события."""
+        response = StreamingHttpResponse(
+            iter([HTML]), content_type="text/event-stream"
+        )
+        response = self.get(response, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_etag_weakened(self):
+        """Сильный ETag становится слабым: байты тела уже другие."""
+        response = HttpResponse(HTML)
+        response["ETag"] = '"abc"'
+        response = self.get(response, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["ETag"], 'W/"abc"')
+
+    def test_level_per_content_type(self):
+        """Уровень сжатия берётся из COMPRESSION_LEVELS для типа ответа."""
+        levels = {"text/html": {"gzip": 1}}
+        with override_settings(COMPRESSION_LEVELS=levels):
+            response = self.get(
+                HttpResponse(HTML), HTTP_ACCEPT_ENCODING="gzip"
+            )
+        self.assertEqual(
+            response.content, encoding.compress("gzip", HTML, 1)
+        )
+
+    def test_compressed_body_cached(self):
+        """Одинаковое тело второй раз не сжимается, а берётся из кэша."""
+        self.get(HttpResponse(HTML), HTTP_ACCEPT_ENCODING="gzip")
+        with mock.patch.object(
+            encoding, "compress", wraps=encoding.compress
+        ) as compress:
+            response = self.get(
+                HttpResponse(HTML), HTTP_ACCEPT_ENCODING="gzip"
+            )
+        compress.assert_not_called()
+        self.assertEqual(gzip.decompress(response.content), HTML)
+
+    def test_own_cache(self):
+        """Сжатые тела не вытесняют записи из кэша default."""
+        cache.clear()
+        self.get(HttpResponse(HTML), HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(cache._cache, {})
+        self.assertEqual(len(caches["compression"]._cache), 1)
+
+
+class EncodingTests(TestCase):
+    def test_available_codings(self):
+        """Кодировки без установленного кодека не предлагаются."""
+        codings = encoding.available_codings(("zstd", "br", "gzip", "lzma"))
+        self.assertIn("gzip", codings)
+        self.assertNotIn("lzma", codings)
+        self.assertEqual(
+            "zstd" in codings, encoding.zstandard is not None
+        )
+        self.assertEqual("br" in codings, encoding.brotli is not None)
+
+    def test_round_trip(self):
+        """Каждый установленный кодек даёт поток, который распаковывается."""
+        decompress = {
+            "gzip": gzip.decompress,
+            "br": lambda data: encoding.brotli.decompress(data),
+            "zstd": lambda data: encoding.zstandard.ZstdDecompressor()
+            .decompressobj().decompress(data),
+        }
+        for coding in encoding.available_codings(("zstd", "br", "gzip")):
+            with self.subTest(coding):
+                stream = encoding.compressobj(coding, 3)
+                data = stream.compress(HTML) + stream.flush()
+                self.assertEqual(decompress[coding](data), HTML)
@@ -0,0 +1,129 @@
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from core import jobs
+from core.metrics import JOBS_FINISHED, REGISTRY
+from core.models import Job
+
+
+def fails(**payload):
+    raise ValueError("Сбой")
+
+
+@override_settings(JOBS_MAX_ATTEMPTS=2, JOBS_RETRY_DELAY=10)
+class JobTests(TestCase):
+    def setUp(self):
+        self.calls = []
+        handlers = mock.patch.dict(jobs.HANDLERS, {
+            "tests.record": lambda **payload: self.calls.append(payload),
+            "tests.fail": fails,
+        })
+        handlers.start()
+        self.addCleanup(handlers.stop)
+
+    def test_run_and_delete(self):
+        """Задача выполняется с аргументами из payload и удаляется."""
+        done = JOBS_FINISHED.value(name="tests.record", status="done")
+        jobs.enqueue("tests.record", {"post_id": 1})
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertEqual(self.calls, [{"post_id": 1}])
+        self.assertFalse(Job.objects.exists())
+        self.assertEqual(
+            JOBS_FINISHED.value(name="tests.record", status="done"), done + 1
+        )
+
+    def test_priority_and_delay(self):
+        """Сначала берётся приоритетная задача, отложенная ждёт run_after."""
+        low = jobs.enqueue("tests.record", {"order": "low"})
+        high = jobs.enqueue("tests.record", {"order": "high"}, priority=5)
+        later = jobs.enqueue("tests.record", {"order": "later"}, delay=60)
+        self.assertEqual(jobs.claim("first").pk, high.pk)
+        second = jobs.claim("second")
+        self.assertEqual((second.pk, second.locked_by), (low.pk, "second"))
+        self.assertIsNone(jobs.claim("third"))
+        self.assertEqual(Job.objects.get(pk=later.pk).status, Job.QUEUED)
+
+    def test_claimed_once(self):
+        """Взятую задачу не получит другой воркер."""
+        job = jobs.enqueue("tests.record")
+        self.assertIsNotNone(jobs.claim("first", pk=job.pk))
+        self.assertIsNone(jobs.claim("second", pk=job.pk))
+
+    def test_retry_then_fail(self):
+        """Упавшая задача повторяется позже, затем помечается ошибкой."""
+        job = jobs.enqueue("tests.fail")
+        with self.assertLogs("yatube.jobs", "ERROR"):
+            self.assertEqual(jobs.execute(jobs.claim("worker")), "retry")
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertGreater(
+            job.run_after, timezone.now() + timedelta(seconds=9)
+        )
+        self.assertIn("ValueError", job.last_error)
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        with self.assertLogs("yatube.jobs", "ERROR"):
+            self.assertEqual(jobs.run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    @override_settings(JOBS_LOCK_TIMEOUT=60)
+    def test_release_stale(self):
+        """Задачу пропавшего воркера снова можно взять."""
+        job = jobs.enqueue("tests.record")
+        jobs.claim("lost")
+        Job.objects.filter(pk=job.pk).update(
+            locked_at=timezone.now() - timedelta(minutes=2)
+        )
+        self.assertEqual(jobs.release_stale(), 1)
+        self.assertEqual(jobs.claim("worker").attempts, 2)
+
+    def test_requeued_attempt_kept(self):
+        """Итог старой попытки не трогает задачу, взятую снова."""
+        job = jobs.enqueue("tests.record")
+        first = jobs.claim("lost")
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.QUEUED, locked_by="", locked_at=None
+        )
+        jobs.claim("worker")
+        self.assertEqual(jobs.execute(first), "done")
+        job.refresh_from_db()
+        self.assertEqual((job.locked_by, job.attempts), ("worker", 2))
+
+    def test_queue_metrics(self):
+        """Глубина очереди и ожидание видны в метриках."""
+        jobs.enqueue("tests.record")
+        Job.objects.update(run_after=timezone.now() - timedelta(seconds=30))
+        self.assertEqual(jobs.depth()[(Job.QUEUED,)], 1)
+        self.assertGreaterEqual(jobs.oldest_ready()[()], 30)
+        self.assertIn('yatube_jobs{status="queued"} 1', REGISTRY.render())
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager(self):
+        """С JOBS_EAGER задача выполняется после коммита запроса."""
+        with mock.patch.object(
+            jobs.transaction, "on_commit", side_effect=lambda func: func()
+        ):
+            jobs.enqueue("tests.record", {"post_id": 2})
+        self.assertEqual(self.calls, [{"post_id": 2}])
+        self.assertFalse(Job.objects.exists())
+
+
+class HeartbeatTests(TransactionTestCase):
+    @override_settings(JOBS_LOCK_TIMEOUT=0.3)
+    def test_long_job_not_released(self):
+        """Долгую задачу heartbeat не даёт вернуть в очередь."""
+        released = []
+
+        def slow():
+            time.sleep(0.5)
+            released.append(jobs.release_stale())
+
+        with mock.patch.dict(jobs.HANDLERS, {"tests.slow": slow}):
+            jobs.enqueue("tests.slow")
+            self.assertEqual(jobs.run_pending(), 1)
+        self.assertEqual(released, [0])
+        self.assertFalse(Job.objects.exists())
@@ -0,0 +1,117 @@
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from posts.models import Post
+
+from core.media import parse_range
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+IMAGE = bytes(range(256)) * 4
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class MediaServeTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for name in ("posts/image.png", "posts/orphan.png", "private.txt"):
+            path = os.path.join(TEMP_MEDIA_ROOT, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as media_file:
+                media_file.write(IMAGE)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username="author")
+        Post.objects.create(
+            text="Пост", author=author, image="posts/image.png"
+        )
+
+    def setUp(self):
+        self.client = Client()
+
+    def get(self, path="/media/posts/image.png", **headers):
+        return self.client.get(path, **headers)
+
+    def test_full_file(self):
+        """Картинка поста отдаётся целиком с ETag и Accept-Ranges."""
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), IMAGE)
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertTrue(response.has_header("ETag"))
+
+    def test_range(self):
+        """Range отдаёт 206 и только запрошенные байты."""
+        response = self.get(HTTP_RANGE="bytes=10-19")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(
+            response["Content-Range"], f"bytes 10-19/{len(IMAGE)}"
+        )
+        self.assertEqual(b"".join(response.streaming_content), IMAGE[10:20])
+        response = self.get(HTTP_RANGE=f"bytes={len(IMAGE)}-")
+        self.assertEqual(response.status_code, 416)
+
+    def test_etag(self):
+        """If-None-Match даёт 304, устаревший If-Range — весь файл."""
+        etag = self.get()["ETag"]
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        response = self.get(HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"old"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_access(self):
+        """Файлы без поста и служебные файлы не отдаются."""
+        paths = (
+            "/media/posts/orphan.png",
+            "/media/private.txt",
+            "/media/../yatube/settings.py",
+            "/media/cache/%2e%2e/private.txt",
+            "/media/cache/../private.txt",
+            "/media/cache/%2e%2e/posts/orphan.png",
+            "/media/cache/./../posts/orphan.png",
+            "/media/posts/./orphan.png",
+            "/media/posts//image.png",
+        )
+        for path in paths:
+            with self.subTest(path=path):
+                self.assertEqual(self.get(path).status_code, 404)
+
+    def test_offload_modes(self):
+        """В режимах offload тело отдаёт веб-сервер по заголовку."""
+        with override_settings(MEDIA_SERVE_MODE="x-accel"):
+            response = self.get()
+            self.assertEqual(
+                response["X-Accel-Redirect"],
+                "/protected-media/posts/image.png",
+            )
+            self.assertEqual(response.content, b"")
+        with override_settings(MEDIA_SERVE_MODE="x-sendfile"):
+            self.assertEqual(
+                self.get()["X-Sendfile"],
+                os.path.join(TEMP_MEDIA_ROOT, "posts/image.png"),
+            )
+
+    def test_parse_range(self):
+        """Разбор одного диапазона байтов; остальное — весь файл."""
+        cases = (
+            ("bytes=0-9", (0, 9)),
+            ("bytes=5-", (5, 99)),
+            ("bytes=-10", (90, 99)),
+            ("bytes=90-200", (90, 99)),
+            ("bytes=0-1,5-6", None),
+            ("items=0-1", None),
+        )
+        for header, expected in cases:
+            with self.subTest(header=header):
+                self.assertEqual(parse_range(header, 100), expected)
@@ -0,0 +1,70 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import metrics
+from ..metrics import DB_QUERIES, REQUEST_DURATION, Histogram
+
+User = get_user_model()
+
+
+class MetricsMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_server_timing_header(self):
+        """Ответ содержит заголовок Server-Timing."""
+        response = self.guest_client.get(reverse("posts:index"))
+        timing = response["Server-Timing"]
+        for metric in ("db;dur=", "tpl;dur=", "cache;desc=", "total;dur="):
+            with self.subTest(metric=metric):
+                self.assertIn(metric, timing)
+
+    def test_request_recorded_per_view(self):
+        """Запрос попадает в гистограммы своего URL."""
+        before = REQUEST_DURATION.count(view="posts:index", method="GET")
+        self.guest_client.get(reverse("posts:index"))
+        self.assertEqual(
+            REQUEST_DURATION.count(view="posts:index", method="GET"),
+            before + 1,
+        )
+        self.assertGreater(DB_QUERIES.count(view="posts:index"), 0)
+
+    def test_get_many_counted_once(self):
+        """get_many без своей реализации считает каждый ключ один раз."""
+        metrics.instrument()
+        cache.set("present", 1)
+        stats = metrics.start_request()
+        try:
+            cache.get_many(["present", "absent"])
+        finally:
+            metrics.finish_request()
+        self.assertEqual((stats.cache_hits, stats.cache_misses), (1, 1))
+
+    def test_metrics_endpoint(self):
+        """Страница /metrics/ отдаёт метрики в формате Prometheus."""
+        self.guest_client.get(reverse("posts:index"))
+        response = self.guest_client.get(reverse("metrics"))
+        self.assertContains(
+            response,
+            'yatube_request_duration_seconds_bucket{view="posts:index",'
+            'method="GET",le="+Inf"}',
+        )
+
+    def test_metrics_endpoint_forbidden_for_others(self):
+        """Посторонним адресам метрики недоступны."""
+        response = self.guest_client.get(
+            reverse("metrics"), REMOTE_ADDR="10.0.0.1"
+        )
+        self.assertEqual(response.status_code, 403)
+
+
+class HistogramTests(TestCase):
+    def test_buckets_are_cumulative(self):
+        histogram = Histogram("test_seconds", "Тест.", buckets=(1, 2))
+        for value in (0.5, 1.5, 3):
+            histogram.observe(value)
+        samples = [value for _, _, value in histogram.samples()]
+        self.assertEqual(samples, [1, 2, 3, 5.0, 3])
@@ -0,0 +1,61 @@
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..profiler import STORE, ProfileStore, make_token
+
+User = get_user_model()
+
+
+@override_settings(PROFILER_ENABLED=True, PROFILER_INTERVAL=0.0005)
+class ProfilerMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create(username="staff", is_staff=True)
+        cls.user = User.objects.create(username="user")
+
+    def setUp(self):
+        cache.clear()
+        STORE.clear()
+
+    @override_settings(PROFILER_SAMPLE_RATE=1)
+    def test_sampled_request_profiled(self):
+        """Каждый N-й запрос попадает в профиль своего URL."""
+        Client().get(reverse("posts:index"))
+        self.assertEqual(STORE.summary()[0][:2], ("posts:index", 1))
+
+    @override_settings(PROFILER_SAMPLE_RATE=0)
+    def test_signed_header_enables_profiling(self):
+        """Запрос с подписанным заголовком профилируется всегда."""
+        client = Client()
+        client.get(reverse("posts:index"), HTTP_X_YATUBE_PROFILE="bad")
+        self.assertEqual(STORE.summary(), [])
+        client.get(reverse("posts:index"), HTTP_X_YATUBE_PROFILE=make_token())
+        self.assertEqual(len(STORE.summary()), 1)
+
+    def test_admin_view_staff_only(self):
+        """Страница профилей доступна только персоналу."""
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(reverse("profiler"))
+        self.assertEqual(response.status_code, 302)
+        client.force_login(self.staff)
+        response = client.get(reverse("profiler"))
+        self.assertContains(response, "X-YATUBE-PROFILE")
+        response = client.get(reverse("profiler"), {"view": "posts:index"})
+        self.assertEqual(response.status_code, 200)
+
+
+class ProfileStoreTests(TestCase):
+    def test_store_is_bounded(self):
+        store = ProfileStore(max_views=2, max_stacks=1)
+        store.add("a", Counter({"x;y": 3, "x;z": 1}))
+        store.add("b", Counter({"x": 1}))
+        store.add("c", Counter({"x": 1}))
+        self.assertEqual([view for view, *_ in store.summary()], ["b", "c"])
+        store.add("b", Counter({"x;q": 5}))
+        self.assertEqual(store.folded("b"), "x;q 5\n")
@@ -0,0 +1,55 @@
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..querylog import STATS, fingerprint
+
+
+class FingerprintTests(TestCase):
+    def test_literals_stripped(self):
+        """Литералы и списки IN не различают отпечатки."""
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE a = 'x' AND b IN (1, 2, 3)"),
+            fingerprint("SELECT * FROM t WHERE a = 'yy' AND b IN (%s, %s)"),
+        )
+        self.assertEqual(
+            fingerprint("SELECT  *\nFROM t WHERE id = %s LIMIT 21"),
+            "SELECT * FROM t WHERE id = ? LIMIT ?",
+        )
+
+
+@override_settings(QUERY_LOG_SAMPLE_RATE=1)
+class QueryLogMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        STATS.reset()
+        self.guest_client = Client()
+
+    @override_settings(QUERY_LOG_SLOW_MS=0)
+    def test_slow_query_logged_with_view(self):
+        """Медленный запрос пишется в журнал с именем URL."""
+        with self.assertLogs("yatube.slow_queries") as logs:
+            self.guest_client.get(reverse("posts:index"))
+        self.assertIn("posts:index", logs.output[0])
+
+    def test_untracked_views_ignored(self):
+        """Запросы вне отслеживаемых представлений не учитываются."""
+        self.guest_client.get(reverse("about:author"))
+        self.assertEqual(STATS.snapshot(), {})
+
+    def test_top_queries_command(self):
+        """Команда печатает отпечатки из сохранённой статистики."""
+        self.guest_client.get(reverse("posts:index"))
+        with tempfile.TemporaryDirectory() as stats_dir:
+            with self.settings(QUERY_LOG_STATS_DIR=stats_dir):
+                STATS.flush(force=True)
+            out = StringIO()
+            call_command(
+                "top_queries", limit=1, stats_dir=stats_dir, stdout=out
+            )
+        self.assertIn("posts:index", out.getvalue())
+        self.assertIn("1 calls", out.getvalue())
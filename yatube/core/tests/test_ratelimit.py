@@ -0,0 +1,156 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import ratelimit
+from core.metrics import RATELIMIT_FALLBACK, RATELIMIT_REJECTED
+
+User = get_user_model()
+
+RULES = {
+    "post_create": {"rate": "1/m", "burst": 2, "keys": ("user",)},
+    "login": {"rate": "1/m", "burst": 2, "keys": ("ip",)},
+    "password_reset": {"rate": "1/h", "burst": 1, "keys": ("ip",)},
+}
+DUMMY_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "ratelimit": {
+        "BACKEND": "django.core.cache.backends.dummy.DummyCache",
+    },
+}
+
+
+@override_settings(RATELIMIT_RULES=RULES)
+class RateLimitTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="user")
+        cls.other = User.objects.create_user(username="other")
+
+    def setUp(self):
+        cache.clear()
+        ratelimit._local = None
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def create(self, client=None):
+        return (client or self.client).post(
+            reverse("posts:post_create"), {"text": "Пост"}
+        )
+
+    def login(self, ip, **headers):
+        return Client().post(
+            reverse("users:login"),
+            {"username": "user", "password": "wrong"},
+            REMOTE_ADDR=ip, **headers
+        )
+
+    def test_burst_then_429(self):
+        """Корзина пропускает burst запросов, затем отвечает 429."""
+        rejected = RATELIMIT_REJECTED.value(rule="post_create", key="user")
+        self.assertEqual(self.create().status_code, 302)
+        self.assertEqual(self.create().status_code, 302)
+        response = self.create()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "60")
+        self.assertTemplateUsed(response, "core/429.html")
+        self.assertEqual(
+            RATELIMIT_REJECTED.value(rule="post_create", key="user"),
+            rejected + 1,
+        )
+
+    def test_per_user(self):
+        """Корзина одного пользователя не мешает другому, GET не считается."""
+        self.create()
+        self.create()
+        self.assertEqual(
+            self.client.get(reverse("posts:post_create")).status_code, 200
+        )
+        other = Client()
+        other.force_login(self.other)
+        self.assertEqual(self.create(other).status_code, 302)
+
+    def test_refill(self):
+        """Через интервал пополнения появляется новый токен."""
+        now = 1_000_000.0
+        with mock.patch.object(ratelimit.time, "time", return_value=now):
+            self.create()
+            self.create()
+            self.assertEqual(self.create().status_code, 429)
+        with mock.patch.object(
+            ratelimit.time, "time", return_value=now + 60
+        ):
+            self.assertEqual(self.create().status_code, 302)
+            self.assertEqual(self.create().status_code, 429)
+
+    def test_middleware_per_ip(self):
+        """LoginView ограничивается по IP через RATELIMIT_VIEWS."""
+        self.login("10.0.0.1")
+        self.login("10.0.0.1")
+        self.assertEqual(self.login("10.0.0.1").status_code, 429)
+        self.assertEqual(self.login("10.0.0.2").status_code, 200)
+
+    @override_settings(RATELIMIT_TRUSTED_PROXIES=["10.0.0.0/24"])
+    def test_client_behind_proxy(self):
+        """За доверенным прокси корзина ведётся по X-Forwarded-For."""
+        proxy = "10.0.0.5"
+        self.login(proxy, HTTP_X_FORWARDED_FOR="1.1.1.1, 10.0.0.7")
+        self.login(proxy, HTTP_X_FORWARDED_FOR="1.1.1.1")
+        self.assertEqual(
+            self.login(proxy, HTTP_X_FORWARDED_FOR="1.1.1.1").status_code,
+            429,
+        )
+        self.assertEqual(
+            self.login(proxy, HTTP_X_FORWARDED_FOR="2.2.2.2").status_code,
+            200,
+        )
+        self.assertEqual(
+            self.login(proxy, HTTP_X_FORWARDED_FOR="1.1.1.1, 3.3.3.3")
+            .status_code,
+            200,
+        )
+        # Заголовок от клиента не из доверенной сети не учитывается.
+        self.login("4.4.4.4", HTTP_X_FORWARDED_FOR="5.5.5.5")
+        self.login("4.4.4.4", HTTP_X_FORWARDED_FOR="6.6.6.6")
+        self.assertEqual(
+            self.login("4.4.4.4", HTTP_X_FORWARDED_FOR="7.7.7.7")
+            .status_code,
+            429,
+        )
+
+    def test_password_reset_per_ip(self):
+        """Письма сброса пароля с одного IP ограничены."""
+        url = reverse("users:password_reset")
+        data = {"email": "user@example.com"}
+        self.assertEqual(Client().post(url, data).status_code, 302)
+        self.assertEqual(Client().post(url, data).status_code, 429)
+        self.assertEqual(Client().get(url).status_code, 200)
+
+    @override_settings(CACHES=DUMMY_CACHES, RATELIMIT_CACHE="ratelimit")
+    def test_local_buckets(self):
+        """Без кэша с incr корзины ведутся в памяти процесса."""
+        self.create()
+        self.create()
+        self.assertEqual(self.create().status_code, 429)
+
+    def test_cache_error_fallback(self):
+        """При ошибке кэша проверка уходит в корзины процесса."""
+        fallbacks = RATELIMIT_FALLBACK.value()
+        with mock.patch.object(
+            ratelimit.CacheBuckets, "take", side_effect=ConnectionError
+        ):
+            self.create()
+            self.create()
+            self.assertEqual(self.create().status_code, 429)
+        self.assertEqual(RATELIMIT_FALLBACK.value(), fallbacks + 3)
+
+    @override_settings(RATELIMIT_ENABLED=False)
+    def test_disabled(self):
+        """RATELIMIT_ENABLED = False выключает проверки."""
+        for _ in range(3):
+            self.assertEqual(self.create().status_code, 302)
@@ -0,0 +1,107 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.http import Http404
+from django.test import RequestFactory, TestCase, override_settings
+
+from core.encoding import negotiate
+from core.storage import is_hashed
+from core.views import static_serve
+
+CSS = b"body { color: black; }\n" * 100
+
+
+class NegotiateTests(TestCase):
+    def test_negotiate(self):
+        """Выбирается первая доступная кодировка, которую принимает клиент."""
+        cases = (
+            ("gzip, br", ["br", "gzip"], "br"),
+            ("gzip", ["br", "gzip"], "gzip"),
+            ("br;q=0, gzip;q=0.5", ["br", "gzip"], "gzip"),
+            ("*", ["gzip"], "gzip"),
+            ("identity", ["gzip"], None),
+            ("", ["gzip"], None),
+        )
+        for header, available, expected in cases:
+            with self.subTest(header=header):
+                self.assertEqual(negotiate(header, available), expected)
+
+
+class StaticPipelineTests(TestCase):
+    def setUp(self):
+        self.source = tempfile.mkdtemp()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.source, ignore_errors=True)
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        os.makedirs(os.path.join(self.source, "css"))
+        with open(os.path.join(self.source, "css", "site.css"), "wb") as css:
+            css.write(CSS)
+        settings = override_settings(
+            STATICFILES_DIRS=[self.source],
+            STATIC_ROOT=self.root,
+            STATICFILES_STORAGE=(
+                "core.storage.CompressedManifestStaticFilesStorage"
+            ),
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        call_command("collectstatic", interactive=False, verbosity=0)
+        self.hashed = next(
+            name for name in os.listdir(os.path.join(self.root, "css"))
+            if is_hashed(name)
+        )
+        self.path = f"css/{self.hashed}"
+
+    def serve(self, path, **headers):
+        return static_serve(RequestFactory().get("/", **headers), path)
+
+    def test_collectstatic_writes_gzip(self):
+        """collectstatic кладёт рядом с хэшированным файлом его .gz."""
+        with gzip.open(os.path.join(self.root, self.path + ".gz")) as gz:
+            self.assertEqual(gz.read(), CSS)
+
+    def test_serves_precompressed(self):
+        """Клиент с gzip получает сжатую копию и immutable-кэширование."""
+        response = self.serve(self.path, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Content-Type"], "text/css")
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        body = b"".join(response.streaming_content)
+        self.assertEqual(gzip.decompress(body), CSS)
+
+    def test_precompressed_html_keeps_type(self):
+        """Сжатая копия HTML отдаётся как text/html, а не как архив."""
+        page = os.path.join(self.root, "page.html")
+        with open(page, "wb") as html:
+            html.write(b"<p>page</p>")
+        with gzip.open(page + ".gz", "wb") as gz:
+            gz.write(b"<p>page</p>")
+        response = self.serve("page.html", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Content-Type"], "text/html")
+
+    def test_plain_and_unhashed(self):
+        """Без gzip отдаётся оригинал, файл без хэша кэшируется недолго."""
+        response = self.serve("css/site.css")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(b"".join(response.streaming_content), CSS)
+        self.assertNotIn("immutable", response["Cache-Control"])
+
+    def test_not_modified(self):
+        """If-Modified-Since с датой файла даёт 304."""
+        response = self.serve(self.path)
+        response = self.serve(
+            self.path, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_outside_root(self):
+        """Пути за пределами STATIC_ROOT не отдаются."""
+        for path in ("../settings.py", "css/missing.css"):
+            with self.subTest(path=path):
+                with self.assertRaises(Http404):
+                    self.serve(path)
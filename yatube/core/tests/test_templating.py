@@ -0,0 +1,49 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.template import engines
+from django.template.loaders.filesystem import Loader as FilesystemLoader
+from django.test import TestCase, override_settings
+
+from core.templating import engine_config, is_cached, template_names, warm
+
+
+@override_settings(TEMPLATES=[engine_config(cached=True)])
+class WarmTemplatesTests(TestCase):
+    def test_template_names(self):
+        """В прогрев попадают шаблоны проекта и приложений."""
+        names = template_names(engines["django"])
+        self.assertIn("posts/index.html", names)
+        self.assertIn("posts/includes/article.html", names)
+        self.assertIn("admin/base.html", names)
+
+    def test_warm(self):
+        """После прогрева шаблоны берутся из кэша без чтения с диска."""
+        engine = engines["django"]
+        self.assertTrue(is_cached(engine))
+        results = warm(engine)
+        errors = [name for name, seconds in results
+                  if isinstance(seconds, Exception)]
+        self.assertEqual(errors, [])
+        with mock.patch.object(
+            FilesystemLoader, "get_contents",
+            side_effect=AssertionError("шаблон читается повторно"),
+        ):
+            engine.get_template("posts/index.html")
+            engine.get_template("posts/includes/article.html")
+
+    def test_command(self):
+        """Команда печатает по движкам число шаблонов и самые медленные."""
+        output = StringIO()
+        call_command("warm_templates", limit=3, stdout=output)
+        lines = output.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith("django: скомпилировано"))
+        self.assertEqual(len(lines), 4 * len(engines.all()))
+
+
+class EngineConfigTests(TestCase):
+    def test_uncached(self):
+        """Без кэша движок собирается с обычными загрузчиками."""
+        with override_settings(TEMPLATES=[engine_config(cached=False)]):
+            self.assertFalse(is_cached(engines["django"]))
@@ -1,4 +1,24 @@
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib import admin
+from django.core.exceptions import PermissionDenied, SuspiciousFileOperation
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseNotModified,
+)
 from django.shortcuts import render
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from core import profiler
+from core.encoding import brotli, negotiate
+from core.metrics import REGISTRY
+from core.storage import is_hashed
+
+STATIC_ENCODINGS = {"br": ".br", "gzip": ".gz"}
 
 
 def page_not_found(request, exception):
@@ -15,3 +35,74 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=""):
     return render(request, "core/403csrf.html")
+
+
+def metrics(request):
+    """Отдаёт метрики процесса в текстовом формате Prometheus."""
+    allowed = request.META.get("REMOTE_ADDR") in settings.METRICS_ALLOWED_IPS
+    if not (allowed or request.user.is_staff):
+        raise PermissionDenied
+    return HttpResponse(
+        REGISTRY.render(), content_type="text/plain; version=0.0.4"
+    )
+
+
+def profiles(request):
+    """Сводка профилей по URL и их стеки в формате folded."""
+    view = request.GET.get("view")
+    if view is not None:
+        return HttpResponse(
+            profiler.STORE.folded(view),
+            content_type="text/plain; charset=utf-8",
+        )
+    context = {
+        **admin.site.each_context(request),
+        "title": "Профилировщик запросов",
+        "profiles": profiler.STORE.summary(),
+        "header": settings.PROFILER_HEADER[5:].replace("_", "-"),
+        "token": profiler.make_token(),
+    }
+    return render(request, "core/profiler.html", context)
+
+
+def static_serve(request, path):
+    """Отдаёт собранную статику, по возможности заранее сжатую копию.
+
+    Файлы с хэшем в имени не меняются, поэтому кэшируются навсегда
+    с Cache-Control: immutable.
+    """
+    try:
+        full_path = safe_join(settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    stat = os.stat(full_path)
+    if not was_modified_since(
+        request.META.get("HTTP_IF_MODIFIED_SINCE"), stat.st_mtime, stat.st_size
+    ):
+        return HttpResponseNotModified()
+    available = [
+        coding for coding, suffix in STATIC_ENCODINGS.items()
+        if (coding != "br" or brotli is not None)
+        and os.path.isfile(full_path + suffix)
+    ]
+    encoding = negotiate(request.META.get("HTTP_ACCEPT_ENCODING"), available)
+    content_type, _ = mimetypes.guess_type(full_path)
+    served_path = full_path + STATIC_ENCODINGS[encoding] if encoding else (
+        full_path
+    )
+    content_type = content_type or "application/octet-stream"
+    response = FileResponse(open(served_path, "rb"), content_type=content_type)
+    # Для text/html FileResponse угадывает тип по имени .gz заново.
+    response["Content-Type"] = content_type
+    if encoding:
+        response["Content-Encoding"] = encoding
+    if available:
+        patch_vary_headers(response, ("Accept-Encoding",))
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    response["Cache-Control"] = (
+        "public, max-age=31536000, immutable" if is_hashed(path)
+        else f"public, max-age={settings.STATIC_MAX_AGE}"
+    )
+    return response
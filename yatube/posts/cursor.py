@@ -0,0 +1,60 @@
+"""Курсорная пагинация лент по ключу (pub_date, id).
+
+Вместо OFFSET следующая страница выбирается условием «строго раньше
+последнего показанного поста», которое база отвечает по индексу
+post_feed_idx за одно и то же время на любой глубине. Курсор подписан,
+чтобы клиент не мог подставить в запрос произвольные значения.
+"""
+from django.core import signing
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+CURSOR_SALT = "posts.cursor"
+FEED_ORDER = ("-pub_date", "-id")
+
+
+class CursorError(ValueError):
+    pass
+
+
+def make_cursor(pub_date, post_id):
+    return signing.dumps([pub_date.isoformat(), post_id], salt=CURSOR_SALT)
+
+
+def read_cursor(token):
+    try:
+        pub_date, post_id = signing.loads(token, salt=CURSOR_SALT)
+    except (signing.BadSignature, TypeError, ValueError):
+        raise CursorError("некорректный курсор")
+    return parse_datetime(pub_date), post_id
+
+
+def older_than(pub_date, post_id):
+    """Условие «пост старше (pub_date, id)» в порядке ленты.
+
+    Записано как диапазон по pub_date с исключением, а не через OR:
+    с OR SQLite сканирует индекс от начала, а не ищет границу.
+    """
+    return Q(pub_date__lte=pub_date) & ~Q(pub_date=pub_date, id__gte=post_id)
+
+
+def newer_than(pub_date, post_id):
+    return Q(pub_date__gte=pub_date) & ~Q(pub_date=pub_date, id__lte=post_id)
+
+
+def cursor_page(queryset, token, limit, key=None):
+    """Страница ленты после курсора и курсор следующей страницы.
+
+    queryset может отдавать модели или словари values(); key достаёт из
+    элемента пару (pub_date, id).
+    """
+    key = key or (lambda item: (item.pub_date, item.id))
+    queryset = queryset.order_by(*FEED_ORDER)
+    if token:
+        queryset = queryset.filter(older_than(*read_cursor(token)))
+    items = list(queryset[:limit + 1])
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = make_cursor(*key(items[-1]))
+    return items, next_cursor
@@ -0,0 +1,252 @@
+"""Server-Sent Events о новых постах и комментариях.
+
+Брокер в памяти процесса держит кольцевой буфер последних событий и
+будит ждущие потоки через Condition. События, опубликованные в других
+процессах-воркерах, приходят через датаграммный Unix-сокет: каждый
+воркер слушает свой сокет в SSE_RELAY_DIR и рассылает события во все
+остальные.
+
+Id присваивает брокер, когда кладёт событие в буфер: это время в
+наносекундах, но не меньше предыдущего id плюс один. Пересланное
+событие поэтому всегда встаёт в конец буфера и не потеряется для
+клиента, уже видевшего более позднее локальное событие. Часы воркеров
+близки, так что Last-Event-ID после переподключения понимает любой
+воркер, хотя на стыке возможен повтор или пропуск события.
+
+Каждый SSE-ответ держит поток WSGI-сервера до SSE_MAX_DURATION секунд, а
+число таких ответов на воркер ограничено SSE_MAX_CONNECTIONS.
+"""
+import bisect
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+
+logger = logging.getLogger("yatube.events")
+
+MAX_DATAGRAM = 64 * 1024
+
+Event = namedtuple("Event", "id channels kind data")
+
+
+class Broker:
+    def __init__(self, history, relay_dir=None, name=None):
+        self.history = history
+        self.relay_dir = relay_dir
+        self.name = name
+        self._ids = []
+        self._events = []
+        self._condition = threading.Condition()
+        self._relay_lock = threading.Lock()
+        self._receiver = None
+        self._sender = None
+        self._path = None
+
+    def add(self, channels, kind, data):
+        """Кладёт событие в конец буфера с новым id и будит подписчиков."""
+        with self._condition:
+            event_id = time.time_ns()
+            if self._ids:
+                event_id = max(event_id, self._ids[-1] + 1)
+            event = Event(event_id, tuple(channels), kind, data)
+            self._ids.append(event_id)
+            self._events.append(event)
+            if len(self._ids) > self.history:
+                del self._ids[0], self._events[0]
+            self._condition.notify_all()
+        return event
+
+    def publish(self, channels, kind, data):
+        event = self.add(channels, kind, data)
+        self.relay(event)
+        return event
+
+    def since(self, last_id, channels):
+        with self._condition:
+            index = bisect.bisect(self._ids, last_id)
+            return [
+                event for event in self._events[index:]
+                if not channels.isdisjoint(event.channels)
+            ]
+
+    def wait(self, last_id, channels, timeout):
+        """События после last_id; ждёт первое не дольше timeout секунд."""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                events = self.since(last_id, channels)
+                remaining = deadline - time.monotonic()
+                if events or remaining <= 0:
+                    return events
+                self._condition.wait(remaining)
+
+    def start_relay(self):
+        """Открывает сокет воркера; вызывается лениво уже после fork."""
+        if not self.relay_dir or self._receiver is not None:
+            return
+        with self._relay_lock:
+            if self._receiver is not None:
+                return
+            os.makedirs(self.relay_dir, exist_ok=True)
+            name = self.name or str(os.getpid())
+            path = os.path.join(self.relay_dir, f"{name}.sock")
+            if os.path.exists(path):
+                os.unlink(path)
+            receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            receiver.bind(path)
+            sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            sender.setblocking(False)
+            self._path, self._sender = path, sender
+            self._receiver = receiver
+            threading.Thread(target=self._receive, daemon=True).start()
+
+    def _receive(self):
+        while True:
+            try:
+                message = self._receiver.recv(MAX_DATAGRAM)
+            except OSError:
+                return
+            try:
+                channels, kind, data = json.loads(message)
+            except (TypeError, ValueError):
+                logger.warning("Битое событие от другого воркера: %r", message)
+                continue
+            self.add(channels, kind, data)
+
+    def relay(self, event):
+        """Рассылает событие остальным воркерам, не дожидаясь их."""
+        if not self.relay_dir:
+            return
+        self.start_relay()
+        message = json.dumps(
+            [event.channels, event.kind, event.data], cls=DjangoJSONEncoder
+        ).encode()
+        for name in os.listdir(self.relay_dir):
+            path = os.path.join(self.relay_dir, name)
+            if path == self._path or not name.endswith(".sock"):
+                continue
+            try:
+                self._sender.sendto(message, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Воркер завершился и оставил сокет.
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            except OSError:
+                # Очередь получателя переполнена: событие для него теряется.
+                pass
+
+    def close(self):
+        if self._receiver is not None:
+            self._receiver.close()
+            self._sender.close()
+            os.unlink(self._path)
+            self._receiver = None
+
+
+BROKER = Broker(settings.SSE_HISTORY, settings.SSE_RELAY_DIR)
+SLOTS = threading.BoundedSemaphore(settings.SSE_MAX_CONNECTIONS)
+
+
+def publish_post(post):
+    channels = ["posts", f"author:{post.author_id}"]
+    if post.group_id:
+        channels.append(f"group:{post.group_id}")
+    BROKER.publish(channels, "post", {
+        "id": post.pk,
+        "author": post.author.username,
+        "group": post.group.slug if post.group_id else None,
+        "text": post.text[:settings.SSE_TEXT_LENGTH],
+        "url": reverse("posts:post_detail", args=[post.pk]),
+    })
+
+
+def publish_comment(comment):
+    BROKER.publish([f"comments:{comment.post_id}"], "comment", {
+        "id": comment.pk,
+        "post": comment.post_id,
+        "author": comment.author.username,
+        "text": comment.text[:settings.SSE_TEXT_LENGTH],
+    })
+
+
+def format_event(event):
+    data = json.dumps(event.data, ensure_ascii=False, cls=DjangoJSONEncoder)
+    return f"id: {event.id}\nevent: {event.kind}\ndata: {data}\n\n".encode()
+
+
+class EventStream:
+    """Тело ответа: события, heartbeat-комментарии и освобождение слота.
+
+    close() вызывает WSGI-сервер даже если итерация не началась, поэтому
+    слот освобождается здесь, а не в finally генератора. Пока поток
+    открыт, он занимает поток WSGI-сервера, но не дольше SSE_MAX_DURATION.
+    """
+
+    def __init__(self, broker, channels, last_id):
+        self.broker = broker
+        self.channels = frozenset(channels)
+        self.last_id = last_id
+        self._released = False
+
+    def __iter__(self):
+        yield f"retry: {settings.SSE_RETRY_MS}\n\n".encode()
+        deadline = time.monotonic() + settings.SSE_MAX_DURATION
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            events = self.broker.wait(
+                self.last_id, self.channels,
+                min(settings.SSE_HEARTBEAT, remaining),
+            )
+            if not events:
+                yield b": ping\n\n"
+            for event in events:
+                self.last_id = event.id
+                yield format_event(event)
+
+    def close(self):
+        if not self._released:
+            self._released = True
+            SLOTS.release()
+
+
+def last_event_id(request):
+    value = request.META.get("HTTP_LAST_EVENT_ID") or request.GET.get(
+        "last_event_id"
+    )
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return time.time_ns()
+
+
+def stream_response(request, channels):
+    """Ответ text/event-stream или 503, если слоты воркера заняты."""
+    if not SLOTS.acquire(blocking=False):
+        response = HttpResponse(status=503)
+        response["Retry-After"] = settings.SSE_RETRY_MS // 1000
+        return response
+    try:
+        BROKER.start_relay()
+        response = StreamingHttpResponse(
+            EventStream(BROKER, channels, last_event_id(request)),
+            content_type="text/event-stream",
+        )
+    except Exception:
+        # Без ответа close() никто не вызовет: слот отдаём здесь.
+        SLOTS.release()
+        raise
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,136 @@
+"""Потоковая выгрузка постов, комментариев и подписок пользователя.
+
+Строки читаются через .values().iterator(chunk_size=...), поэтому в
+памяти одновременно лежит не больше одного чанка, сколько бы постов ни
+было у автора. NDJSON, CSV и zip собираются генераторами и отдаются по
+кусочку.
+"""
+import csv
+import zipfile
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from posts.models import Comment, Follow, Post
+
+FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "zip": ("application/zip", "zip"),
+}
+CSV_COLUMNS = (
+    "kind", "id", "text", "group", "image", "date", "post", "author",
+)
+FILE_CHUNK_SIZE = 64 * 1024
+
+
+def export_rows(user, chunk_size=None):
+    """Записи пользователя: посты, затем комментарии, затем подписки."""
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    posts = Post.objects.filter(author=user).order_by("id").values_list(
+        "id", "text", "group__slug", "image", "pub_date"
+    )
+    for post_id, text, group, image, pub_date in posts.iterator(chunk_size):
+        yield {
+            "kind": "post", "id": post_id, "text": text, "group": group,
+            "image": image, "date": pub_date,
+        }
+    comments = Comment.objects.filter(author=user).order_by("id").values_list(
+        "id", "post_id", "text", "created"
+    )
+    for comment_id, post_id, text, created in comments.iterator(chunk_size):
+        yield {
+            "kind": "comment", "id": comment_id, "post": post_id,
+            "text": text, "date": created,
+        }
+    follows = Follow.objects.filter(user=user).order_by("id").values_list(
+        "id", "author__username"
+    )
+    for follow_id, author in follows.iterator(chunk_size):
+        yield {"kind": "follow", "id": follow_id, "author": author}
+
+
+def ndjson_lines(rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield (encoder.encode(row) + "\n").encode()
+
+
+class _Echo:
+    """Файл, который возвращает записанное вместо того, чтобы копить."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.DictWriter(_Echo(), CSV_COLUMNS)
+    yield writer.writeheader().encode()
+    for row in rows:
+        if "date" in row:
+            row["date"] = row["date"].isoformat()
+        yield writer.writerow(row).encode()
+
+
+class _ZipBuffer:
+    """Несмещаемый поток для ZipFile: отдаёт накопленное через drain()."""
+
+    def __init__(self):
+        self._parts = []
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def zip_stream(user, chunk_size=None):
+    """Zip с data.ndjson и картинками постов, собираемый на лету.
+
+    ZipFile пишет в несмещаемый поток с дескрипторами данных после
+    каждого файла, поэтому архив не нужно держать целиком.
+    """
+    buffer = _ZipBuffer()
+    images = Post.objects.filter(author=user).exclude(image="").order_by(
+        "image"
+    ).values_list("image", flat=True).distinct()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        with archive.open("data.ndjson", "w", force_zip64=True) as member:
+            for line in ndjson_lines(export_rows(user, chunk_size)):
+                member.write(line)
+                yield buffer.drain()
+        for name in images.iterator(chunk_size or settings.EXPORT_CHUNK_SIZE):
+            yield from _zip_file(archive, buffer, name)
+    yield buffer.drain()
+
+
+def _zip_file(archive, buffer, name):
+    try:
+        source = default_storage.open(name)
+    except (OSError, SuspiciousFileOperation):
+        # Имя из старого импорта может указывать за пределы MEDIA_ROOT.
+        return
+    info = zipfile.ZipInfo(f"media/{name}")
+    info.compress_type = zipfile.ZIP_STORED
+    info.file_size = source.size
+    with source, archive.open(info, "w") as member:
+        for chunk in source.chunks(FILE_CHUNK_SIZE):
+            member.write(chunk)
+            yield buffer.drain()
+
+
+def export_stream(user, file_format, chunk_size=None):
+    if file_format == "zip":
+        return filter(None, zip_stream(user, chunk_size))
+    rows = export_rows(user, chunk_size)
+    if file_format == "csv":
+        return csv_lines(rows)
+    return ndjson_lines(rows)
@@ -0,0 +1,146 @@
+"""RSS и Atom для общей ленты, групп и авторов.
+
+Перед рендером одним запросом по индексу ленты выбирается последний
+пост. Его (pub_date, id) служат ETag и Last-Modified, поэтому клиент,
+который опрашивает ленту, получает 304 без рендера. Готовый XML
+кэшируется под ключом с последним постом, и новая запись сама
+вытесняет старую версию.
+"""
+from calendar import timegm
+from hashlib import md5
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import http_date
+from posts import projection
+from posts.cursor import FEED_ORDER
+from posts.models import Post
+from posts.negative_cache import lookup_or_404
+
+
+class PostsFeed(Feed):
+    title = "Yatube: последние записи"
+    description = "Новые записи всех авторов."
+
+    def link(self, obj):
+        return reverse("posts:index")
+
+    def posts(self, obj):
+        return Post.objects.all()
+
+    def latest(self, obj):
+        """Ключ последнего поста ленты: (pub_date, id) или None."""
+        return self.posts(obj).order_by(*FEED_ORDER).values_list(
+            "pub_date", "id"
+        ).first()
+
+    def items(self, obj):
+        return projection.load(
+            self.posts(obj).order_by(*FEED_ORDER)[:settings.FEEDS_MAX_ITEMS]
+        )
+
+    def item_title(self, item):
+        return item.text[:60]
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return item.detail_path
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author_name or item.author_username
+
+    def item_categories(self, item):
+        return [item.group_title] if item.group_slug else []
+
+
+class GroupFeed(PostsFeed):
+    def get_object(self, request, slug):
+        return lookup_or_404("group", slug)
+
+    def title(self, group):
+        return f"Yatube: {group.title}"
+
+    def description(self, group):
+        return group.description
+
+    def link(self, group):
+        return reverse("posts:group_list", args=[group.slug])
+
+    def posts(self, group):
+        return Post.objects.filter(group=group)
+
+
+class AuthorFeed(PostsFeed):
+    def get_object(self, request, username):
+        return lookup_or_404("user", username)
+
+    def title(self, author):
+        return f"Yatube: {author.get_full_name() or author.username}"
+
+    def description(self, author):
+        return f"Записи пользователя {author.username}."
+
+    def link(self, author):
+        return reverse("posts:profile", args=[author.username])
+
+    def posts(self, author):
+        return Post.objects.filter(author=author)
+
+
+class AtomMixin:
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self._get_dynamic_attr("description", obj)
+
+
+class PostsAtomFeed(AtomMixin, PostsFeed):
+    pass
+
+
+class GroupAtomFeed(AtomMixin, GroupFeed):
+    pass
+
+
+class AuthorAtomFeed(AtomMixin, AuthorFeed):
+    pass
+
+
+def cached_feed(feed_class):
+    """View ленты с условным GET и кэшем XML по последнему посту."""
+    feed = feed_class()
+
+    def view(request, **kwargs):
+        obj = feed.get_object(request, **kwargs)
+        latest = feed.latest(obj)
+        version = md5(f"{request.path}:{latest}".encode()).hexdigest()
+        etag = quote_etag(version)
+        last_modified = timegm(latest[0].utctimetuple()) if latest else None
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is not None:
+            return response
+        key = f"feed:{version}"
+        cached = cache.get(key)
+        if cached is None:
+            rendered = feed(request, **kwargs)
+            cached = (rendered.content, rendered["Content-Type"])
+            cache.set(key, cached, settings.FEEDS_CACHE_TIMEOUT)
+        response = HttpResponse(cached[0], content_type=cached[1])
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    return view
@@ -0,0 +1,341 @@
+"""Потоковый импорт постов и комментариев из NDJSON и CSV.
+
+Строки читаются потоково, каждая сначала проверяется сама по себе
+(clean), затем пачкой. Авторы, группы и посты
+ищутся по словарям, которые дополняются одним запросом на пачку.
+Запись идёт через bulk_create, без save() и post_save. Производные
+данные пересчитываются один раз в конце сигналом bulk_write_finished.
+После каждой пачки позиция сохраняется в файл контрольной точки.
+"""
+import csv
+import json
+import os
+import posixpath
+
+from django.contrib.auth import get_user_model
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from posts.bulk import explicit_timestamps, safe_batch_size
+from posts.models import Comment, Group, Post
+from posts.signals import bulk_write_finished
+
+User = get_user_model()
+
+LOOKUP_CHUNK = 500
+
+
+class RowError(ValueError):
+    pass
+
+
+def read_ndjson(stream):
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as error:
+            yield number, RowError(f"некорректный JSON: {error}")
+            continue
+        if not isinstance(row, dict):
+            row = RowError("строка должна быть объектом JSON")
+        yield number, row
+
+
+def read_csv(stream):
+    for number, row in enumerate(csv.DictReader(stream), 1):
+        yield number, {key: value for key, value in row.items() if value}
+
+
+def batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Checkpoint:
+    """Номер последней записанной строки входного файла."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return 0
+        with open(self.path) as checkpoint_file:
+            return json.load(checkpoint_file)["line"]
+
+    def save(self, line):
+        if not self.path:
+            return
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as checkpoint_file:
+            json.dump({"line": line}, checkpoint_file)
+        os.replace(temp_path, self.path)
+
+
+def parse_id(value, field):
+    if isinstance(value, bool):
+        raise RowError(f"некорректный {field} {value!r}")
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise RowError(f"некорректный {field} {value!r}")
+    if number <= 0:
+        raise RowError(f"некорректный {field} {value!r}")
+    return number
+
+
+def clean_image(name):
+    """Имя картинки внутри MEDIA_ROOT: без абсолютных путей и "..".
+
+    Такие имена ломают storage.open() при выгрузке архива.
+    """
+    if not name:
+        return ""
+    if (
+        "\\" in name or "\x00" in name or posixpath.isabs(name)
+        or posixpath.normpath(name) != name
+        or name.split("/")[0] == ".."
+        or len(name) > Post._meta.get_field("image").max_length
+    ):
+        raise RowError(f"некорректное имя картинки {name!r}")
+    return name
+
+
+def parse_date(value):
+    if not value:
+        return timezone.now()
+    date = parse_datetime(value)
+    if date is None:
+        raise RowError(f"некорректная дата {value!r}")
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date, timezone.utc)
+    return date
+
+
+class Importer:
+    model = None
+    timestamp_fields = ()
+    string_fields = ("author", "text")
+
+    def __init__(self, batch_size=1000, log=print):
+        self.batch_size = batch_size
+        self.log = log
+        self.authors = {}
+        self.imported = 0
+        self.failed = 0
+        self.explicit_ids = False
+
+    def _lookup(self, cache, queryset, field, keys):
+        """Дополняет словарь ключ -> id одним запросом на LOOKUP_CHUNK."""
+        missing = sorted({key for key in keys if key and key not in cache})
+        for start in range(0, len(missing), LOOKUP_CHUNK):
+            chunk = missing[start:start + LOOKUP_CHUNK]
+            cache.update(
+                queryset.filter(**{f"{field}__in": chunk}).values_list(
+                    field, "id"
+                )
+            )
+            cache.update((key, None) for key in chunk if key not in cache)
+
+    def clean(self, row):
+        """Проверяет типы полей одной строки до запросов к базе."""
+        if isinstance(row, Exception):
+            raise row
+        for field in self.string_fields:
+            value = row.get(field)
+            if value is not None and not isinstance(value, str):
+                raise RowError(f"поле {field} должно быть строкой")
+        row["id"] = (
+            parse_id(row["id"], "id") if row.get("id") not in (None, "")
+            else None
+        )
+        return row
+
+    def prepare(self, rows):
+        self._lookup(
+            self.authors, User.objects, "username",
+            [row.get("author") for row in rows],
+        )
+
+    def author_id(self, row):
+        author_id = self.authors.get(row.get("author"))
+        if author_id is None:
+            raise RowError(f"нет автора {row.get('author')!r}")
+        return author_id
+
+    def text(self, row):
+        text = (row.get("text") or "").strip()
+        if not text:
+            raise RowError("пустой текст")
+        return text
+
+    def build(self, row):
+        raise NotImplementedError
+
+    def write(self, objects):
+        """Записывает пачку; возвращает число новых строк."""
+        explicit_ids = any(obj.pk is not None for obj in objects)
+        self.explicit_ids = self.explicit_ids or explicit_ids
+        fields = [self.model._meta.get_field(name)
+                  for name in self.timestamp_fields]
+        with transaction.atomic(), explicit_timestamps(*fields):
+            written = self.count_new(objects) if explicit_ids else len(
+                objects
+            )
+            self.model.objects.bulk_create(
+                objects,
+                batch_size=safe_batch_size(self.model, self.batch_size),
+                ignore_conflicts=explicit_ids,
+            )
+        return written
+
+    def count_new(self, objects):
+        """Сколько объектов не отбросит ignore_conflicts по id."""
+        ids = sorted({obj.pk for obj in objects if obj.pk is not None})
+        seen = set()
+        for start in range(0, len(ids), LOOKUP_CHUNK):
+            seen.update(self.model.objects.filter(
+                pk__in=ids[start:start + LOOKUP_CHUNK]
+            ).values_list("pk", flat=True))
+        written = 0
+        for obj in objects:
+            if obj.pk is None or obj.pk not in seen:
+                seen.add(obj.pk)
+                written += 1
+        return written
+
+    def run(self, rows, checkpoint):
+        """Импортирует строки после контрольной точки, возвращает счётчики."""
+        resume_from = checkpoint.load()
+        pending = (
+            (number, row) for number, row in rows if number > resume_from
+        )
+        for batch in batches(pending, self.batch_size):
+            valid = []
+            for number, row in batch:
+                try:
+                    valid.append((number, self.clean(row)))
+                except (RowError, TypeError, ValueError) as error:
+                    self._reject(number, error)
+            self.prepare([row for _, row in valid])
+            objects = []
+            for number, row in valid:
+                try:
+                    objects.append(self.build(row))
+                except (RowError, TypeError, ValueError) as error:
+                    self._reject(number, error)
+            if objects:
+                self.imported += self.write(objects)
+            checkpoint.save(batch[-1][0])
+            self.log(f"Строка {batch[-1][0]}: записано {self.imported}")
+        if self.explicit_ids:
+            self.reset_sequence()
+        bulk_write_finished.send(
+            sender=type(self), models=(self.model,)
+        )
+        return self.imported, self.failed
+
+    def reset_sequence(self):
+        """Сдвигает автоинкремент за явно заданные id."""
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [self.model]
+        )
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+    def _reject(self, number, error):
+        self.failed += 1
+        self.log(f"Строка {number} пропущена: {error}")
+
+
+class PostImporter(Importer):
+    """Поля строки: text, author, group, pub_date, image, id."""
+
+    model = Post
+    timestamp_fields = ("pub_date", "created")
+    string_fields = Importer.string_fields + ("group", "pub_date", "image")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.groups = {}
+
+    def clean(self, row):
+        row = super().clean(row)
+        row["image"] = clean_image(row.get("image"))
+        return row
+
+    def prepare(self, rows):
+        super().prepare(rows)
+        self._lookup(
+            self.groups, Group.objects, "slug",
+            [row.get("group") for row in rows],
+        )
+
+    def build(self, row):
+        group_id = None
+        if row.get("group"):
+            group_id = self.groups.get(row["group"])
+            if group_id is None:
+                raise RowError(f"нет группы {row['group']!r}")
+        pub_date = parse_date(row.get("pub_date"))
+        return Post(
+            id=row.get("id"),
+            text=self.text(row),
+            author_id=self.author_id(row),
+            group_id=group_id,
+            image=row["image"],
+            pub_date=pub_date,
+            created=pub_date,
+        )
+
+
+class CommentImporter(Importer):
+    """Поля строки: post, text, author, created, id."""
+
+    model = Comment
+    timestamp_fields = ("created",)
+    string_fields = Importer.string_fields + ("created",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.posts = set()
+
+    def clean(self, row):
+        row = super().clean(row)
+        row["post"] = parse_id(row.get("post"), "post")
+        return row
+
+    def prepare(self, rows):
+        super().prepare(rows)
+        ids = {row["post"] for row in rows}
+        missing = sorted(ids - self.posts)
+        for start in range(0, len(missing), LOOKUP_CHUNK):
+            self.posts.update(Post.objects.filter(
+                id__in=missing[start:start + LOOKUP_CHUNK]
+            ).values_list("id", flat=True))
+
+    def build(self, row):
+        post_id = row["post"]
+        if post_id not in self.posts:
+            raise RowError(f"нет поста {post_id!r}")
+        return Comment(
+            id=row.get("id"),
+            post_id=post_id,
+            author_id=self.author_id(row),
+            text=self.text(row),
+            created=parse_date(row.get("created")),
+        )
+
+
+IMPORTERS = {"posts": PostImporter, "comments": CommentImporter}
+READERS = {"ndjson": read_ndjson, "csv": read_csv}
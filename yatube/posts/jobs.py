@@ -0,0 +1,18 @@
+"""Фоновые задачи постов."""
+from sorl.thumbnail import get_thumbnail
+
+from core import jobs
+from posts.models import Post
+
+# Миниатюры из шаблонов лент и страницы поста (posts/includes/article.html).
+THUMBNAILS = (("960x339", {"crop": "center", "upscale": True}),)
+
+
+@jobs.register("posts.thumbnails")
+def make_thumbnails(post_id):
+    """Готовит миниатюры картинки поста до первого показа в ленте."""
+    post = Post.objects.filter(pk=post_id).only("image").first()
+    if post is None or not post.image:
+        return
+    for geometry, options in THUMBNAILS:
+        get_thumbnail(post.image, geometry, **options)
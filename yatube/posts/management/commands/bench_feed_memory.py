@@ -0,0 +1,121 @@
+import gc
+import shutil
+import tempfile
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+
+from core import bench
+from posts import projection
+from posts.cursor import FEED_ORDER
+from posts.management.commands.bench_http import seed
+from posts.models import Post
+
+
+def load_models(size):
+    """Прежняя загрузка ленты: Post с автором и группой через join."""
+    return list(
+        Post.objects.select_related("author", "group").order_by(
+            *FEED_ORDER
+        )[:size]
+    )
+
+
+def load_feed_posts(size):
+    return projection.load(Post.objects.order_by(*FEED_ORDER)[:size])
+
+
+LOADERS = {"models": load_models, "feed_posts": load_feed_posts}
+
+
+def memory_cost(load, size):
+    """Память, которую держит загруженная страница, и пик при загрузке."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        posts = load(size)
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    statistics = snapshot.statistics("filename")
+    retained = sum(stat.size for stat in statistics)
+    blocks = sum(stat.count for stat in statistics)
+    count = len(posts) or 1
+    return {
+        "posts": len(posts),
+        "retained_bytes": retained,
+        "bytes_per_post": retained / count,
+        "blocks_per_post": blocks / count,
+        "peak_bytes": peak,
+    }
+
+
+def load_cost(load, size, requests, warmup):
+    latencies = []
+    for iteration in range(warmup + requests):
+        with bench.timer() as elapsed:
+            load(size)
+        if iteration >= warmup:
+            latencies.append(elapsed["elapsed"])
+    return bench.summarize(latencies)
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает память, число аллокаций и время загрузки страниц ленты "
+        "экземплярами Post и записями FeedPost на временной базе."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=int, default=4)
+        parser.add_argument(
+            "--sizes", default="10,100,1000",
+            help="Размеры страниц через запятую.",
+        )
+        parser.add_argument("--requests", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument("--output", help="Куда сохранить JSON.")
+
+    def handle(self, *args, **options):
+        media_root = tempfile.mkdtemp()
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(DEBUG=False, MEDIA_ROOT=media_root):
+                seed(options["scale"], media_root)
+                results = self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            shutil.rmtree(media_root, ignore_errors=True)
+        if options["output"]:
+            bench.save_results(options["output"], results)
+
+    def run(self, options):
+        sizes = [int(size) for size in options["sizes"].split(",")]
+        results = {}
+        self.stdout.write(
+            f"{'loader':<12}{'size':>6}{'retained KB':>13}{'B/post':>9}"
+            f"{'blocks/post':>13}{'peak KB':>10}{'p50 ms':>9}"
+        )
+        for size in sizes:
+            for name, load in LOADERS.items():
+                load(size)
+                result = {
+                    **memory_cost(load, size),
+                    **load_cost(
+                        load, size, options["requests"], options["warmup"]
+                    ),
+                }
+                results[f"{name}:{size}"] = result
+                self.stdout.write(
+                    f"{name:<12}{size:>6}"
+                    f"{result['retained_bytes'] / 1024:>13.1f}"
+                    f"{result['bytes_per_post']:>9.0f}"
+                    f"{result['blocks_per_post']:>13.1f}"
+                    f"{result['peak_bytes'] / 1024:>10.1f}"
+                    f"{result['p50_ms']:>9.2f}"
+                )
+        return results
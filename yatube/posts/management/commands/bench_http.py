@@ -0,0 +1,313 @@
+import shutil
+import tempfile
+from collections import namedtuple
+from importlib import import_module
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core import bench
+from posts.cursor import FEED_ORDER, make_cursor
+from posts.models import Follow, Group, Post
+from posts.paginator import POSTS_AMOUNT
+from posts.seeding import Seeder
+
+User = get_user_model()
+
+BENCHMARKED_URLCONFS = (
+    ("posts.urls", "posts"),
+    ("users.urls", "users"),
+    ("about.urls", "about"),
+    ("api.urls", "api"),
+)
+
+Scenario = namedtuple(
+    "Scenario", "name url_name kwargs query method data client prepare"
+)
+
+
+def seed(scale, media_root):
+    """Заполняет пустую базу данными в масштабе scale."""
+    Seeder(
+        users=20 * scale,
+        groups=5 * scale,
+        posts=500 * scale,
+        comments=200 * scale,
+        follows=100 * scale,
+        prefix="bench",
+        image_ratio=0.2,
+    ).run(media_root=media_root, log=lambda message: None)
+    return (
+        list(User.objects.order_by("id")),
+        list(Group.objects.order_by("id")),
+    )
+
+
+def build_scenarios(users, groups):
+    reader, author = users[0], users[1]
+    post = Post.objects.filter(author=reader, image="").first()
+    image_post = Post.objects.exclude(image="").first()
+    group = groups[0]
+    last_page = {
+        "page": Post.objects.count() // POSTS_AMOUNT + 1,
+    }
+    feed = Post.objects.order_by(*FEED_ORDER)
+    up_to_date = {"since": make_cursor(feed[0].pub_date, feed[0].pk)}
+    behind = {"since": make_cursor(feed[5].pub_date, feed[5].pk)}
+    middle = feed[feed.count() // 2]
+    deep = {"cursor": make_cursor(middle.pub_date, middle.pk)}
+    anonymous = Client()
+    member = Client()
+    member.force_login(reader)
+    leaving = Client()
+    for followed in users[1:4]:
+        Follow.objects.get_or_create(user=reader, author=followed)
+
+    def follow(client):
+        Follow.objects.get_or_create(user=reader, author=author)
+
+    def login(client):
+        client.force_login(reader)
+
+    routes = (
+        ("index", "posts:index", {}, {}, anonymous),
+        ("index deep page", "posts:index", {}, last_page, anonymous),
+        ("index logged in", "posts:index", {}, {}, member),
+        ("group", "posts:group_list", {"slug": group.slug}, {}, anonymous),
+        (
+            "group deep page", "posts:group_list", {"slug": group.slug},
+            {"page": 10}, anonymous,
+        ),
+        (
+            "profile", "posts:profile", {"username": reader.username}, {},
+            anonymous,
+        ),
+        (
+            "profile deep page", "posts:profile",
+            {"username": reader.username}, {"page": 10}, anonymous,
+        ),
+        ("post detail", "posts:post_detail", {"post_id": post.pk}, {}, member),
+        (
+            "image post detail", "posts:post_detail",
+            {"post_id": image_post.pk}, {}, anonymous,
+        ),
+        ("post edit", "posts:post_edit", {"post_id": post.pk}, {}, member),
+        ("post create form", "posts:post_create", {}, {}, member),
+        ("follow index", "posts:follow_index", {}, {}, member),
+        ("newer none", "posts:index_newer", {}, up_to_date, anonymous),
+        ("newer five", "posts:index_newer", {}, behind, anonymous),
+        ("follow newer", "posts:follow_newer", {}, behind, member),
+        ("more", "posts:index_more", {}, {}, anonymous),
+        ("more deep", "posts:index_more", {}, deep, anonymous),
+        ("group more", "posts:group_more", {"slug": group.slug}, deep,
+         anonymous),
+        (
+            "profile more", "posts:profile_more",
+            {"username": reader.username}, deep, anonymous,
+        ),
+        ("follow more", "posts:follow_more", {}, deep, member),
+        ("events", "posts:events", {}, {}, anonymous),
+        (
+            "group events", "posts:group_events", {"slug": group.slug}, {},
+            anonymous,
+        ),
+        ("follow events", "posts:follow_events", {}, {}, member),
+        (
+            "comment events", "posts:comment_events", {"post_id": post.pk},
+            {}, anonymous,
+        ),
+        ("sitemap index", "posts:sitemap", {}, {}, anonymous),
+        (
+            "sitemap posts", "posts:sitemap_section",
+            {"section": "posts", "shard": 0}, {}, anonymous,
+        ),
+        ("rss", "posts:rss", {}, {}, anonymous),
+        ("atom", "posts:atom", {}, {}, anonymous),
+        ("group rss", "posts:group_rss", {"slug": group.slug}, {}, anonymous),
+        (
+            "group atom", "posts:group_atom", {"slug": group.slug}, {},
+            anonymous,
+        ),
+        (
+            "profile rss", "posts:profile_rss",
+            {"username": reader.username}, {}, anonymous,
+        ),
+        (
+            "profile atom", "posts:profile_atom",
+            {"username": reader.username}, {}, anonymous,
+        ),
+        (
+            "export ndjson", "posts:profile_export",
+            {"username": reader.username}, {}, member,
+        ),
+        (
+            "export zip", "posts:profile_export",
+            {"username": reader.username}, {"format": "zip"}, member,
+        ),
+        ("signup form", "users:signup", {}, {}, anonymous),
+        ("login form", "users:login", {}, {}, anonymous),
+        ("password reset form", "users:password_reset", {}, {}, anonymous),
+        ("about author", "about:author", {}, {}, anonymous),
+        ("about tech", "about:tech", {}, {}, anonymous),
+        ("api index", "api:index", {}, {}, anonymous),
+        ("api group", "api:group_list", {"slug": group.slug}, {}, anonymous),
+        (
+            "api profile", "api:profile", {"username": reader.username}, {},
+            anonymous,
+        ),
+        ("api follow", "api:follow_index", {}, {}, member),
+        (
+            "api post detail", "api:post_detail", {"post_id": post.pk}, {},
+            anonymous,
+        ),
+    )
+    scenarios = [
+        Scenario(name, url_name, kwargs, query, "get", None, client, None)
+        for name, url_name, kwargs, query, client in routes
+    ]
+    scenarios += [
+        Scenario(
+            "add comment", "posts:add_comment", {"post_id": post.pk}, {},
+            "post", {"text": "Комментарий"}, member, None,
+        ),
+        Scenario(
+            "follow", "posts:profile_follow", {"username": author.username},
+            {}, "get", None, member, None,
+        ),
+        Scenario(
+            "unfollow", "posts:profile_unfollow",
+            {"username": author.username}, {}, "get", None, member, follow,
+        ),
+        Scenario(
+            "logout", "users:logout", {}, {}, "get", None, leaving, login,
+        ),
+        Scenario(
+            "password reset", "users:password_reset", {}, {}, "post",
+            {"email": reader.email}, anonymous, None,
+        ),
+    ]
+    return scenarios
+
+
+def uncovered_routes(scenarios):
+    names = {
+        f"{namespace}:{pattern.name}"
+        for module, namespace in BENCHMARKED_URLCONFS
+        for pattern in import_module(module).urlpatterns
+    }
+    return sorted(names - {scenario.url_name for scenario in scenarios})
+
+
+def run_scenario(scenario, requests, warmup, accept_encoding=""):
+    url = reverse(scenario.url_name, kwargs=scenario.kwargs)
+    send = getattr(scenario.client, scenario.method)
+    data = scenario.data if scenario.method == "post" else scenario.query
+    counter = bench.QueryCounter()
+    latencies, queries, sizes = [], [], []
+    for iteration in range(warmup + requests):
+        if scenario.prepare is not None:
+            scenario.prepare(scenario.client)
+        with counter.capture(), bench.timer() as elapsed:
+            response = send(url, data, HTTP_ACCEPT_ENCODING=accept_encoding)
+            body = b"".join(response) if response.streaming else (
+                response.content
+            )
+        if response.status_code >= 400:
+            raise CommandError(
+                f"{scenario.name}: {url} вернул {response.status_code}"
+            )
+        if iteration >= warmup:
+            latencies.append(elapsed["elapsed"])
+            queries.append(counter.count)
+            sizes.append(len(body))
+    return {
+        **bench.summarize(latencies),
+        "url": url,
+        "queries": max(queries),
+        "bytes": sum(sizes) // len(sizes),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный прогон всех страниц posts, users, about и api через "
+        "WSGI-обработчик на временной базе."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=int, default=1)
+        parser.add_argument("--requests", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument("--only", help="Подстрока имени сценария.")
+        parser.add_argument("--output", help="Куда сохранить JSON.")
+        parser.add_argument("--baseline", help="JSON с эталоном.")
+        parser.add_argument("--threshold", type=float, default=0.2)
+        parser.add_argument(
+            "--accept-encoding", default="",
+            help="Заголовок Accept-Encoding запросов, например br, gzip.",
+        )
+
+    def handle(self, *args, **options):
+        media_root = tempfile.mkdtemp()
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            # Потоки событий закрываются сразу: замеряется подключение.
+            # Ограничение частоты выключено: сценарии повторяют запись.
+            with override_settings(
+                DEBUG=False, MEDIA_ROOT=media_root, SSE_MAX_DURATION=0,
+                RATELIMIT_ENABLED=False,
+            ):
+                cache.clear()
+                results = self.run(media_root, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            shutil.rmtree(media_root, ignore_errors=True)
+        if options["output"]:
+            bench.save_results(options["output"], results)
+        if options["baseline"]:
+            self.check_baseline(results, options)
+
+    def run(self, media_root, options):
+        users, groups = seed(options["scale"], media_root)
+        scenarios = build_scenarios(users, groups)
+        for name in uncovered_routes(scenarios):
+            self.stderr.write(f"Маршрут {name} не покрыт бенчмарком.")
+        if options["only"]:
+            scenarios = [
+                scenario for scenario in scenarios
+                if options["only"] in scenario.name
+            ]
+        self.stdout.write(
+            f"{'scenario':<22}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}"
+            f"{'p99 ms':>9}{'queries':>9}{'bytes':>9}"
+        )
+        results = {}
+        for scenario in scenarios:
+            result = run_scenario(
+                scenario, options["requests"], options["warmup"],
+                options["accept_encoding"],
+            )
+            results[scenario.name] = result
+            self.stdout.write(
+                f"{scenario.name:<22}{result['throughput']:>9.1f}"
+                f"{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}"
+                f"{result['p99_ms']:>9.2f}{result['queries']:>9}"
+                f"{result['bytes']:>9}"
+            )
+        return results
+
+    def check_baseline(self, results, options):
+        regressions = bench.compare(
+            results, bench.load_results(options["baseline"]),
+            options["threshold"],
+        )
+        for name, metric, before, after in regressions:
+            self.stderr.write(f"{name}: {metric} {before:.2f} -> {after:.2f}")
+        if regressions:
+            raise CommandError(f"Найдено регрессий: {len(regressions)}")
+        self.stdout.write("Регрессий относительно эталона нет.")
@@ -0,0 +1,167 @@
+import shutil
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.template import engines
+from django.test import RequestFactory, override_settings
+
+from core import bench
+from core.templating import engine_config, warm_all
+from posts.cursor import FEED_ORDER
+from posts.management.commands.bench_http import seed
+from posts.models import Post
+from posts.paginator import paginator
+
+# Фрагментный кэш index и follow выключен: замеряется рендер статей.
+BENCH_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "template_fragments": {
+        "BACKEND": "django.core.cache.backends.dummy.DummyCache",
+    },
+}
+
+
+def build_contexts(request, users, groups):
+    """Контексты лент по десять статей, как их собирают представления."""
+    feed = Post.objects.order_by(*FEED_ORDER)
+    author, group = users[0], groups[0]
+
+    def page(queryset):
+        page_obj = paginator(request, queryset)
+        page_obj.object_list = list(page_obj.object_list)
+        return page_obj
+
+    index_page = page(feed)
+    return {
+        "posts/index.html": {"page_obj": index_page},
+        "posts/follow.html": {"page_obj": index_page},
+        "posts/group_list.html": {
+            "group": group, "page_obj": page(feed.filter(group=group)),
+        },
+        "posts/profile.html": {
+            "author": author,
+            "page_obj": page(feed.filter(author=author)),
+            "following": False,
+        },
+        "posts/includes/article.html": {
+            "post": index_page[0], "show_author": True, "show_group": True,
+        },
+    }
+
+
+def compile_cost(name, requests):
+    """Время чтения и разбора шаблона без кэширующего загрузчика."""
+    engine = engines["django"]
+    latencies = []
+    for _ in range(requests):
+        with bench.timer() as elapsed:
+            engine.get_template(name)
+        latencies.append(elapsed["elapsed"])
+    return bench.summarize(latencies)["p50_ms"]
+
+
+def render_cost(name, context, request, requests, warmup, using="django"):
+    template = engines[using].get_template(name)
+    latencies = []
+    for iteration in range(warmup + requests):
+        with bench.timer() as elapsed:
+            html = template.render(context, request)
+        if iteration >= warmup:
+            latencies.append(elapsed["elapsed"])
+    return {**bench.summarize(latencies), "bytes": len(html.encode())}
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет разбор и рендер шаблонов лент с десятью статьями "
+        "на временной базе: без кэширующего загрузчика, с ним и в Jinja2."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=int, default=1)
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--warmup", type=int, default=10)
+        parser.add_argument("--output", help="Куда сохранить JSON.")
+
+    def handle(self, *args, **options):
+        media_root = tempfile.mkdtemp()
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(
+                DEBUG=False, MEDIA_ROOT=media_root, CACHES=BENCH_CACHES
+            ):
+                cache.clear()
+                results = self.run(media_root, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            shutil.rmtree(media_root, ignore_errors=True)
+        if options["output"]:
+            bench.save_results(options["output"], results)
+
+    def run(self, media_root, options):
+        users, groups = seed(options["scale"], media_root)
+        request = RequestFactory().get("/")
+        request.user = users[1]
+        contexts = build_contexts(request, users, groups)
+        requests, warmup = options["requests"], options["warmup"]
+        results = {}
+        # Остальные движки из TEMPLATES, например Jinja2, не меняются.
+        other_engines = settings.TEMPLATES[1:]
+        with override_settings(
+            TEMPLATES=[engine_config(cached=False), *other_engines]
+        ):
+            for name in contexts:
+                results[name] = {"compile_ms": compile_cost(name, requests)}
+            uncached = {
+                name: render_cost(name, context, request, requests, warmup)
+                for name, context in contexts.items()
+            }
+        with override_settings(
+            TEMPLATES=[engine_config(cached=True), *other_engines]
+        ):
+            start = time.perf_counter()
+            compiled = warm_all()
+            warm_ms = (time.perf_counter() - start) * 1000
+            jinja = "jinja2" in compiled
+            for name, context in contexts.items():
+                cached = render_cost(name, context, request, requests, warmup)
+                results[name].update(
+                    uncached_p50_ms=uncached[name]["p50_ms"],
+                    **cached,
+                )
+                if jinja:
+                    results[name]["jinja2"] = render_cost(
+                        name, context, request, requests, warmup, "jinja2"
+                    )
+        count = sum(len(names) for names in compiled.values())
+        self.stdout.write(
+            f"warm_templates: {count} шаблонов за {warm_ms:.1f} мс"
+        )
+        if not jinja:
+            self.stdout.write("Jinja2 не установлен, его столбцы пустые.")
+        self.stdout.write(
+            f"{'template':<30}{'compile':>9}{'uncached':>10}{'p50 ms':>9}"
+            f"{'p95 ms':>9}{'req/s':>9}{'jinja p50':>11}{'jinja req/s':>13}"
+            f"{'bytes':>8}"
+        )
+        for name, result in results.items():
+            jinja_result = result.get("jinja2")
+            jinja_columns = (
+                f"{jinja_result['p50_ms']:>11.2f}"
+                f"{jinja_result['throughput']:>13.1f}"
+                if jinja_result else f"{'-':>11}{'-':>13}"
+            )
+            self.stdout.write(
+                f"{name:<30}{result['compile_ms']:>9.2f}"
+                f"{result['uncached_p50_ms']:>10.2f}{result['p50_ms']:>9.2f}"
+                f"{result['p95_ms']:>9.2f}{result['throughput']:>9.1f}"
+                f"{jinja_columns}{result['bytes']:>8}"
+            )
+        return results
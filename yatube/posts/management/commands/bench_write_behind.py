@@ -0,0 +1,154 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+
+from core import bench
+from posts import projection, writebehind
+from posts.cursor import FEED_ORDER
+from posts.models import Comment, Post
+from posts.paginator import POSTS_AMOUNT
+from posts.views import add_comment
+
+from .bench_http import seed
+
+
+def run_threads(count, target):
+    threads = [
+        threading.Thread(target=target, args=(number,))
+        for number in range(count)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def contention(users, post, options):
+    """Писатели комментариев и читатели ленты в параллельных потоках."""
+    factory = RequestFactory()
+    url = reverse("posts:add_comment", args=[post.pk])
+    writes, reads, errors = [], [], []
+    writing = threading.Event()
+    writing.set()
+
+    def timed(latencies, action):
+        start = time.perf_counter()
+        try:
+            action()
+        except Exception as error:
+            errors.append(type(error).__name__)
+        else:
+            latencies.append(time.perf_counter() - start)
+
+    def write(number):
+        user = users[number % len(users)]
+        for iteration in range(options["requests"]):
+            request = factory.post(url, {"text": f"Комментарий {iteration}"})
+            request.user = user
+            timed(writes, lambda: add_comment(request, post_id=post.pk))
+        connections.close_all()
+
+    def read(number):
+        feed = Post.objects.order_by(*FEED_ORDER)
+        while writing.is_set():
+            timed(reads, lambda: projection.load(feed[:POSTS_AMOUNT]))
+        connections.close_all()
+
+    readers = threading.Thread(
+        target=run_threads, args=(options["readers"], read)
+    )
+    readers.start()
+    start = time.perf_counter()
+    run_threads(options["writers"], write)
+    wall_time = time.perf_counter() - start
+    writing.clear()
+    readers.join()
+    return {
+        "writes": bench.summarize(writes, wall_time),
+        "reads": bench.summarize(reads, wall_time),
+        "errors": len(errors),
+    }
+
+
+def drain(timeout):
+    """Секунды до опустошения очереди фоновым потоком."""
+    start = time.perf_counter()
+    while len(writebehind.queue()) and time.perf_counter() - start < timeout:
+        time.sleep(0.01)
+    writebehind.flush()
+    return time.perf_counter() - start
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает запись комментариев сразу в базу и через очередь "
+        "отложенной записи при параллельных писателях и читателях ленты "
+        "на временной файловой базе."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, default=8)
+        parser.add_argument("--readers", type=int, default=4)
+        parser.add_argument("--requests", type=int, default=50)
+        parser.add_argument("--interval", type=float, default=0.1)
+        parser.add_argument("--output", help="Куда сохранить JSON.")
+
+    def handle(self, *args, **options):
+        work_dir = tempfile.mkdtemp()
+        test_settings = connection.settings_dict["TEST"]
+        old_name, old_test_name = connection.settings_dict["NAME"], (
+            test_settings["NAME"]
+        )
+        # Файловая база: у каждого потока своё соединение и общие блокировки.
+        test_settings["NAME"] = os.path.join(work_dir, "bench.sqlite3")
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(
+                DEBUG=False, MEDIA_ROOT=work_dir, RATELIMIT_ENABLED=False,
+                WRITE_BEHIND_PATH=os.path.join(work_dir, "queue.sqlite3"),
+                WRITE_BEHIND_INTERVAL=options["interval"],
+            ):
+                results = self.run(work_dir, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            test_settings["NAME"] = old_test_name
+            shutil.rmtree(work_dir, ignore_errors=True)
+        if options["output"]:
+            bench.save_results(options["output"], results)
+
+    def run(self, work_dir, options):
+        users, _ = seed(1, work_dir)
+        post = Post.objects.order_by("pk").first()
+        expected = options["writers"] * options["requests"]
+        self.stdout.write(
+            f"{'mode':<14}{'writes/s':>10}{'w p95 ms':>10}"
+            f"{'reads/s':>10}{'r p95 ms':>10}{'errors':>8}{'lost':>6}"
+            f"{'drain s':>9}"
+        )
+        results = {}
+        for mode, enabled in (("sync", False), ("write-behind", True)):
+            Comment.objects.filter(post=post).delete()
+            with override_settings(WRITE_BEHIND_ENABLED=enabled):
+                result = contention(users, post, options)
+                result["drain_s"] = drain(60) if enabled else 0.0
+            result["lost"] = (
+                expected - result["errors"]
+                - Comment.objects.filter(post=post).count()
+            )
+            results[mode] = result
+            self.stdout.write(
+                f"{mode:<14}{result['writes']['throughput']:>10.1f}"
+                f"{result['writes']['p95_ms']:>10.2f}"
+                f"{result['reads']['throughput']:>10.1f}"
+                f"{result['reads']['p95_ms']:>10.2f}"
+                f"{result['errors']:>8}{result['lost']:>6}"
+                f"{result['drain_s']:>9.2f}"
+            )
+        return results
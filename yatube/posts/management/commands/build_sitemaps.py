@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import sitemaps
+
+
+class Command(BaseCommand):
+    help = (
+        "Собирает индекс sitemap и шарды по SITEMAP_SHARD_SIZE адресов "
+        "в сжатые файлы, которые отдаёт /sitemap.xml."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--base-url", required=True,
+            help="Адрес сайта для ссылок, например https://yatube.ru/.",
+        )
+        parser.add_argument("--output-dir", default=settings.SITEMAP_ROOT)
+
+    def handle(self, *args, **options):
+        base_url = options["base_url"].rstrip("/") + "/"
+        count = sitemaps.build(options["output_dir"], base_url)
+        self.stdout.write(
+            f"Шардов: {count}, файлы в {options['output_dir']}"
+        )
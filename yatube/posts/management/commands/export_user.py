@@ -0,0 +1,39 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.exporting import FORMATS, export_stream
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Потоково выгружает посты, комментарии и подписки пользователя "
+        "в NDJSON, CSV или zip с картинками."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("username")
+        parser.add_argument(
+            "--format", choices=sorted(FORMATS), default="ndjson"
+        )
+        parser.add_argument(
+            "--output", help="Файл результата; по умолчанию stdout."
+        )
+        parser.add_argument("--chunk-size", type=int)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["username"])
+        except User.DoesNotExist:
+            raise CommandError(f"Нет пользователя {options['username']}")
+        chunks = export_stream(user, options["format"], options["chunk_size"])
+        if options["output"]:
+            with open(options["output"], "wb") as output:
+                output.writelines(chunks)
+            return
+        stream = getattr(self.stdout._out, "buffer", None)
+        if stream is None:
+            raise CommandError("Вывод не двоичный: укажите --output.")
+        stream.writelines(chunks)
+        stream.flush()
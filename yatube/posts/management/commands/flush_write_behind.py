@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts import writebehind
+
+
+class Command(BaseCommand):
+    help = (
+        "Записывает в базу всё, что накопилось в очереди отложенной "
+        "записи комментариев и подписок."
+    )
+
+    def handle(self, *args, **options):
+        flushed = writebehind.flush()
+        left = len(writebehind.queue())
+        self.stdout.write(f"Записано: {flushed}, в очереди: {left}")
+        if left and not flushed:
+            self.stderr.write("Очередь сейчас сливает другой процесс.")
@@ -0,0 +1,60 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.importing import IMPORTERS, READERS, Checkpoint
+
+
+class Command(BaseCommand):
+    help = (
+        "Импортирует посты или комментарии из NDJSON или CSV пачками "
+        "через bulk_create с возможностью продолжить после сбоя."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument(
+            "--format", choices=sorted(READERS),
+            help="По умолчанию определяется по расширению файла.",
+        )
+        parser.add_argument(
+            "--model", choices=sorted(IMPORTERS), default="posts"
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--checkpoint",
+            help="Файл позиции; по умолчанию <path>.checkpoint.",
+        )
+        parser.add_argument(
+            "--resume", action="store_true",
+            help="Продолжить с позиции из файла контрольной точки.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or (
+            "csv" if path.endswith(".csv") else "ndjson"
+        )
+        checkpoint = Checkpoint(
+            options["checkpoint"] or f"{path}.checkpoint"
+        )
+        if not options["resume"] and os.path.exists(checkpoint.path):
+            raise CommandError(
+                f"Есть контрольная точка {checkpoint.path}: "
+                "добавьте --resume или удалите её."
+            )
+        importer = IMPORTERS[options["model"]](
+            batch_size=options["batch_size"], log=self.stdout.write
+        )
+        start = time.perf_counter()
+        with open(path, newline="", encoding="utf-8") as stream:
+            imported, failed = importer.run(
+                READERS[file_format](stream), checkpoint
+            )
+        if os.path.exists(checkpoint.path):
+            os.remove(checkpoint.path)
+        self.stdout.write(
+            f"Записано {imported}, пропущено {failed} "
+            f"за {time.perf_counter() - start:.1f} с."
+        )
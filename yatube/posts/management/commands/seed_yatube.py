@@ -0,0 +1,95 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.seeding import Seeder
+
+
+class Command(BaseCommand):
+    help = (
+        "Генерирует пользователей, группы, посты, комментарии и подписки "
+        "с распределениями, похожими на продакшен."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10000)
+        parser.add_argument("--groups", type=int, default=100)
+        parser.add_argument("--posts", type=int, default=1000000)
+        parser.add_argument("--comments", type=int, default=500000)
+        parser.add_argument("--follows", type=int, default=200000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--prefix", default="seed",
+            help="Префикс имён пользователей и slug групп.",
+        )
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument(
+            "--author-exponent", type=float, default=1.1,
+            help="Показатель Ципфа для активности авторов.",
+        )
+        parser.add_argument(
+            "--group-exponent", type=float, default=1.3,
+            help="Показатель Ципфа для горячих и холодных групп.",
+        )
+        parser.add_argument(
+            "--follow-exponent", type=float, default=1.2,
+            help="Показатель Ципфа для популярности в графе подписок.",
+        )
+        parser.add_argument("--max-follows", type=int, default=500)
+        parser.add_argument(
+            "--ungrouped", type=float, default=0.2,
+            help="Доля постов без группы.",
+        )
+        parser.add_argument(
+            "--image-ratio", type=float, default=0.0,
+            help="Доля постов с картинкой.",
+        )
+        parser.add_argument(
+            "--burst-posts", type=float, default=0.001,
+            help="Доля постов со вспышками комментариев.",
+        )
+        parser.add_argument(
+            "--burst-share", type=float, default=0.3,
+            help="Доля комментариев, приходящихся на вспышки.",
+        )
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument(
+            "--chunk-size", type=int, default=50000,
+            help="Строк в одной транзакции.",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=1,
+            help="Число процессов; на SQLite запись идёт по очереди.",
+        )
+
+    def handle(self, *args, **options):
+        seeder = Seeder(
+            users=options["users"],
+            groups=options["groups"],
+            posts=options["posts"],
+            comments=options["comments"],
+            follows=options["follows"],
+            seed=options["seed"],
+            prefix=options["prefix"],
+            days=options["days"],
+            author_exponent=options["author_exponent"],
+            group_exponent=options["group_exponent"],
+            follow_exponent=options["follow_exponent"],
+            max_follows=options["max_follows"],
+            ungrouped=options["ungrouped"],
+            image_ratio=options["image_ratio"],
+            burst_posts=options["burst_posts"],
+            burst_share=options["burst_share"],
+            batch_size=options["batch_size"],
+            chunk_size=options["chunk_size"],
+        )
+        start = time.perf_counter()
+        seeder.run(
+            workers=options["workers"],
+            media_root=settings.MEDIA_ROOT,
+            log=self.stdout.write,
+        )
+        self.stdout.write(
+            f"Готово за {time.perf_counter() - start:.1f} с."
+        )
@@ -0,0 +1,90 @@
+# Generated by Django 2.2.16 on 2026-10-19 01:02
+
+from urllib.parse import quote
+
+from django.db import migrations, models
+
+FIELDS = (
+    'author_username', 'author_name', 'group_slug', 'group_title',
+    'profile_path', 'detail_path', 'group_path',
+)
+BATCH_SIZE = 500
+# Ссылки на момент миграции: reverse() зависел бы от текущего urls.py.
+PROFILE_PATH = '/profile/{}/'
+DETAIL_PATH = '/posts/{}/'
+GROUP_PATH = '/group/{}/'
+# Символы, которые reverse() оставляет в пути без %-кодирования.
+PATH_SAFE = "!$&'()*+,;=/~:@"
+
+
+def path(template, value):
+    return quote(template.format(value), safe=PATH_SAFE)
+
+
+def fill_projection(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    ids = list(Post.objects.order_by('id').values_list('id', flat=True))
+    for start in range(0, len(ids), BATCH_SIZE):
+        posts = list(
+            Post.objects.filter(id__in=ids[start:start + BATCH_SIZE])
+            .select_related('author', 'group')
+        )
+        for post in posts:
+            author, group = post.author, post.group
+            post.author_username = author.username
+            post.author_name = (
+                f'{author.first_name} {author.last_name}'.strip()
+            )
+            post.profile_path = path(PROFILE_PATH, author.username)
+            post.detail_path = path(DETAIL_PATH, post.id)
+            if group is not None:
+                post.group_slug = group.slug
+                post.group_title = group.title
+                post.group_path = path(GROUP_PATH, group.slug)
+        Post.objects.bulk_update(posts, FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_post_image_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='author_name',
+            field=models.CharField(blank=True, editable=False, max_length=301),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='author_username',
+            field=models.CharField(blank=True, editable=False, max_length=150),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='detail_path',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='group_path',
+            field=models.CharField(blank=True, editable=False, max_length=128),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='group_slug',
+            field=models.CharField(blank=True, editable=False, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='group_title',
+            field=models.CharField(blank=True, editable=False, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='profile_path',
+            field=models.CharField(blank=True, editable=False, max_length=1024),
+        ),
+        migrations.RunPython(fill_projection, migrations.RunPython.noop),
+    ]
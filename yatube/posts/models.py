@@ -27,13 +27,43 @@ class Post(CreatedModel):
         on_delete=models.SET_NULL,
         related_name="posts",
     )
-    image = models.ImageField("Картинка", upload_to="posts/", blank=True)
+    image = models.ImageField(
+        "Картинка", upload_to="posts/", blank=True, db_index=True
+    )
+    # Проекция для лент: см. posts.projection.
+    author_username = models.CharField(
+        max_length=150, blank=True, editable=False
+    )
+    author_name = models.CharField(max_length=301, blank=True, editable=False)
+    group_slug = models.CharField(max_length=50, blank=True, editable=False)
+    group_title = models.CharField(
+        max_length=200, blank=True, editable=False
+    )
+    # Путь с логином в %-кодировке: кириллица занимает до 6 символов.
+    profile_path = models.CharField(
+        max_length=1024, blank=True, editable=False
+    )
+    detail_path = models.CharField(max_length=64, blank=True, editable=False)
+    group_path = models.CharField(max_length=128, blank=True, editable=False)
 
     def __str__(self) -> str:
         return self.text[:15]
 
     class Meta:
         ordering = ["-pub_date"]
+        indexes = [
+            models.Index(
+                fields=["-pub_date", "-id"], name="post_feed_idx"
+            ),
+            models.Index(
+                fields=["group", "-pub_date", "-id"],
+                name="post_group_feed_idx",
+            ),
+            models.Index(
+                fields=["author", "-pub_date", "-id"],
+                name="post_author_feed_idx",
+            ),
+        ]
 
 
 class Comment(CreatedModel):
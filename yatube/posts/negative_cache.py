@@ -0,0 +1,202 @@
+"""Кэш промахов для поиска групп, авторов и постов.
+
+Запросы к несуществующим slug, username и id (их много у краулеров)
+запоминаются в кэше и больше не доходят до базы данных. Дополнительно
+можно включить фильтр Блума по существующим ключам: если ключа в нём нет,
+объект точно не существует, и страница 404 отдаётся без запроса к базе.
+"""
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import Http404
+from posts.models import Group, Post
+
+User = get_user_model()
+
+LOOKUPS = {
+    "user": (User, "username"),
+    "group": (Group, "slug"),
+    "post": (Post, "pk"),
+}
+
+
+class BloomFilter:
+    """Фильтр Блума на битовом массиве с двойным хешированием."""
+
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(capacity, 1)
+        self.size = int(
+            -capacity * math.log(error_rate) / (math.log(2) ** 2)
+        ) or 1
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray(self.size // 8 + 1)
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (first + i * second) % self.size
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(value)
+        )
+
+
+_filters = {}
+_filters_lock = threading.Lock()
+
+
+NAMESPACE_KEY = "missing:namespace"
+
+# Пространство имён из кэша и время его чтения в этом процессе.
+_namespace = (0, None)
+
+
+def _current_namespace(refresh=False):
+    """Пространство имён ключей без похода в кэш на каждый поиск.
+
+    Его меняет reset() после массовой записи, возможно в другом процессе.
+    Процесс перечитывает значение при перестройке фильтра Блума и не реже
+    раза в NEGATIVE_CACHE_BLOOM_REBUILD_INTERVAL секунд.
+    """
+    global _namespace
+    namespace, checked_at = _namespace
+    now = time.monotonic()
+    if refresh or checked_at is None or (
+        now - checked_at >= settings.NEGATIVE_CACHE_BLOOM_REBUILD_INTERVAL
+    ):
+        namespace = cache.get(NAMESPACE_KEY, 0)
+        _namespace = (namespace, now)
+    return namespace
+
+
+def _cache_key(kind, key):
+    namespace = _current_namespace()
+    digest = hashlib.md5(key.encode()).hexdigest()
+    return f"missing:{namespace}:{kind}:{digest}"
+
+
+def _generation_key(kind):
+    return f"missing:generation:{kind}"
+
+
+def _generation(kind):
+    return cache.get(_generation_key(kind), 0)
+
+
+def _build_filter(kind):
+    model, field = LOOKUPS[kind]
+    keys = model.objects.values_list(field, flat=True)
+    bloom = BloomFilter(
+        int(keys.count() * 1.5) + 1000,
+        settings.NEGATIVE_CACHE_BLOOM_ERROR_RATE,
+    )
+    for key in keys.iterator():
+        bloom.add(str(key))
+    return bloom
+
+
+def _get_filter(kind):
+    """Возвращает фильтр Блума или None, если ему сейчас нельзя доверять.
+
+    Вставки в других процессах меняют поколение в общем кэше. Устаревший
+    фильтр перестраивается не чаще NEGATIVE_CACHE_BLOOM_REBUILD_INTERVAL,
+    а до перестройки поиск идёт мимо него.
+    """
+    generation = _generation(kind)
+    entry = _filters.get(kind)
+    if entry is not None:
+        bloom, built_generation, built_at = entry
+        age = time.monotonic() - built_at
+        if built_generation == generation and (
+            age < settings.NEGATIVE_CACHE_BLOOM_TTL
+        ):
+            return bloom
+        if age < settings.NEGATIVE_CACHE_BLOOM_REBUILD_INTERVAL:
+            return None
+    with _filters_lock:
+        # Пока ждали блокировку, фильтр мог перестроить соседний поток.
+        entry = _filters.get(kind)
+        if entry is not None:
+            bloom, built_generation, built_at = entry
+            if built_generation == _generation(kind) and (
+                time.monotonic() - built_at
+                < settings.NEGATIVE_CACHE_BLOOM_TTL
+            ):
+                return bloom
+        bloom = _build_filter(kind)
+        _filters[kind] = (bloom, generation, time.monotonic())
+    _current_namespace(refresh=True)
+    return bloom
+
+
+def is_missing(kind, key):
+    if settings.NEGATIVE_CACHE_BLOOM:
+        bloom = _get_filter(kind)
+        if bloom is not None and key not in bloom:
+            return True
+    return cache.get(_cache_key(kind, key)) is not None
+
+
+def remember_missing(kind, key):
+    cache.set(_cache_key(kind, key), 1, settings.NEGATIVE_CACHE_TIMEOUT)
+
+
+def _bump_generation(kind):
+    key = _generation_key(kind)
+    if cache.add(key, 1, None):
+        return 1
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+        return 1
+
+
+def forget_missing(kind, key):
+    """Снимает отметку об отсутствии ключа после создания объекта."""
+    cache.delete(_cache_key(kind, key))
+    generation = _bump_generation(kind)
+    entry = _filters.get(kind)
+    if entry is not None:
+        bloom, built_generation, built_at = entry
+        bloom.add(key)
+        if generation == built_generation + 1:
+            _filters[kind] = (bloom, generation, built_at)
+
+
+def reset():
+    """Сбрасывает кэш промахов после массовой записи в обход сигналов."""
+    global _namespace
+    with _filters_lock:
+        _filters.clear()
+    stamp = time.time_ns()
+    cache.set(NAMESPACE_KEY, stamp, None)
+    _namespace = (stamp, time.monotonic())
+    for kind in LOOKUPS:
+        cache.set(_generation_key(kind), stamp, None)
+
+
+def lookup_or_404(kind, value):
+    """Аналог get_object_or_404, который запоминает промахи."""
+    key = str(value)
+    if is_missing(kind, key):
+        raise Http404(f"{kind} {key!r} не найден")
+    model, field = LOOKUPS[kind]
+    try:
+        return model.objects.get(**{field: value})
+    except model.DoesNotExist:
+        remember_missing(kind, key)
+        raise Http404(f"{kind} {key!r} не найден")
@@ -1,10 +1,32 @@
 from django.core.paginator import Paginator
+from django.utils.functional import lazy
+from posts.cursor import make_cursor
+from posts.projection import FeedList
 
 POSTS_AMOUNT = 10
 
 
+def page_cursor(page_obj, index):
+    """Курсор статьи index страницы для догрузки ленты."""
+    if not page_obj.object_list:
+        return ""
+    post = page_obj.object_list[index]
+    return make_cursor(post.pub_date, post.id)
+
+
+lazy_cursor = lazy(page_cursor, str)
+
+
 def paginator(request, post_list):
-    paginator = Paginator(post_list, POSTS_AMOUNT)
+    """Страница ленты ?page= из FeedPost, а не экземпляров Post.
+
+    Статьи и курсоры первой и последней из них читаются при выводе в
+    шаблоне: страница из фрагментного кэша не запрашивает ленту, а
+    курсор подписывается один раз на страницу, а не для каждой статьи.
+    """
+    paginator = Paginator(FeedList(post_list), POSTS_AMOUNT)
     page_number = request.GET.get("page")
     page_obj = paginator.get_page(page_number)
+    page_obj.first_cursor = lazy_cursor(page_obj, 0)
+    page_obj.last_cursor = lazy_cursor(page_obj, -1)
     return page_obj
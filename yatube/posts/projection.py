@@ -0,0 +1,182 @@
+"""Проекция поста для рендера лент.
+
+Логин и отображаемое имя автора, slug и название группы и готовые пути
+страниц хранятся в строке поста. Статья ленты рендерится из этих колонок
+без join на auth_user и posts_group, без экземпляров User и Group и без
+reverse() на каждую ссылку. Проекцию обновляют сигналы из posts.signals
+при сохранении поста, автора или группы, а после массовой записи —
+refresh() по строкам с пустым detail_path.
+
+Ленты читают эти колонки через values_list() в FeedPost со __slots__:
+ни экземпляров Post, ни их __dict__ и состояния модели на каждую статью.
+"""
+from operator import itemgetter
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from posts.models import Group, Post
+
+User = get_user_model()
+
+FIELDS = (
+    "author_username", "author_name", "group_slug", "group_title",
+    "profile_path", "detail_path", "group_path",
+)
+AUTHOR_FIELDS = ("author_username", "author_name", "profile_path")
+GROUP_FIELDS = ("group_slug", "group_title", "group_path")
+# Колонки, которых хватает шаблону статьи, в порядке __slots__ FeedPost.
+ROW = (
+    "id", "text", "pub_date", "image", "author_id", "group_id", *FIELDS,
+)
+# Пара (pub_date, id) строки ROW для курсора ленты.
+row_key = itemgetter(ROW.index("pub_date"), ROW.index("id"))
+REFRESH_BATCH_SIZE = 500
+
+
+class FeedPost:
+    """Статья ленты: одна строка ROW без экземпляра модели.
+
+    image — имя файла: его понимают thumbnail и сравнение с FieldFile.
+    author и group собираются из колонок проекции по обращению, без
+    запроса к базе, для кода, который ждёт модели. Равен посту с тем же
+    id, будь то FeedPost или Post.
+    """
+
+    __slots__ = ROW
+
+    def __init__(self, *row):
+        for name, value in zip(ROW, row):
+            setattr(self, name, value)
+
+    @property
+    def pk(self):
+        return self.id
+
+    @property
+    def author(self):
+        return User(id=self.author_id, username=self.author_username)
+
+    @property
+    def group(self):
+        if self.group_id is None:
+            return None
+        return Group(
+            id=self.group_id, slug=self.group_slug, title=self.group_title
+        )
+
+    def __eq__(self, other):
+        if isinstance(other, (FeedPost, Post)):
+            return self.id == other.pk
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return f"<FeedPost: {self.id}>"
+
+
+def load(queryset):
+    """Посты queryset списком FeedPost."""
+    return [FeedPost(*row) for row in queryset.values_list(*ROW)]
+
+
+class LazyFeed:
+    """Срез ленты, который load() читает при первом обращении.
+
+    Страница, чью разметку отдал фрагментный кэш, так и не читается.
+    """
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+        self._posts = None
+
+    @property
+    def posts(self):
+        if self._posts is None:
+            self._posts = load(self.queryset)
+        return self._posts
+
+    def __len__(self):
+        return len(self.posts)
+
+    def __iter__(self):
+        return iter(self.posts)
+
+    def __getitem__(self, index):
+        return self.posts[index]
+
+
+class FeedList:
+    """Лента для Paginator: count() и ленивые срезы LazyFeed."""
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+        self.ordered = queryset.ordered
+
+    def count(self):
+        return self.queryset.count()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return LazyFeed(self.queryset[index])
+        return load(self.queryset[index:index + 1])[0]
+
+
+def author_values(user):
+    return {
+        "author_username": user.username,
+        "author_name": user.get_full_name(),
+        "profile_path": reverse("posts:profile", args=[user.username]),
+    }
+
+
+def group_values(group):
+    if group is None:
+        return dict.fromkeys(GROUP_FIELDS, "")
+    return {
+        "group_slug": group.slug,
+        "group_title": group.title,
+        "group_path": reverse("posts:group_list", args=[group.slug]),
+    }
+
+
+def detail_path(post_id):
+    return reverse("posts:post_detail", args=[post_id])
+
+
+def fill(post):
+    """Заполняет проекцию несохранённого или изменённого поста."""
+    values = {**author_values(post.author), **group_values(post.group)}
+    if post.pk is not None:
+        values["detail_path"] = detail_path(post.pk)
+    for field, value in values.items():
+        setattr(post, field, value)
+
+
+def refresh(queryset):
+    """Пересчитывает проекцию постов queryset пачками через bulk_update."""
+    ids = list(queryset.order_by("id").values_list("id", flat=True))
+    for start in range(0, len(ids), REFRESH_BATCH_SIZE):
+        rows = list(
+            Post.objects.filter(
+                id__in=ids[start:start + REFRESH_BATCH_SIZE]
+            ).values_list("id", "author_id", "group_id")
+        )
+        authors = User.objects.only(
+            "username", "first_name", "last_name"
+        ).in_bulk({author_id for _, author_id, _ in rows})
+        groups = Group.objects.only("slug", "title").in_bulk(
+            {group_id for _, _, group_id in rows if group_id}
+        )
+        posts = [
+            Post(
+                id=post_id,
+                detail_path=detail_path(post_id),
+                **author_values(authors[author_id]),
+                **group_values(groups.get(group_id)),
+            )
+            for post_id, author_id, group_id in rows
+        ]
+        Post.objects.bulk_update(posts, FIELDS)
+    return len(ids)
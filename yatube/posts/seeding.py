@@ -0,0 +1,292 @@
+"""Генератор синтетических данных в масштабе продакшена.
+
+Все случайные величины берутся из генераторов, зависящих только от
+seed и номера чанка, поэтому результат не зависит от числа процессов.
+Активность авторов, популярность групп и подписок распределены по
+закону Ципфа: первые пользователи и группы — «горячие».
+"""
+import itertools
+import multiprocessing
+import os
+import random
+from array import array
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, connections, transaction
+from django.utils import timezone
+from PIL import Image
+from posts import projection
+from posts.bulk import insert_rows, safe_batch_size
+from posts.models import Comment, Follow, Group, Post
+from posts.signals import bulk_write_finished
+
+User = get_user_model()
+
+WORDS = (
+    "яндекс практикум джанго питон пост лента группа автор подписка "
+    "комментарий кэш запрос шаблон модель база индекс сервер страница "
+    "картинка ссылка тест код день ночь город море лес дом кот собака"
+).split()
+FIRST_NAMES = ("Анна", "Иван", "Мария", "Пётр", "Ольга", "Сергей", "Елена")
+LAST_NAMES = ("Иванова", "Петров", "Смирнова", "Кузнецов", "Попова", "Соколов")
+IMAGE_NAME = "posts/seed.png"
+
+
+def zipf_weights(count, exponent):
+    """Накопленные веса Ципфа для random.choices(cum_weights=...)."""
+    return list(itertools.accumulate(
+        1 / (rank + 1) ** exponent for rank in range(count)
+    ))
+
+
+def chunks(total, size):
+    for start in range(0, total, size):
+        yield start, min(size, total - start)
+
+
+# Проекцию для рендера заполняет refresh_projection после bulk_write_finished.
+POST_FIELDS = (
+    "text", "author", "group", "image", "pub_date", "created",
+    *projection.FIELDS,
+)
+EMPTY_PROJECTION = ("",) * len(projection.FIELDS)
+COMMENT_FIELDS = ("post", "author", "text", "created")
+
+
+class Seeder:
+    def __init__(
+        self, users, groups, posts, comments, follows, seed=0,
+        prefix="seed", days=365, author_exponent=1.1, group_exponent=1.3,
+        follow_exponent=1.2, max_follows=500, ungrouped=0.2,
+        image_ratio=0.0, burst_posts=0.001, burst_share=0.3,
+        batch_size=2000, chunk_size=50000, password="password",
+    ):
+        self.users = users
+        self.groups = groups
+        self.posts = posts
+        self.comments = comments
+        self.follows = follows
+        self.seed = seed
+        self.prefix = prefix
+        self.author_exponent = author_exponent
+        self.group_exponent = group_exponent
+        self.follow_exponent = follow_exponent
+        self.max_follows = max_follows
+        self.ungrouped = ungrouped
+        self.image_ratio = image_ratio
+        self.burst_posts = burst_posts
+        self.burst_share = burst_share
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.password = password
+        self.end = timezone.now().replace(microsecond=0)
+        self.start = self.end - timedelta(days=days)
+        self.user_ids = array("q")
+        self.group_ids = array("q")
+        self.post_ids = array("q")
+        self.burst_ids = []
+
+    def rng(self, stage, chunk=0):
+        return random.Random(f"{self.seed}:{stage}:{chunk}")
+
+    def _text(self, rng, low, high):
+        words = rng.choices(WORDS, k=rng.randint(low, high))
+        return " ".join(words).capitalize()
+
+    def _date(self, rng, position):
+        """Дата, растущая вместе с порядковым номером записи."""
+        span = (self.end - self.start).total_seconds()
+        offset = span * position + rng.uniform(-60, 60)
+        return self.start + timedelta(seconds=min(max(offset, 0), span))
+
+    def create_users(self):
+        password = make_password(self.password)
+        for start, size in chunks(self.users, self.chunk_size):
+            rng = self.rng("users", start)
+            with transaction.atomic():
+                User.objects.bulk_create(
+                    (
+                        User(
+                            username=f"{self.prefix}{number}",
+                            first_name=rng.choice(FIRST_NAMES),
+                            last_name=rng.choice(LAST_NAMES),
+                            email=f"{self.prefix}{number}@example.com",
+                            password=password,
+                        )
+                        for number in range(start, start + size)
+                    ),
+                    batch_size=safe_batch_size(User, self.batch_size),
+                )
+        self.user_ids = array("q", User.objects.filter(
+            username__startswith=self.prefix
+        ).order_by("id").values_list("id", flat=True))
+
+    def create_groups(self):
+        Group.objects.bulk_create(
+            (
+                Group(
+                    title=f"Группа {number}",
+                    slug=f"{self.prefix}-group-{number}",
+                    description=self._text(self.rng("groups", number), 5, 20),
+                )
+                for number in range(self.groups)
+            ),
+            batch_size=safe_batch_size(Group, self.batch_size),
+        )
+        self.group_ids = array("q", Group.objects.filter(
+            slug__startswith=f"{self.prefix}-group-"
+        ).order_by("id").values_list("id", flat=True))
+
+    def text_pool(self, rng, low, high, size=1000):
+        return [self._text(rng, low, high) for _ in range(size)]
+
+    def posts_chunk(self, start, size):
+        rng = self.rng("posts", start)
+        author_weights = zipf_weights(len(self.user_ids), self.author_exponent)
+        group_weights = zipf_weights(len(self.group_ids), self.group_exponent)
+        authors = rng.choices(
+            self.user_ids, cum_weights=author_weights, k=size
+        )
+        groups = rng.choices(
+            self.group_ids or [None], cum_weights=group_weights or None,
+            k=size,
+        )
+        texts = self.text_pool(rng, 5, 60)
+        adapt = connection.ops.adapt_datetimefield_value
+        rows = []
+        for index in range(size):
+            created = adapt(self._date(rng, (start + index) / self.posts))
+            rows.append((
+                rng.choice(texts),
+                authors[index],
+                groups[index] if rng.random() >= self.ungrouped else None,
+                IMAGE_NAME if rng.random() < self.image_ratio else "",
+                created,
+                created,
+                *EMPTY_PROJECTION,
+            ))
+        with transaction.atomic():
+            insert_rows(Post, POST_FIELDS, rows)
+
+    def comments_chunk(self, start, size):
+        """Комментарии: доля burst_share приходится на редкие «вспышки»."""
+        rng = self.rng("comments", start)
+        burst_times = {}
+        for post_id in self.burst_ids:
+            burst_rng = self.rng("burst", post_id)
+            burst_times[post_id] = self._date(burst_rng, burst_rng.random())
+        texts = self.text_pool(rng, 2, 30)
+        adapt = connection.ops.adapt_datetimefield_value
+        rows = []
+        for _ in range(size):
+            if rng.random() < self.burst_share:
+                post_id = rng.choice(self.burst_ids)
+                created = burst_times[post_id] + timedelta(
+                    seconds=rng.expovariate(1 / 600)
+                )
+            else:
+                post_id = rng.choice(self.post_ids)
+                created = self._date(rng, rng.random())
+            rows.append((
+                post_id,
+                rng.choice(self.user_ids),
+                rng.choice(texts),
+                adapt(created),
+            ))
+        with transaction.atomic():
+            insert_rows(Comment, COMMENT_FIELDS, rows)
+
+    def follows_chunk(self, start, size):
+        """Подписки по степенному закону: популярных авторов читают чаще."""
+        rng = self.rng("follows", start)
+        weights = zipf_weights(len(self.user_ids), self.follow_exponent)
+        average = self.follows / max(len(self.user_ids), 1)
+        follows = []
+        for user_id in self.user_ids[start:start + size]:
+            degree = min(
+                self.max_follows,
+                round(average * (rng.paretovariate(2) - 1)),
+            )
+            authors = set(
+                rng.choices(self.user_ids, cum_weights=weights, k=degree)
+            )
+            authors.discard(user_id)
+            follows.extend(
+                Follow(user_id=user_id, author_id=author_id)
+                for author_id in sorted(authors)
+            )
+        with transaction.atomic():
+            Follow.objects.bulk_create(
+                follows, batch_size=safe_batch_size(Follow, self.batch_size)
+            )
+
+    def load_post_ids(self, after_id):
+        self.post_ids = array("q", Post.objects.filter(
+            id__gt=after_id
+        ).order_by("id").values_list("id", flat=True).iterator())
+        bursts = max(1, int(len(self.post_ids) * self.burst_posts))
+        self.burst_ids = self.rng("bursts").sample(
+            list(self.post_ids), min(bursts, len(self.post_ids))
+        )
+
+    def run_stage(self, method, total, workers):
+        """Выполняет чанки по очереди или в пуле дочерних процессов.
+
+        Процессы получают Seeder через fork, а не через pickle, чтобы не
+        копировать массивы идентификаторов в каждую задачу.
+        """
+        global _active_seeder
+        tasks = [
+            (method, start, size)
+            for start, size in chunks(total, self.chunk_size)
+        ]
+        _active_seeder = self
+        try:
+            if workers <= 1 or len(tasks) <= 1:
+                for task in tasks:
+                    _run_chunk(task)
+                return
+            connections.close_all()
+            with multiprocessing.get_context("fork").Pool(workers) as pool:
+                for _ in pool.imap_unordered(_run_chunk, tasks):
+                    pass
+        finally:
+            _active_seeder = None
+
+    def run(self, workers=1, media_root=None, log=print):
+        if connection.vendor == "sqlite" and not connection.in_atomic_block:
+            with connection.cursor() as cursor:
+                cursor.execute("PRAGMA synchronous = OFF")
+        if self.image_ratio and media_root:
+            os.makedirs(os.path.join(media_root, "posts"), exist_ok=True)
+            Image.new("RGB", (1200, 800), "skyblue").save(
+                os.path.join(media_root, IMAGE_NAME)
+            )
+        self.create_users()
+        log(f"Пользователей: {len(self.user_ids)}")
+        self.create_groups()
+        log(f"Групп: {len(self.group_ids)}")
+        last_post_id = Post.objects.order_by("-id").values_list(
+            "id", flat=True
+        ).first() or 0
+        self.run_stage("posts_chunk", self.posts, workers)
+        self.load_post_ids(last_post_id)
+        log(f"Постов: {len(self.post_ids)}")
+        if self.post_ids:
+            self.run_stage("comments_chunk", self.comments, workers)
+            log(f"Комментариев: {self.comments}")
+        self.run_stage("follows_chunk", len(self.user_ids), workers)
+        log("Подписки созданы")
+        bulk_write_finished.send(
+            sender=Seeder, models=(User, Group, Post, Comment, Follow)
+        )
+
+
+_active_seeder = None
+
+
+def _run_chunk(task):
+    method, start, size = task
+    getattr(_active_seeder, method)(start, size)
@@ -0,0 +1,98 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_save, pre_delete, pre_save
+from django.dispatch import Signal, receiver
+from posts import events, negative_cache, projection
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+# Отправляется после массовой записи, которая обходит post_save:
+# получатели пересчитывают производные данные одним проходом.
+bulk_write_finished = Signal(providing_args=["models"])
+
+
+# Поля, от которых зависит проекция постов автора.
+USER_PROJECTION_FIELDS = frozenset(("username", "first_name", "last_name"))
+
+
+@receiver(pre_save, sender=User)
+def user_saving(sender, instance, update_fields=None, **kwargs):
+    # Вход сохраняет last_login: поколение кэша промахов трогать незачем.
+    instance._username_changed = instance.pk is None or (
+        (update_fields is None or "username" in update_fields)
+        and not User.objects.filter(
+            pk=instance.pk, username=instance.username
+        ).exists()
+    )
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created or getattr(instance, "_username_changed", False):
+        negative_cache.forget_missing("user", instance.username)
+    if update_fields and USER_PROJECTION_FIELDS.isdisjoint(update_fields):
+        return
+    values = projection.author_values(instance)
+    Post.objects.filter(author=instance).exclude(**values).update(**values)
+
+
+@receiver(pre_save, sender=Group)
+def group_saving(sender, instance, update_fields=None, **kwargs):
+    # Правка названия или описания не меняет множество slug.
+    instance._slug_changed = instance.pk is None or (
+        (update_fields is None or "slug" in update_fields)
+        and not Group.objects.filter(
+            pk=instance.pk, slug=instance.slug
+        ).exists()
+    )
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, **kwargs):
+    if created or getattr(instance, "_slug_changed", False):
+        negative_cache.forget_missing("group", instance.slug)
+    values = projection.group_values(instance)
+    Post.objects.filter(group=instance).exclude(**values).update(**values)
+
+
+@receiver(pre_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    Post.objects.filter(group=instance).update(
+        **projection.group_values(None)
+    )
+
+
+@receiver(pre_save, sender=Post)
+def post_saving(sender, instance, **kwargs):
+    projection.fill(instance)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    if not instance.detail_path:
+        instance.detail_path = projection.detail_path(instance.pk)
+        Post.objects.filter(pk=instance.pk).update(
+            detail_path=instance.detail_path
+        )
+    if created:
+        negative_cache.forget_missing("post", str(instance.pk))
+        transaction.on_commit(lambda: events.publish_post(instance))
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created and instance.post_id:
+        transaction.on_commit(lambda: events.publish_comment(instance))
+
+
+@receiver(bulk_write_finished)
+def rebuild_negative_cache(sender, models, **kwargs):
+    if {User, Group, Post} & set(models):
+        negative_cache.reset()
+
+
+@receiver(bulk_write_finished)
+def refresh_projection(sender, models, **kwargs):
+    if Post in models:
+        projection.refresh(Post.objects.filter(detail_path=""))
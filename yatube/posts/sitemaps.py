@@ -0,0 +1,170 @@
+"""Индекс sitemap и шарды по диапазонам первичного ключа.
+
+Шард n раздела содержит строки с id из [n * SHARD, (n + 1) * SHARD).
+Id уникальны, поэтому в шарде не больше SITEMAP_SHARD_SIZE адресов.
+Выборка шарда — диапазон по первичному ключу без OFFSET, и его
+стоимость не зависит от номера. Шарды пишутся генератором: в потоке
+или в gz-файлы командой build_sitemaps.
+"""
+import gzip
+import os
+from collections import namedtuple
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import F, Max
+from django.urls import reverse
+from django.utils.encoding import iri_to_uri
+from posts.models import Group, Post
+
+User = get_user_model()
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+XMLNS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+INDEX_CACHE_KEY = "sitemap:index"
+# Наибольший id, который помещается в BIGINT.
+MAX_ID = 2 ** 63 - 1
+
+Section = namedtuple("Section", "model url_name rows lastmod")
+
+
+def _posts(queryset):
+    return queryset.values_list("id", "pub_date")
+
+
+def _profiles(queryset):
+    return queryset.annotate(lastmod=Max("posts__pub_date")).filter(
+        lastmod__isnull=False
+    ).values_list("username", "lastmod")
+
+
+def _groups(queryset):
+    return queryset.annotate(
+        lastmod=Max("posts__pub_date")
+    ).values_list("slug", "lastmod")
+
+
+SECTIONS = {
+    "posts": Section(Post, "posts:post_detail", _posts, "pub_date"),
+    "profiles": Section(User, "posts:profile", _profiles, "posts__pub_date"),
+    "groups": Section(Group, "posts:group_list", _groups, "posts__pub_date"),
+}
+
+
+def shards(section_name):
+    """Номера шардов раздела, где есть строки, и дата изменения."""
+    section = SECTIONS[section_name]
+    size = settings.SITEMAP_SHARD_SIZE
+    return list(
+        section.model.objects.annotate(shard=F("id") / size)
+        .values("shard")
+        .annotate(lastmod=Max(section.lastmod))
+        .order_by("shard")
+        .values_list("shard", "lastmod")
+    )
+
+
+def index_entries():
+    """Список (раздел, шард, lastmod) для индекса, кэшируется."""
+    entries = cache.get(INDEX_CACHE_KEY)
+    if entries is None:
+        entries = [
+            (name, shard, lastmod)
+            for name in SECTIONS
+            for shard, lastmod in shards(name)
+        ]
+        cache.set(INDEX_CACHE_KEY, entries, settings.SITEMAP_CACHE_TIMEOUT)
+    return entries
+
+
+def has_shard(section_name, shard):
+    """Есть ли в шарде строки: по индексу, а шард новее кэша — по базе."""
+    if any(
+        name == section_name and number == shard
+        for name, number, _ in index_entries()
+    ):
+        return True
+    size = settings.SITEMAP_SHARD_SIZE
+    if (shard + 1) * size > MAX_ID:
+        return False
+    return SECTIONS[section_name].model.objects.filter(
+        id__gte=shard * size, id__lt=(shard + 1) * size
+    ).exists()
+
+
+def shard_name(section_name, shard):
+    return f"sitemap-{section_name}-{shard}.xml"
+
+
+def _lastmod(value):
+    return f"<lastmod>{value.date().isoformat()}</lastmod>" if value else ""
+
+
+def index_xml(base_url, entries):
+    yield XML_HEADER.encode()
+    yield f"<sitemapindex {XMLNS}>\n".encode()
+    for section_name, shard, lastmod in entries:
+        location = escape(base_url + shard_name(section_name, shard))
+        yield (
+            f"<sitemap><loc>{location}</loc>{_lastmod(lastmod)}</sitemap>\n"
+        ).encode()
+    yield b"</sitemapindex>\n"
+
+
+def _url_pattern(url_name):
+    """Шаблон пути для str.format: reverse() один раз на шард, а не на URL."""
+    marker = "0" if url_name == "posts:post_detail" else "marker"
+    path = reverse(url_name, args=[marker])
+    head, _, tail = path.rpartition(marker)
+    return head.replace("{", "{{").replace("}", "}}") + "{}" + tail
+
+
+def shard_xml(base_url, section_name, shard):
+    section = SECTIONS[section_name]
+    size = settings.SITEMAP_SHARD_SIZE
+    rows = section.rows(
+        section.model.objects.filter(
+            id__gte=shard * size, id__lt=(shard + 1) * size
+        ).order_by("id")
+    )
+    pattern = escape(base_url.rstrip("/") + _url_pattern(section.url_name))
+    yield XML_HEADER.encode()
+    yield f"<urlset {XMLNS}>\n".encode()
+    for key, lastmod in rows.iterator(settings.EXPORT_CHUNK_SIZE):
+        if not isinstance(key, int):
+            key = escape(iri_to_uri(key))
+        location = pattern.format(key)
+        yield (
+            f"<url><loc>{location}</loc>{_lastmod(lastmod)}</url>\n"
+        ).encode()
+    yield b"</urlset>\n"
+
+
+def build(output_dir, base_url):
+    """Пишет индекс и все шарды в output_dir как .xml.gz.
+
+    Ссылки внутри остаются на .xml: view отдаёт готовый gz с
+    Content-Encoding, если клиент его принимает.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    cache.delete(INDEX_CACHE_KEY)
+    entries = index_entries()
+    for section_name, shard, _ in entries:
+        _write(
+            os.path.join(output_dir, shard_name(section_name, shard) + ".gz"),
+            shard_xml(base_url, section_name, shard),
+        )
+    _write(
+        os.path.join(output_dir, "sitemap.xml.gz"),
+        index_xml(base_url, entries),
+    )
+    return len(entries)
+
+
+def _write(path, chunks):
+    temp_path = path + ".tmp"
+    with gzip.open(temp_path, "wb") as output:
+        output.writelines(chunks)
+    os.replace(temp_path, path)
@@ -0,0 +1,181 @@
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings,
+)
+from django.urls import reverse
+from posts import events
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+def read(response):
+    return b"".join(response.streaming_content).decode()
+
+
+class BrokerTests(TestCase):
+    def test_channels_and_history(self):
+        """Подписчик получает только свои каналы, буфер ограничен."""
+        broker = events.Broker(history=2)
+        first = broker.publish(["posts"], "post", {"id": 1})
+        broker.publish(["group:1"], "post", {"id": 2})
+        broker.publish(["posts"], "post", {"id": 3})
+        self.assertEqual(
+            [event.data["id"] for event in broker.since(0, {"posts"})], [3]
+        )
+        self.assertEqual(broker.since(first.id, {"other"}), [])
+
+    def test_wait_wakes_up(self):
+        """wait() возвращается сразу после публикации."""
+        broker = events.Broker(history=10)
+        timer = threading.Timer(
+            0.05, broker.publish, args=(["posts"], "post", {})
+        )
+        timer.start()
+        start = time.monotonic()
+        received = broker.wait(0, {"posts"}, timeout=5)
+        self.assertEqual(len(received), 1)
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_relay_between_workers(self):
+        """Событие одного воркера доходит до другого через сокет."""
+        relay_dir = tempfile.mkdtemp()
+        first = events.Broker(10, relay_dir, name="first")
+        second = events.Broker(10, relay_dir, name="second")
+        try:
+            first.start_relay()
+            second.start_relay()
+            second.publish(["posts"], "post", {"id": 7})
+            received = first.wait(0, {"posts"}, timeout=2)
+            self.assertEqual(received[0].data, {"id": 7})
+        finally:
+            first.close()
+            second.close()
+            shutil.rmtree(relay_dir, ignore_errors=True)
+
+    def test_late_relay_delivered(self):
+        """Запоздавшее пересланное событие идёт после уже увиденных."""
+        relay_dir = tempfile.mkdtemp()
+        first = events.Broker(10, relay_dir, name="first")
+        second = events.Broker(10, relay_dir, name="second")
+        try:
+            first.start_relay()
+            second.start_relay()
+            seen = first.publish(["posts"], "post", {"id": 1})
+            with self.assertLogs("yatube.events", "WARNING"):
+                second._sender.sendto(b"{", first._path)
+                with mock.patch.object(
+                    events.time, "time_ns", return_value=seen.id - 10
+                ):
+                    second.publish(["posts"], "post", {"id": 2})
+                received = first.wait(seen.id, {"posts"}, timeout=2)
+        finally:
+            first.close()
+            second.close()
+            shutil.rmtree(relay_dir, ignore_errors=True)
+        self.assertEqual([event.data for event in received], [{"id": 2}])
+
+
+@override_settings(SSE_MAX_DURATION=0.05, SSE_HEARTBEAT=0.01)
+class EventViewsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="reader")
+        cls.author = User.objects.create_user(username="author")
+        cls.group = Group.objects.create(
+            title="Группа", slug="group", description="Описание"
+        )
+        cls.post = Post.objects.create(
+            text="Пост", author=cls.author, group=cls.group
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self):
+        self.broker = events.Broker(history=100)
+        patcher = mock.patch.object(events, "BROKER", self.broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_streams(self):
+        """Ленты получают события своих каналов с Last-Event-ID."""
+        events.publish_post(self.post)
+        comment = Comment.objects.create(
+            post=self.post, author=self.user, text="Комментарий"
+        )
+        events.publish_comment(comment)
+        cases = (
+            (reverse("posts:events"), "event: post"),
+            (reverse("posts:group_events", args=["group"]), "event: post"),
+            (reverse("posts:follow_events"), "event: post"),
+            (
+                reverse("posts:comment_events", args=[self.post.pk]),
+                "event: comment",
+            ),
+        )
+        for url, expected in cases:
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_LAST_EVENT_ID="0")
+                self.assertEqual(
+                    response["Content-Type"], "text/event-stream"
+                )
+                body = read(response)
+                self.assertTrue(body.startswith("retry: "))
+                self.assertIn(expected, body)
+
+    def test_resume_skips_seen_events(self):
+        """После Last-Event-ID старые события не повторяются."""
+        seen = self.broker.publish(["posts"], "post", {"id": 1})
+        self.broker.publish(["posts"], "post", {"id": 2})
+        body = read(self.client.get(
+            reverse("posts:events"), HTTP_LAST_EVENT_ID=str(seen.id)
+        ))
+        self.assertNotIn('"id": 1', body)
+        self.assertIn('"id": 2', body)
+
+    def test_heartbeat(self):
+        """Без событий поток шлёт комментарии-heartbeat."""
+        self.assertIn(": ping", read(self.client.get(reverse("posts:events"))))
+
+    def test_connection_limit(self):
+        """Когда слоты заняты, новый поток получает 503."""
+        with mock.patch.object(events, "SLOTS", threading.BoundedSemaphore(1)):
+            events.SLOTS.acquire()
+            response = self.client.get(reverse("posts:events"))
+            self.assertEqual(response.status_code, 503)
+            events.SLOTS.release()
+            read(self.client.get(reverse("posts:events")))
+            self.assertTrue(events.SLOTS.acquire(blocking=False))
+
+    def test_relay_failure_releases_slot(self):
+        """Если ретранслятор не запустился, слот освобождается."""
+        with mock.patch.object(
+            events, "SLOTS", threading.BoundedSemaphore(1)
+        ), mock.patch.object(
+            self.broker, "start_relay", side_effect=OSError("bind")
+        ):
+            with self.assertRaises(OSError):
+                self.client.get(reverse("posts:events"))
+            self.assertTrue(events.SLOTS.acquire(blocking=False))
+
+
+class EventSignalsTests(TransactionTestCase):
+    def test_new_post_and_comment_published(self):
+        """Создание поста и комментария публикует события после коммита."""
+        broker = events.Broker(history=10)
+        author = User.objects.create_user(username="author")
+        with mock.patch.object(events, "BROKER", broker):
+            post = Post.objects.create(text="Пост", author=author)
+            Comment.objects.create(post=post, author=author, text="Ответ")
+        kinds = [
+            event.kind
+            for event in broker.since(0, {"posts", f"comments:{post.pk}"})
+        ]
+        self.assertEqual(kinds, ["post", "comment"])
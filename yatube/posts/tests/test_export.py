@@ -0,0 +1,105 @@
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..exporting import export_rows
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="author")
+        cls.other = User.objects.create_user(username="other")
+        group = Group.objects.create(
+            title="Группа", slug="group", description="Описание"
+        )
+        cls.post = Post.objects.create(
+            text="Пост с картинкой", author=cls.user, group=group,
+            image=SimpleUploadedFile("small.gif", b"GIF89a", "image/gif"),
+        )
+        Post.objects.create(text="Второй пост", author=cls.user)
+        Comment.objects.create(post=cls.post, author=cls.user, text="Мой")
+        Follow.objects.create(user=cls.user, author=cls.other)
+        cls.url = reverse("posts:profile_export", args=[cls.user.username])
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def get(self, file_format):
+        response = self.client.get(self.url, {"format": file_format})
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content)
+
+    def test_rows(self):
+        """Выгрузка содержит посты, комментарии и подписки."""
+        kinds = [row["kind"] for row in export_rows(self.user, chunk_size=1)]
+        self.assertEqual(kinds, ["post", "post", "comment", "follow"])
+
+    def test_ndjson(self):
+        """NDJSON отдаётся потоком по строке на запись."""
+        rows = [json.loads(line) for line in self.get("ndjson").splitlines()]
+        self.assertEqual(rows[0]["text"], "Пост с картинкой")
+        self.assertEqual(rows[-1], {
+            "kind": "follow", "id": rows[-1]["id"], "author": "other",
+        })
+
+    def test_csv(self):
+        """CSV начинается с заголовка и содержит все записи."""
+        content = self.get("csv").decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[2]["post"], str(self.post.pk))
+
+    def test_zip_contains_images(self):
+        """В zip попадают данные и файлы картинок."""
+        archive = zipfile.ZipFile(io.BytesIO(self.get("zip")))
+        self.assertEqual(
+            archive.namelist(), ["data.ndjson", f"media/{self.post.image}"]
+        )
+        self.assertEqual(
+            archive.read(f"media/{self.post.image}"), b"GIF89a"
+        )
+
+    def test_zip_skips_unsafe_image_names(self):
+        """Картинка с путём за пределы MEDIA_ROOT не ломает архив."""
+        Post.objects.create(text="Старый", author=self.user, image="../x.gif")
+        archive = zipfile.ZipFile(io.BytesIO(self.get("zip")))
+        self.assertEqual(
+            archive.namelist(), ["data.ndjson", f"media/{self.post.image}"]
+        )
+
+    def test_other_user_forbidden(self):
+        """Чужие данные выгрузить нельзя."""
+        client = Client()
+        client.force_login(self.other)
+        self.assertEqual(client.get(self.url).status_code, 403)
+
+    def test_command(self):
+        """Команда пишет выгрузку в файл."""
+        path = os.path.join(TEMP_MEDIA_ROOT, "export.ndjson")
+        call_command("export_user", "author", output=path)
+        with open(path) as export_file:
+            self.assertEqual(len(export_file.readlines()), 4)
@@ -0,0 +1,80 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class FeedsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="author")
+        cls.group = Group.objects.create(
+            title="Группа", slug="group", description="Описание"
+        )
+        for number in range(3):
+            Post.objects.create(
+                text=f"Пост {number}", author=cls.author, group=cls.group
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_feeds_render(self):
+        """RSS и Atom отдаются для ленты, группы и автора."""
+        cases = (
+            ("posts:rss", [], "application/rss+xml"),
+            ("posts:atom", [], "application/atom+xml"),
+            ("posts:group_rss", ["group"], "application/rss+xml"),
+            ("posts:group_atom", ["group"], "application/atom+xml"),
+            ("posts:profile_rss", ["author"], "application/rss+xml"),
+            ("posts:profile_atom", ["author"], "application/atom+xml"),
+        )
+        for name, args, content_type in cases:
+            with self.subTest(name=name):
+                response = self.client.get(reverse(name, args=args))
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response["Content-Type"].startswith(
+                    content_type
+                ))
+                self.assertIn("Пост 2", response.content.decode())
+
+    @override_settings(FEEDS_MAX_ITEMS=2)
+    def test_item_cap(self):
+        """Число записей в ленте ограничено."""
+        response = self.client.get(reverse("posts:rss"))
+        self.assertEqual(response.content.count(b"<item>"), 2)
+
+    def test_conditional_get(self):
+        """Опрос без новых постов получает 304, новый пост — 200."""
+        url = reverse("posts:group_atom", args=["group"])
+        response = self.client.get(url)
+        etag, modified = response["ETag"], response["Last-Modified"]
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304
+        )
+        self.assertEqual(
+            self.client.get(
+                url, HTTP_IF_MODIFIED_SINCE=modified
+            ).status_code,
+            304,
+        )
+        Post.objects.create(text="Новый", author=self.author, group=self.group)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Новый", response.content.decode())
+
+    def test_cached_render(self):
+        """Повторный запрос берёт XML из кэша одним запросом к базе."""
+        url = reverse("posts:rss")
+        first = self.client.get(url).content
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url).content, first)
+
+    def test_missing_group(self):
+        """Лента несуществующей группы отвечает 404."""
+        response = self.client.get(reverse("posts:group_rss", args=["none"]))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,168 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.cursor import make_cursor
+from posts.models import Follow, Group, Post
+from posts.paginator import POSTS_AMOUNT
+
+User = get_user_model()
+
+
+class NewerFragmentsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username="reader")
+        cls.author = User.objects.create_user(username="author")
+        cls.stranger = User.objects.create_user(username="stranger")
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.seen = Post.objects.create(text="Старый", author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+        self.since = {"since": make_cursor(self.seen.pub_date, self.seen.pk)}
+
+    def test_nothing_new(self):
+        """Без новых постов ответ пустой, 204, за один запрос."""
+        with self.assertNumQueries(1):
+            response = Client().get(reverse("posts:index_newer"), self.since)
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response.content, b"")
+
+    def test_newer_posts(self):
+        """Отдаются только посты новее курсора, новые сверху."""
+        Post.objects.create(text="Первый новый", author=self.author)
+        Post.objects.create(text="Второй новый", author=self.stranger)
+        response = self.client.get(reverse("posts:index_newer"), self.since)
+        content = response.content.decode()
+        self.assertEqual(response["X-New-Count"], "2")
+        self.assertNotIn("Старый", content)
+        self.assertLess(
+            content.index("Второй новый"), content.index("Первый новый")
+        )
+        self.assertNotIn("<html", content)
+
+    def test_follow_feed(self):
+        """Лента подписок показывает только избранных авторов."""
+        Post.objects.create(text="Подписка", author=self.author)
+        Post.objects.create(text="Чужой", author=self.stranger)
+        content = self.client.get(
+            reverse("posts:follow_newer"), self.since
+        ).content.decode()
+        self.assertIn("Подписка", content)
+        self.assertNotIn("Чужой", content)
+
+    @override_settings(FRAGMENTS_NEWER_LIMIT=2)
+    def test_cap_and_count(self):
+        """Фрагментов не больше лимита, но счётчик — все новые посты."""
+        for number in range(3):
+            Post.objects.create(text=f"Новый {number}", author=self.author)
+        response = self.client.get(reverse("posts:index_newer"), self.since)
+        self.assertEqual(response["X-New-Count"], "3")
+        self.assertEqual(response.content.count(b"<article"), 2)
+
+    def test_bad_cursor(self):
+        """Поддельный курсор отклоняется с 400."""
+        response = self.client.get(
+            reverse("posts:index_newer"), {"since": "bad"}
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class MoreFragmentsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username="reader")
+        cls.author = User.objects.create_user(username="author")
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.group = Group.objects.create(
+            title="Группа", slug="group", description="Описание"
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f"Пост {number}", author=cls.author, group=cls.group
+            )
+            for number in range(POSTS_AMOUNT + 3)
+        ]
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def scroll(self, url):
+        """Прокручивает ленту до конца, возвращает число постов и запросов."""
+        articles, requests, cursor = 0, 0, None
+        while True:
+            query = {"cursor": cursor} if cursor else {}
+            response = self.client.get(url, query)
+            requests += 1
+            if response.status_code == 204:
+                return articles, requests
+            articles += response.content.count(b"<article")
+            cursor = response.get("X-Next-Cursor")
+            if cursor is None:
+                return articles, requests
+
+    def test_feeds_scroll_to_the_end(self):
+        """Курсоры проходят каждую ленту целиком пачками по POSTS_AMOUNT."""
+        urls = (
+            reverse("posts:index_more"),
+            reverse("posts:group_more", args=["group"]),
+            reverse("posts:profile_more", args=["author"]),
+            reverse("posts:follow_more"),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.scroll(url), (len(self.posts), 2))
+
+    def test_fragment_only(self):
+        """Ответ — только фрагменты, без базового шаблона."""
+        response = self.client.get(reverse("posts:index_more"))
+        self.assertTemplateUsed(response, "posts/includes/articles.html")
+        self.assertTemplateNotUsed(response, "base.html")
+
+    def test_page_cursors(self):
+        """Страница ленты несёт курсоры только первой и последней статьи."""
+        pages = (
+            ({}, self.posts[-1], self.posts[-POSTS_AMOUNT]),
+            ({"page": 2}, self.posts[2], self.posts[0]),
+        )
+        for query, first, last in pages:
+            with self.subTest(query=query):
+                content = self.client.get(
+                    reverse("posts:index"), query
+                ).content.decode()
+                self.assertIn(
+                    'data-first-cursor="{}"'.format(
+                        make_cursor(first.pub_date, first.pk)
+                    ),
+                    content,
+                )
+                self.assertIn(
+                    'data-last-cursor="{}"'.format(
+                        make_cursor(last.pub_date, last.pk)
+                    ),
+                    content,
+                )
+                self.assertNotIn("<article data-cursor", content)
+
+    def test_cached_page_skips_feed(self):
+        """При попадании во фрагментный кэш лента и курсоры не читаются."""
+        cache.clear()
+        Client().get(reverse("posts:index"))
+        with CaptureQueriesContext(connection) as queries:
+            response = Client().get(reverse("posts:index"))
+        self.assertContains(response, "data-first-cursor")
+        self.assertEqual(
+            [query["sql"] for query in queries if "COUNT" not in query["sql"]],
+            [],
+        )
+
+    def test_one_query_per_batch(self):
+        """Следующая пачка стоит одного запроса к базе."""
+        cursor = self.client.get(reverse("posts:index_more"))["X-Next-Cursor"]
+        with self.assertNumQueries(1):
+            Client().get(reverse("posts:index_more"), {"cursor": cursor})
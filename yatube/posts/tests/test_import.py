@@ -0,0 +1,147 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from ..importing import (
+    Checkpoint, CommentImporter, PostImporter, read_csv, read_ndjson,
+)
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+def ndjson(*rows):
+    return io.StringIO("".join(json.dumps(row) + "\n" for row in rows))
+
+
+class ImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="author")
+        cls.group = Group.objects.create(
+            title="Группа", slug="group", description="Описание"
+        )
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.checkpoint = Checkpoint(os.path.join(self.temp_dir, "point"))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def run_posts(self, stream, batch_size=2):
+        return PostImporter(batch_size=batch_size, log=lambda line: None).run(
+            read_ndjson(stream), self.checkpoint
+        )
+
+    def test_posts_keep_dates_and_skip_bad_rows(self):
+        """Импорт сохраняет даты и пропускает некорректные строки."""
+        imported, failed = self.run_posts(ndjson(
+            {"text": "Первый", "author": "author", "group": "group",
+             "pub_date": "2020-01-02T03:04:05"},
+            {"text": "Без автора", "author": "nobody"},
+            {"text": "", "author": "author"},
+            {"text": "Второй", "author": "author", "group": "missing"},
+            {"text": "Третий", "author": "author"},
+        ))
+        self.assertEqual((imported, failed), (2, 3))
+        post = Post.objects.get(text="Первый")
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(
+            post.pub_date,
+            timezone.make_aware(datetime(2020, 1, 2, 3, 4, 5), timezone.utc),
+        )
+        self.assertEqual(self.checkpoint.load(), 5)
+
+    def test_resume_skips_written_lines(self):
+        """После сбоя импорт продолжается с контрольной точки."""
+        self.checkpoint.save(2)
+        self.run_posts(ndjson(
+            {"text": "Один", "author": "author"},
+            {"text": "Два", "author": "author"},
+            {"text": "Три", "author": "author"},
+        ))
+        self.assertEqual(
+            list(Post.objects.values_list("text", flat=True)), ["Три"]
+        )
+
+    def test_explicit_ids_are_idempotent(self):
+        """Повторный импорт с явными id не создаёт дублей."""
+        rows = [{"id": 500, "text": "Пост", "author": "author"}]
+        self.run_posts(ndjson(*rows))
+        self.run_posts(ndjson(*rows))
+        self.assertEqual(Post.objects.count(), 1)
+        created = Post.objects.create(text="Новый", author=self.user)
+        self.assertGreater(created.pk, 500)
+
+    def test_comments_from_csv(self):
+        """Комментарии импортируются из CSV только к существующим постам."""
+        post = Post.objects.create(text="Пост", author=self.user)
+        stream = io.StringIO(
+            "post,author,text,created\n"
+            f"{post.pk},author,Комментарий,2021-05-06T07:08:09+00:00\n"
+            f"{post.pk + 1},author,Потерянный,\n"
+        )
+        imported, failed = CommentImporter(log=lambda line: None).run(
+            read_csv(stream), self.checkpoint
+        )
+        self.assertEqual((imported, failed), (1, 1))
+        self.assertEqual(Comment.objects.get().created.year, 2021)
+
+    def test_command(self):
+        """Команда импортирует файл и удаляет контрольную точку."""
+        path = os.path.join(self.temp_dir, "posts.ndjson")
+        with open(path, "w") as posts_file:
+            posts_file.write(ndjson(
+                {"text": "Из файла", "author": "author"}
+            ).getvalue())
+        call_command("import_posts", path, stdout=io.StringIO())
+        self.assertTrue(Post.objects.filter(text="Из файла").exists())
+        self.assertFalse(os.path.exists(f"{path}.checkpoint"))
+
+    def test_malformed_rows_rejected(self):
+        """Строки с неверными типами и путями пропускаются по одной."""
+        post = Post.objects.create(text="Пост", author=self.user)
+        stream = io.StringIO(
+            json.dumps(["x"]) + "\n"
+            + json.dumps({"text": "Путь", "author": "author",
+                          "image": "../x.gif"}) + "\n"
+            + json.dumps({"text": "Логин", "author": ["author"]}) + "\n"
+            + json.dumps({"text": "Id", "author": "author", "id": "x"})
+            + "\n"
+            + json.dumps({"text": "Хороший", "author": "author",
+                          "image": "posts/x.gif"}) + "\n"
+        )
+        imported, failed = self.run_posts(stream)
+        self.assertEqual((imported, failed), (1, 4))
+        self.assertEqual(Post.objects.get(text="Хороший").image, "posts/x.gif")
+        comments = io.StringIO(
+            "post,author,text\n"
+            "abc,author,Плохой\n"
+            f"{post.pk},author,Хороший\n"
+        )
+        imported, failed = CommentImporter(log=lambda line: None).run(
+            read_csv(comments), Checkpoint(None)
+        )
+        self.assertEqual((imported, failed), (1, 1))
+
+    def test_conflicting_ids_not_counted(self):
+        """Строки с уже занятыми id не попадают в число записанных."""
+        rows = [
+            {"id": 500, "text": "Пост", "author": "author"},
+            {"id": 501, "text": "Второй", "author": "author"},
+        ]
+        self.assertEqual(self.run_posts(ndjson(*rows)), (2, 0))
+        importer = PostImporter(log=lambda line: None)
+        rows.append({"text": "Новый", "author": "author"})
+        self.assertEqual(
+            importer.run(read_ndjson(ndjson(*rows)), Checkpoint(None)), (1, 0)
+        )
@@ -0,0 +1,126 @@
+import re
+import shutil
+import tempfile
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template import engines
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from core.templating import warm
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+SMALL_GIF = (
+    b"\x47\x49\x46\x38\x39\x61\x02\x00"
+    b"\x01\x00\x80\x00\x00\x00\x00\x00"
+    b"\xFF\xFF\xFF\x21\xF9\x04\x00\x00"
+    b"\x00\x00\x00\x2C\x00\x00\x00\x00"
+    b"\x02\x00\x01\x00\x00\x02\x02\x0C"
+    b"\x0A\x00\x3B"
+)
+
+
+def has_jinja2():
+    return "jinja2" in {engine.name for engine in engines.all()}
+
+
+def normalize(html):
+    """HTML без различий в пробелах и без курсоров.
+
+    Подпись курсора содержит время, и два рендера могут её не совпасть.
+    """
+    html = re.sub(r'data-(first|last)-cursor="[^"]*"', "data-cursor", html)
+    return re.sub(r">\s+", ">", re.sub(r"\s+<", "<", " ".join(html.split())))
+
+
+@skipUnless(has_jinja2(), "Jinja2 не установлен")
+class JinjaFeedTemplatesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        cls.media = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.media.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username="reader")
+        cls.author = User.objects.create_user(
+            username="author", first_name="Лев", last_name="Толстой"
+        )
+        cls.group = Group.objects.create(
+            title="Группа", slug="group", description="Описание <b>"
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for number in range(12):
+            Post.objects.create(
+                text=f"Пост {number} <script>", author=cls.author,
+                group=cls.group if number % 2 else None,
+            )
+        Post.objects.create(
+            text="С картинкой", author=cls.author, group=cls.group,
+            image=SimpleUploadedFile("small.gif", SMALL_GIF, "image/gif"),
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def render(self, engine, url, query=None):
+        cache.clear()
+        with override_settings(FEED_TEMPLATE_ENGINE=engine):
+            response = self.client.get(url, query)
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_same_html(self):
+        """Порты Jinja2 выдают тот же HTML, что и шаблоны Django."""
+        urls = (
+            (reverse("posts:index"), None),
+            (reverse("posts:index"), {"page": 2}),
+            (reverse("posts:group_list", args=[self.group.slug]), None),
+            (reverse("posts:profile", args=[self.author.username]), None),
+            (reverse("posts:follow_index"), None),
+            (reverse("posts:index_more"), None),
+        )
+        for url, query in urls:
+            with self.subTest(url=url, query=query):
+                django_html = self.render("django", url, query)
+                jinja_html = self.render("jinja2", url, query)
+                self.assertIn("<article", jinja_html)
+                self.assertEqual(
+                    normalize(jinja_html), normalize(django_html)
+                )
+
+    def test_escaping_and_thumbnail(self):
+        """Текст экранируется, картинка выводится миниатюрой."""
+        html = self.render("jinja2", reverse("posts:index"))
+        self.assertIn("&lt;script&gt;", html)
+        self.assertNotIn("<script>", html)
+        self.assertIn('<img class="card-img my-2" src="/media/cache/', html)
+
+    def test_fragment_cache_key(self):
+        """Тег cache в Jinja2 кладёт фрагмент под ключ тега Django."""
+        self.render("jinja2", reverse("posts:index"))
+        key = make_template_fragment_key("index_page", ["<Page 1 of 2>"])
+        self.assertIn("С картинкой", cache.get(key))
+
+    def test_warm(self):
+        """Все порты Jinja2 компилируются при прогреве."""
+        results = dict(warm(engines["jinja2"]))
+        self.assertIn("posts/index.html", results)
+        self.assertFalse(
+            [name for name, seconds in results.items()
+             if isinstance(seconds, Exception)]
+        )
@@ -0,0 +1,29 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from core import jobs
+from core.models import Job
+from posts import jobs as post_jobs
+from posts.models import Post
+
+User = get_user_model()
+
+
+class ThumbnailJobTests(TestCase):
+    def test_thumbnails(self):
+        """Миниатюры готовятся только для поста с картинкой."""
+        author = User.objects.create_user(username="author")
+        post = Post.objects.create(
+            text="Пост", author=author, image="posts/small.gif"
+        )
+        plain = Post.objects.create(text="Без картинки", author=author)
+        jobs.enqueue("posts.thumbnails", {"post_id": post.pk})
+        jobs.enqueue("posts.thumbnails", {"post_id": plain.pk})
+        with mock.patch.object(post_jobs, "get_thumbnail") as thumbnail:
+            self.assertEqual(jobs.run_pending(), 2)
+        thumbnail.assert_called_once_with(
+            post.image, "960x339", crop="center", upscale=True
+        )
+        self.assertFalse(Job.objects.exists())
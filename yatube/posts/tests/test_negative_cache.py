@@ -0,0 +1,128 @@
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import negative_cache
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class NegativeCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username="test_user")
+
+    def setUp(self):
+        cache.clear()
+        negative_cache.reset()
+        self.guest_client = Client()
+
+    def test_missing_group_cached_without_query(self):
+        """Повторный запрос несуществующей группы не идёт в базу."""
+        url = reverse("posts:group_list", kwargs={"slug": "missing"})
+        response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_creation_invalidates_cache(self):
+        """Созданные группа, автор и пост снова доступны."""
+        urls = {
+            reverse("posts:group_list", kwargs={"slug": "new-slug"}): (
+                lambda: Group.objects.create(title="Группа", slug="new-slug")
+            ),
+            reverse("posts:profile", kwargs={"username": "new_user"}): (
+                lambda: User.objects.create(username="new_user")
+            ),
+        }
+        for url, create in urls.items():
+            with self.subTest(url=url):
+                self.guest_client.get(url)
+                create()
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_new_post_id_invalidates_cache(self):
+        """Пост с ранее запрошенным id открывается после создания."""
+        post_id = Post.objects.count() + 1000
+        url = reverse("posts:post_detail", kwargs={"post_id": post_id})
+        self.guest_client.get(url)
+        Post.objects.create(id=post_id, author=self.user, text="Пост")
+        response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    @override_settings(NEGATIVE_CACHE_BLOOM=True)
+    def test_bloom_filter_short_circuits(self):
+        """Фильтр Блума отсекает неизвестные ключи без запроса к базе."""
+        url = reverse("posts:profile", kwargs={"username": "nobody"})
+        self.guest_client.get(reverse(
+            "posts:profile", kwargs={"username": self.user.username}
+        ))
+        cache.delete(negative_cache._cache_key("user", "nobody"))
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        User.objects.create(username="nobody")
+        response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_login_keeps_generation(self):
+        """Вход и сохранение без смены логина не сбрасывают фильтры."""
+        user = User.objects.create(username="old_name")
+        with mock.patch.object(negative_cache, "forget_missing") as forget:
+            Client().force_login(user)
+            user.first_name = "Имя"
+            user.save()
+            forget.assert_not_called()
+            user.username = "renamed_user"
+            user.save()
+        forget.assert_called_once_with("user", "renamed_user")
+
+    def test_group_edit_keeps_generation(self):
+        """Правка группы без смены slug не сбрасывает фильтры."""
+        group = Group.objects.create(title="Группа", slug="old-slug")
+        with mock.patch.object(negative_cache, "forget_missing") as forget:
+            group.description = "Описание"
+            group.save()
+            forget.assert_not_called()
+            group.slug = "new-slug"
+            group.save()
+        forget.assert_called_once_with("group", "new-slug")
+
+    @override_settings(NEGATIVE_CACHE_BLOOM=True)
+    def test_filter_built_once_under_lock(self):
+        """Поток, дождавшийся блокировки, берёт уже перестроенный фильтр."""
+        built = negative_cache.BloomFilter(1)
+        lock = mock.MagicMock()
+        # Пока поток ждал блокировку, фильтр перестроил соседний.
+        lock.__enter__.side_effect = lambda: negative_cache._filters.update(
+            group=(
+                built,
+                negative_cache._generation("group"),
+                negative_cache.time.monotonic(),
+            )
+        )
+        with mock.patch.object(
+            negative_cache, "_filters_lock", lock
+        ), mock.patch.object(negative_cache, "_build_filter") as build:
+            self.assertIs(negative_cache._get_filter("group"), built)
+        build.assert_not_called()
+
+    def test_namespace_read_once(self):
+        """Пространство имён ключей не читается из кэша на каждый поиск."""
+        negative_cache.is_missing("group", "missing")
+        with mock.patch.object(
+            negative_cache, "cache", wraps=cache
+        ) as shared_cache:
+            negative_cache.is_missing("group", "missing")
+        self.assertNotIn(
+            mock.call(negative_cache.NAMESPACE_KEY, 0),
+            shared_cache.get.call_args_list,
+        )
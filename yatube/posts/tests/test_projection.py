@@ -0,0 +1,159 @@
+from importlib import import_module
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts import projection
+from posts.models import Group, Post
+from posts.paginator import paginator
+from posts.signals import bulk_write_finished
+
+User = get_user_model()
+
+
+class ProjectionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username="author", first_name="Лев", last_name="Толстой"
+        )
+        cls.group = Group.objects.create(
+            title="Группа", slug="group", description="Описание"
+        )
+        cls.post = Post.objects.create(
+            text="Пост", author=cls.author, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def projection_of(self, post):
+        return Post.objects.values(*projection.FIELDS).get(pk=post.pk)
+
+    def test_filled_on_create(self):
+        """Новый пост сразу получает имя автора, группу и пути."""
+        self.assertEqual(self.projection_of(self.post), {
+            "author_username": "author",
+            "author_name": "Лев Толстой",
+            "group_slug": "group",
+            "group_title": "Группа",
+            "profile_path": reverse("posts:profile", args=["author"]),
+            "detail_path": reverse(
+                "posts:post_detail", args=[self.post.pk]
+            ),
+            "group_path": reverse("posts:group_list", args=["group"]),
+        })
+
+    def test_backfill_matches_runtime(self):
+        """Миграция заполняет проекцию так же, как сигналы при сохранении."""
+        author = User.objects.create_user(username="лев+tolstoy@ya.ru")
+        group = Group.objects.create(title="Группа", slug="group-2")
+        post = Post.objects.create(text="Пост", author=author, group=group)
+        saved = self.projection_of(post)
+        Post.objects.update(**dict.fromkeys(projection.FIELDS, ""))
+        migration = import_module("posts.migrations.0012_post_projection")
+        migration.fill_projection(apps, None)
+        self.assertEqual(self.projection_of(post), saved)
+        self.assertIn("%", saved["profile_path"])
+
+    def test_author_and_group_renamed(self):
+        """Переименование автора и группы обновляет их посты."""
+        self.author.username = "writer"
+        self.author.save()
+        self.group.title = "Новая группа"
+        self.group.save()
+        values = self.projection_of(self.post)
+        self.assertEqual(values["author_username"], "writer")
+        self.assertEqual(
+            values["profile_path"], reverse("posts:profile", args=["writer"])
+        )
+        self.assertEqual(values["group_title"], "Новая группа")
+
+    def test_group_deleted(self):
+        """Удаление группы очищает её поля в проекции."""
+        group = Group.objects.create(title="Временная", slug="temp")
+        post = Post.objects.create(
+            text="Пост", author=self.author, group=group
+        )
+        group.delete()
+        values = self.projection_of(post)
+        self.assertEqual(
+            [values[field] for field in projection.GROUP_FIELDS], ["", "", ""]
+        )
+
+    def test_refreshed_after_bulk_write(self):
+        """Строки массовой записи без проекции заполняются по сигналу."""
+        Post.objects.filter(pk=self.post.pk).update(
+            **dict.fromkeys(projection.FIELDS, "")
+        )
+        bulk_write_finished.send(sender=ProjectionTests, models=(Post,))
+        self.assertEqual(
+            self.projection_of(self.post)["author_name"], "Лев Толстой"
+        )
+
+    def test_feeds_without_joins(self):
+        """Ленты и фрагменты читают посты без join на авторов и группы."""
+        urls = (
+            reverse("posts:index"),
+            reverse("posts:group_list", args=["group"]),
+            reverse("posts:profile", args=["author"]),
+            reverse("posts:index_more"),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                cache.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                self.assertContains(response, "Лев Толстой")
+                joins = [
+                    query["sql"] for query in queries
+                    if 'JOIN "auth_user"' in query["sql"]
+                    or 'JOIN "posts_group"' in query["sql"]
+                ]
+                self.assertEqual(joins, [])
+
+
+class FeedPostTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username="author", first_name="Лев", last_name="Толстой"
+        )
+        cls.group = Group.objects.create(title="Группа", slug="group")
+        cls.post = Post.objects.create(
+            text="Пост", author=cls.author, group=cls.group,
+            image="posts/small.gif",
+        )
+        Post.objects.create(text="Без группы", author=cls.author)
+
+    def test_slotted(self):
+        """FeedPost хранит колонки в __slots__, без __dict__."""
+        feed_post = projection.load(Post.objects.filter(pk=self.post.pk))[0]
+        self.assertFalse(hasattr(feed_post, "__dict__"))
+        self.assertEqual(feed_post.author_name, "Лев Толстой")
+        self.assertEqual(feed_post.image, self.post.image)
+
+    def test_model_compatible(self):
+        """FeedPost равен посту с тем же id, автор и группа без запросов."""
+        feed_post = projection.load(Post.objects.filter(pk=self.post.pk))[0]
+        with self.assertNumQueries(0):
+            self.assertEqual(feed_post, self.post)
+            self.assertEqual(feed_post.author, self.author)
+            self.assertEqual(feed_post.group.id, self.group.id)
+        ungrouped = projection.load(Post.objects.filter(group=None))[0]
+        self.assertIsNone(ungrouped.group)
+
+    def test_paginator(self):
+        """Страница ленты собирается из FeedPost двумя запросами."""
+        request = RequestFactory().get("/", {"page": 1})
+        with self.assertNumQueries(2):
+            page_obj = paginator(request, Post.objects.all())
+            posts = list(page_obj)
+        self.assertEqual(len(posts), 2)
+        self.assertIsInstance(posts[0], projection.FeedPost)
+        self.assertIn(self.post, page_obj)
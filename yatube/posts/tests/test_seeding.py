@@ -0,0 +1,44 @@
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.test import TestCase
+
+from ..models import Comment, Follow, Group, Post
+from ..seeding import Seeder
+
+User = get_user_model()
+
+
+class SeederTests(TestCase):
+    def seed(self):
+        Seeder(
+            users=30, groups=5, posts=300, comments=100, follows=60,
+            seed=42, chunk_size=70,
+        ).run(log=lambda message: None)
+        return list(
+            Post.objects.order_by("id").values_list(
+                "author__username", "group__slug", "text"
+            )
+        )
+
+    def test_counts(self):
+        """Генератор создаёт заданное число строк."""
+        self.seed()
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Group.objects.count(), 5)
+        self.assertEqual(Post.objects.count(), 300)
+        self.assertEqual(Comment.objects.count(), 100)
+        self.assertFalse(Follow.objects.filter(user=F("author")).exists())
+
+    def test_deterministic(self):
+        """Одинаковый seed даёт одинаковые данные."""
+        first = self.seed()
+        for model in (Follow, Comment, Post, Group, User):
+            model.objects.all().delete()
+        self.assertEqual(first, self.seed())
+
+    def test_hot_authors(self):
+        """Первые авторы пишут больше остальных."""
+        self.seed()
+        hot = Post.objects.filter(author__username="seed0").count()
+        cold = Post.objects.filter(author__username="seed29").count()
+        self.assertGreater(hot, cold)
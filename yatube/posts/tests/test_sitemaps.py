@@ -0,0 +1,128 @@
+import gzip
+import io
+import re
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Group, Post
+
+User = get_user_model()
+
+TEMP_SITEMAP_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(SITEMAP_SHARD_SIZE=2, SITEMAP_ROOT=TEMP_SITEMAP_ROOT)
+class SitemapTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="author")
+        User.objects.create_user(username="silent")
+        cls.group = Group.objects.create(
+            title="Группа", slug="group", description="Описание"
+        )
+        cls.posts = [
+            Post.objects.create(
+                text="Пост", author=cls.author, group=cls.group
+            )
+            for _ in range(5)
+        ]
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_SITEMAP_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode()
+
+    def locations(self, url):
+        return re.findall(r"<loc>http://testserver(.*?)</loc>", self.get(url))
+
+    def test_shards_cover_all_posts(self):
+        """Шарды индекса вместе содержат каждый пост ровно один раз."""
+        shards = [
+            path for path in self.locations(reverse("posts:sitemap"))
+            if "-posts-" in path
+        ]
+        self.assertEqual(
+            len(shards), len({post.pk // 2 for post in self.posts})
+        )
+        urls = [url for shard in shards for url in self.locations(shard)]
+        self.assertEqual(
+            sorted(urls),
+            sorted(
+                reverse("posts:post_detail", args=[post.pk])
+                for post in self.posts
+            ),
+        )
+
+    def test_profiles_and_groups(self):
+        """Профили без постов в sitemap не попадают."""
+        urls = []
+        for path in self.locations(reverse("posts:sitemap")):
+            if "-posts-" not in path:
+                urls += self.locations(path)
+        self.assertCountEqual(urls, ["/profile/author/", "/group/group/"])
+
+    def test_lastmod(self):
+        """lastmod берётся из pub_date."""
+        shard = reverse(
+            "posts:sitemap_section",
+            args=["posts", self.posts[0].pk // 2],
+        )
+        self.assertIn(
+            f"<lastmod>{self.posts[0].pub_date.date()}</lastmod>",
+            self.get(shard),
+        )
+
+    def test_unknown_section(self):
+        """Неизвестный раздел отвечает 404."""
+        response = self.client.get(
+            reverse("posts:sitemap_section", args=["comments", 0])
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_missing_shard(self):
+        """Шард без строк и шард за пределами id отвечают 404."""
+        for shard in (1000, 10 ** 30):
+            with self.subTest(shard=shard):
+                response = self.client.get(
+                    reverse("posts:sitemap_section", args=["posts", shard])
+                )
+                self.assertEqual(response.status_code, 404)
+
+    def test_shard_newer_than_index(self):
+        """Шард, появившийся после кэширования индекса, отдаётся."""
+        self.client.get(reverse("posts:sitemap"))
+        post = Post.objects.create(text="Новый", author=self.author, id=100)
+        self.assertIn(
+            reverse("posts:post_detail", args=[post.pk]),
+            self.locations(
+                reverse("posts:sitemap_section", args=["posts", 50])
+            ),
+        )
+
+    def test_prebuilt(self):
+        """Собранные командой файлы отдаются сжатыми."""
+        call_command(
+            "build_sitemaps", base_url="https://example.com",
+            stdout=io.StringIO(),
+        )
+        response = self.client.get(
+            reverse("posts:sitemap"), HTTP_ACCEPT_ENCODING="gzip"
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        content = gzip.decompress(b"".join(response.streaming_content))
+        self.assertIn(b"https://example.com/sitemap-posts-", content)
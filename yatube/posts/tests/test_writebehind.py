@@ -0,0 +1,146 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts import writebehind
+from posts.models import Comment, Follow, Post
+
+User = get_user_model()
+
+
+class WriteBehindTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.queue_dir = tempfile.mkdtemp()
+        cls.settings = override_settings(
+            WRITE_BEHIND_ENABLED=True,
+            WRITE_BEHIND_PATH=os.path.join(cls.queue_dir, "queue.sqlite3"),
+            WRITE_BEHIND_INTERVAL=0,
+        )
+        cls.settings.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings.disable()
+        shutil.rmtree(cls.queue_dir, ignore_errors=True)
+        super().tearDownClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="user")
+        cls.author = User.objects.create_user(username="author")
+        cls.post = Post.objects.create(text="Пост", author=cls.author)
+
+    def setUp(self):
+        writebehind.queue().remove(2 ** 62)
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def comment(self, text="Комментарий"):
+        return self.client.post(
+            reverse("posts:add_comment", args=[self.post.pk]), {"text": text}
+        )
+
+    def detail_comments(self, client):
+        response = client.get(
+            reverse("posts:post_detail", args=[self.post.pk])
+        )
+        return [comment.text for comment in response.context["comments"]]
+
+    def test_comment_read_your_writes(self):
+        """Комментарий из очереди видит только его автор."""
+        self.assertRedirects(
+            self.comment(), reverse("posts:post_detail", args=[self.post.pk])
+        )
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(self.detail_comments(self.client), ["Комментарий"])
+        other = Client()
+        other.force_login(self.author)
+        self.assertEqual(self.detail_comments(other), [])
+
+    def test_flush_comments(self):
+        """Слив пишет комментарии пачкой с временем постановки в очередь."""
+        self.comment("Первый")
+        self.comment("Второй")
+        created = self.detail_comments(self.client)
+        with self.assertNumQueries(6):
+            self.assertEqual(writebehind.flush(), 2)
+        self.assertEqual(len(writebehind.queue()), 0)
+        self.assertEqual(
+            list(Comment.objects.values_list("text", flat=True)), created
+        )
+        self.assertEqual(self.detail_comments(self.client), created)
+
+    def test_follow_overlay_and_order(self):
+        """Подписка видна сразу, а подписка с отпиской дают итог отписки."""
+        follow = reverse("posts:profile_follow", args=["author"])
+        unfollow = reverse("posts:profile_unfollow", args=["author"])
+        self.client.get(follow)
+        response = self.client.get(reverse("posts:follow_index"))
+        self.assertIn(self.post, response.context["page_obj"])
+        writebehind.flush()
+        self.assertTrue(
+            Follow.objects.filter(user=self.user, author=self.author).exists()
+        )
+        self.client.get(unfollow)
+        self.client.get(follow)
+        self.client.get(unfollow)
+        response = self.client.get(reverse("posts:follow_index"))
+        self.assertNotIn(self.post, response.context["page_obj"])
+        writebehind.flush()
+        self.assertFalse(Follow.objects.exists())
+
+    def test_replay_after_crash(self):
+        """Пачка, не удалённая из очереди после коммита, не дублируется."""
+        self.comment("Первый")
+        rows = writebehind.queue().head(10)
+        writebehind.apply(rows)
+        self.comment("Второй")
+        self.assertEqual(writebehind.flush(), 2)
+        self.assertEqual(
+            sorted(Comment.objects.values_list("text", flat=True)),
+            ["Второй", "Первый"],
+        )
+
+    def test_model_field_untouched(self):
+        """Слив не отключает auto_now_add у поля модели."""
+        field = Comment._meta.get_field("created")
+        self.comment()
+        with mock.patch.object(
+            writebehind, "write_follows",
+            side_effect=lambda follows: self.assertTrue(field.auto_now_add),
+        ):
+            self.assertEqual(writebehind.flush(), 1)
+        self.assertTrue(field.auto_now_add)
+
+    def test_deleted_post_dropped(self):
+        """Комментарий к посту, удалённому до слива, отбрасывается."""
+        post = Post.objects.create(text="Удалят", author=self.author)
+        self.client.post(
+            reverse("posts:add_comment", args=[post.pk]), {"text": "Текст"}
+        )
+        post.delete()
+        self.assertEqual(writebehind.flush(), 1)
+        self.assertFalse(Comment.objects.exists())
+
+    def test_single_flusher(self):
+        """Пока очередь сливает другой процесс, flush ничего не делает."""
+        self.comment()
+        with writebehind.flush_lock() as acquired:
+            self.assertTrue(acquired)
+            with writebehind.flush_lock() as second:
+                self.assertFalse(second)
+            self.assertEqual(writebehind.flush(), 0)
+        self.assertEqual(len(writebehind.queue()), 1)
+
+    @override_settings(WRITE_BEHIND_ENABLED=False)
+    def test_disabled(self):
+        """Без WRITE_BEHIND_ENABLED комментарий пишется сразу."""
+        self.comment()
+        self.assertTrue(Comment.objects.exists())
+        self.assertEqual(len(writebehind.queue()), 0)
@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views
+from . import feeds, views
 
 app_name = "posts"
 
@@ -25,4 +25,65 @@ urlpatterns = [
         views.profile_unfollow,
         name="profile_unfollow",
     ),
+    path("fragments/newer/", views.index_newer, name="index_newer"),
+    path(
+        "fragments/follow/newer/", views.follow_newer, name="follow_newer"
+    ),
+    path("fragments/more/", views.index_more, name="index_more"),
+    path(
+        "fragments/group/<slug:slug>/more/",
+        views.group_more,
+        name="group_more",
+    ),
+    path(
+        "fragments/profile/<str:username>/more/",
+        views.profile_more,
+        name="profile_more",
+    ),
+    path("fragments/follow/more/", views.follow_more, name="follow_more"),
+    path("events/", views.post_events, name="events"),
+    path(
+        "events/group/<slug:slug>/", views.group_events, name="group_events"
+    ),
+    path("events/follow/", views.follow_events, name="follow_events"),
+    path(
+        "events/posts/<int:post_id>/comments/",
+        views.comment_events,
+        name="comment_events",
+    ),
+    path("sitemap.xml", views.sitemap_index, name="sitemap"),
+    path(
+        "sitemap-<slug:section>-<int:shard>.xml",
+        views.sitemap_section,
+        name="sitemap_section",
+    ),
+    path("feeds/rss/", feeds.cached_feed(feeds.PostsFeed), name="rss"),
+    path(
+        "feeds/atom/", feeds.cached_feed(feeds.PostsAtomFeed), name="atom"
+    ),
+    path(
+        "group/<slug:slug>/rss/",
+        feeds.cached_feed(feeds.GroupFeed),
+        name="group_rss",
+    ),
+    path(
+        "group/<slug:slug>/atom/",
+        feeds.cached_feed(feeds.GroupAtomFeed),
+        name="group_atom",
+    ),
+    path(
+        "profile/<str:username>/rss/",
+        feeds.cached_feed(feeds.AuthorFeed),
+        name="profile_rss",
+    ),
+    path(
+        "profile/<str:username>/atom/",
+        feeds.cached_feed(feeds.AuthorAtomFeed),
+        name="profile_atom",
+    ),
+    path(
+        "profile/<str:username>/export/",
+        views.profile_export,
+        name="profile_export",
+    ),
 ]
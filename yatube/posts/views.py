@@ -1,9 +1,26 @@
+import os
+import posixpath
+
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
+from django.core.exceptions import PermissionDenied
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseBadRequest,
+    StreamingHttpResponse,
+)
 from django.shortcuts import get_object_or_404, redirect, render
+from core import jobs, media
+from core.ratelimit import ratelimit
+from posts import events, exporting, projection, sitemaps, writebehind
+from posts.cursor import (
+    FEED_ORDER, CursorError, cursor_page, make_cursor, newer_than,
+    read_cursor,
+)
 from posts.forms import CommentForm, PostForm
-from posts.models import Comment, Follow, Group, Post
-from posts.paginator import paginator
+from posts.models import Comment, Follow, Post
+from posts.negative_cache import lookup_or_404
+from posts.paginator import POSTS_AMOUNT, paginator
 
 
 def index(request):
@@ -11,21 +28,27 @@ def index(request):
     context = {
         "page_obj": paginator(request, post_list),
     }
-    return render(request, "posts/index.html", context)
+    return render(
+        request, "posts/index.html", context,
+        using=settings.FEED_TEMPLATE_ENGINE,
+    )
 
 
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
+    group = lookup_or_404("group", slug)
     post_list = group.posts.all()
     context = {
         "group": group,
         "page_obj": paginator(request, post_list),
     }
-    return render(request, "posts/group_list.html", context)
+    return render(
+        request, "posts/group_list.html", context,
+        using=settings.FEED_TEMPLATE_ENGINE,
+    )
 
 
 def profile(request, username):
-    user = get_object_or_404(User, username=username)
+    user = lookup_or_404("user", username)
     post_list = user.posts.all()
     following = user.following.exists()
     context = {
@@ -33,13 +56,18 @@ def profile(request, username):
         "page_obj": paginator(request, post_list),
         "following": following,
     }
-    return render(request, "posts/profile.html", context)
+    return render(
+        request, "posts/profile.html", context,
+        using=settings.FEED_TEMPLATE_ENGINE,
+    )
 
 
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = lookup_or_404("post", post_id)
     form = CommentForm(request.POST or None)
-    comments = Comment.objects.filter(post=post)
+    comments = writebehind.pending_comments(
+        Comment.objects.filter(post=post), post, request.user
+    )
     context = {
         "post": post,
         "form": form,
@@ -49,6 +77,7 @@ def post_detail(request, post_id):
 
 
 @login_required
+@ratelimit("post_create")
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
     context = {"form": form}
@@ -59,6 +88,8 @@ def post_create(request):
     post = form.save(commit=False)
     post.author = request.user
     post.save()
+    if post.image:
+        jobs.enqueue("posts.thumbnails", {"post_id": post.pk})
     return redirect("posts:profile", post.author)
 
 
@@ -79,10 +110,13 @@ def post_edit(request, post_id):
         }
         return render(request, template, context)
     form.save()
+    if "image" in form.changed_data and post.image:
+        jobs.enqueue("posts.thumbnails", {"post_id": post.pk})
     return redirect("posts:post_detail", post.pk)
 
 
 @login_required
+@ratelimit("add_comment")
 def add_comment(request, post_id):
     form = CommentForm(request.POST or None)
     post = get_object_or_404(Post, pk=post_id)
@@ -90,33 +124,242 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        if settings.WRITE_BEHIND_ENABLED:
+            writebehind.enqueue_comment(comment)
+        else:
+            comment.save()
     return redirect("posts:post_detail", post_id=post_id)
 
 
+def _followed_authors(user):
+    """Авторы, на которых подписан user, с подписками из очереди записи."""
+    return writebehind.followed_authors(
+        Follow.objects.filter(user=user).values_list("author_id", flat=True),
+        user,
+    )
+
+
 @login_required
 def follow_index(request):
-    follower = Follow.objects.filter(user=request.user).values_list(
-        "author_id", flat=True
-    )
+    follower = _followed_authors(request.user)
     posts_list = Post.objects.filter(author_id__in=follower)
     context = {
         "page_obj": paginator(request, posts_list),
         "title": "Избранные посты",
     }
-    return render(request, "posts/follow.html", context)
+    return render(
+        request, "posts/follow.html", context,
+        using=settings.FEED_TEMPLATE_ENGINE,
+    )
 
 
 @login_required
+@ratelimit("follow")
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
+    author = lookup_or_404("user", username)
     if author != request.user:
-        Follow.objects.get_or_create(user=request.user, author=author)
+        if settings.WRITE_BEHIND_ENABLED:
+            writebehind.enqueue_follow(request.user, author)
+        else:
+            Follow.objects.get_or_create(user=request.user, author=author)
     return redirect("posts:follow_index")
 
 
 @login_required
+@ratelimit("follow")
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
-    Follow.objects.get(user=request.user, author=author).delete()
+    if settings.WRITE_BEHIND_ENABLED:
+        writebehind.enqueue_follow(request.user, author, follow=False)
+    else:
+        Follow.objects.get(user=request.user, author=author).delete()
     return redirect("posts:follow_index")
+
+
+@login_required
+def profile_export(request, username):
+    """Потоковая выгрузка данных пользователя: ndjson, csv или zip."""
+    user = lookup_or_404("user", username)
+    if request.user != user and not request.user.is_staff:
+        raise PermissionDenied
+    file_format = request.GET.get("format", "ndjson")
+    if file_format not in exporting.FORMATS:
+        file_format = "ndjson"
+    content_type, extension = exporting.FORMATS[file_format]
+    response = StreamingHttpResponse(
+        exporting.export_stream(user, file_format), content_type=content_type
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="{user.username}.{extension}"'
+    )
+    return response
+
+
+def _prebuilt_sitemap(request, name):
+    """Готовый gz из SITEMAP_ROOT, если клиент принимает gzip."""
+    path = os.path.join(settings.SITEMAP_ROOT, name + ".gz")
+    accepts = request.META.get("HTTP_ACCEPT_ENCODING", "")
+    if "gzip" not in accepts or not os.path.exists(path):
+        return None
+    response = FileResponse(open(path, "rb"), content_type="application/xml")
+    response["Content-Encoding"] = "gzip"
+    response["Vary"] = "Accept-Encoding"
+    return response
+
+
+def sitemap_index(request):
+    response = _prebuilt_sitemap(request, "sitemap.xml")
+    if response is None:
+        response = StreamingHttpResponse(
+            sitemaps.index_xml(
+                request.build_absolute_uri("/"), sitemaps.index_entries()
+            ),
+            content_type="application/xml",
+        )
+    return response
+
+
+def sitemap_section(request, section, shard):
+    if section not in sitemaps.SECTIONS or not sitemaps.has_shard(
+        section, shard
+    ):
+        raise Http404
+    response = _prebuilt_sitemap(
+        request, sitemaps.shard_name(section, shard)
+    )
+    if response is None:
+        response = StreamingHttpResponse(
+            sitemaps.shard_xml(
+                request.build_absolute_uri("/"), section, shard
+            ),
+            content_type="application/xml",
+        )
+    return response
+
+
+def post_events(request):
+    return events.stream_response(request, ["posts"])
+
+
+def group_events(request, slug):
+    group = lookup_or_404("group", slug)
+    return events.stream_response(request, [f"group:{group.pk}"])
+
+
+@login_required
+def follow_events(request):
+    authors = Follow.objects.filter(user=request.user).values_list(
+        "author_id", flat=True
+    )
+    return events.stream_response(
+        request, [f"author:{author_id}" for author_id in authors]
+    )
+
+
+def comment_events(request, post_id):
+    post = lookup_or_404("post", post_id)
+    return events.stream_response(request, [f"comments:{post.pk}"])
+
+
+def _newer_posts(request, post_list):
+    """Фрагменты постов новее курсора ?since= и их общее число.
+
+    Если новых постов нет, ответ — пустой 204 за один индексный запрос.
+    """
+    try:
+        since = read_cursor(request.GET.get("since", ""))
+    except CursorError:
+        return HttpResponseBadRequest()
+    newer = post_list.filter(newer_than(*since))
+    limit = settings.FRAGMENTS_NEWER_LIMIT
+    posts = projection.load(newer.order_by(*FEED_ORDER)[:limit + 1])
+    if not posts:
+        return HttpResponse(status=204)
+    count = len(posts) if len(posts) <= limit else newer.count()
+    context = {"posts": posts[:limit], "show_author": True, "show_group": True}
+    response = render(
+        request, "posts/includes/articles.html", context,
+        using=settings.FEED_TEMPLATE_ENGINE,
+    )
+    response["X-New-Count"] = count
+    response["X-Newest-Cursor"] = make_cursor(posts[0].pub_date, posts[0].pk)
+    return response
+
+
+def index_newer(request):
+    return _newer_posts(request, Post.objects.all())
+
+
+@login_required
+def follow_newer(request):
+    authors = _followed_authors(request.user)
+    return _newer_posts(request, Post.objects.filter(author_id__in=authors))
+
+
+def _more_posts(request, post_list, **flags):
+    """Следующая пачка фрагментов после ?cursor= и курсор за ней."""
+    try:
+        rows, next_cursor = cursor_page(
+            post_list.values_list(*projection.ROW),
+            request.GET.get("cursor"),
+            POSTS_AMOUNT,
+            key=projection.row_key,
+        )
+    except CursorError:
+        return HttpResponseBadRequest()
+    posts = [projection.FeedPost(*row) for row in rows]
+    if not posts:
+        return HttpResponse(status=204)
+    response = render(
+        request, "posts/includes/articles.html", {"posts": posts, **flags},
+        using=settings.FEED_TEMPLATE_ENGINE,
+    )
+    if next_cursor:
+        response["X-Next-Cursor"] = next_cursor
+    return response
+
+
+def index_more(request):
+    return _more_posts(
+        request, Post.objects.all(), show_author=True, show_group=True
+    )
+
+
+def group_more(request, slug):
+    group = lookup_or_404("group", slug)
+    return _more_posts(request, group.posts.all(), show_author=True)
+
+
+def profile_more(request, username):
+    author = lookup_or_404("user", username)
+    return _more_posts(request, author.posts.all(), show_group=True)
+
+
+@login_required
+def follow_more(request):
+    authors = _followed_authors(request.user)
+    return _more_posts(
+        request, Post.objects.filter(author_id__in=authors),
+        show_author=True, show_group=True,
+    )
+
+
+def media_allowed(user, name):
+    """Картинка отдаётся, пока на неё ссылается пост; миниатюры — всегда.
+
+    Путь с "..", "." или лишними слешами не отдаётся: префиксы
+    проверяются только у нормализованного пути.
+    """
+    if name.startswith("/") or posixpath.normpath(name) != name:
+        return False
+    if name.startswith(settings.THUMBNAIL_PREFIX):
+        return True
+    if name.startswith("posts/"):
+        return Post.objects.filter(image=name).exists()
+    return user.is_staff
+
+
+def media_serve(request, path):
+    if not media_allowed(request.user, path):
+        raise Http404
+    return media.serve(request, path)
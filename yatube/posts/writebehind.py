@@ -0,0 +1,345 @@
+"""Отложенная запись комментариев и подписок.
+
+С WRITE_BEHIND_ENABLED представление проверяет форму и права, а запись
+кладёт в очередь — отдельный файл SQLite в режиме WAL на этой машине
+(WRITE_BEHIND_PATH). Вставка в него не ждёт блокировку записи основной
+базы. Фоновый поток воркера раз в WRITE_BEHIND_INTERVAL секунд или по
+накоплении WRITE_BEHIND_BATCH_SIZE записей переносит очередь в базу
+пачками bulk_create в одной транзакции. Сливает очередь один процесс
+за раз (flock на файле рядом с очередью), поэтому подписка и отписка
+применяются в порядке поступления. Запись удаляется из очереди после
+коммита в базу: при падении между ними пачка повторится. Подписки при
+этом идемпотентны, а комментарий, уже записанный с тем же автором,
+постом и временем постановки в очередь, пропускается.
+
+Пока запись в очереди, автор видит её сам: pending_comments() и
+followed_authors() накладывают очередь на данные из базы.
+"""
+import fcntl
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.metrics import WRITE_BEHIND_DURATION, WRITE_BEHIND_ENTRIES
+from posts import events
+from posts.bulk import insert_rows, safe_batch_size
+from posts.models import Comment, Follow, Post
+from posts.signals import bulk_write_finished
+
+User = get_user_model()
+
+logger = logging.getLogger("yatube.writebehind")
+
+COMMENT, FOLLOW, UNFOLLOW = "comment", "follow", "unfollow"
+COMMENT_FIELDS = ("post", "author", "text", "created")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    user_id INTEGER NOT NULL,
+    target_id INTEGER NOT NULL,
+    text TEXT NOT NULL DEFAULT '',
+    created TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_user_idx
+    ON entries (user_id, kind, target_id);
+"""
+COLUMNS = "id, kind, user_id, target_id, text, created"
+
+
+class Queue:
+    """Очередь в файле SQLite; соединение своё у каждого потока."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def connection(self):
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(SCHEMA)
+            local.db, local.pid = db, os.getpid()
+        return local.db
+
+    def append(self, kind, user_id, target_id, text=""):
+        cursor = self.connection().execute(
+            "INSERT INTO entries (kind, user_id, target_id, text, created) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (kind, user_id, target_id, text, timezone.now().isoformat()),
+        )
+        return cursor.lastrowid
+
+    def head(self, limit):
+        return self.connection().execute(
+            f"SELECT {COLUMNS} FROM entries ORDER BY id LIMIT ?", (limit,)
+        ).fetchall()
+
+    def pending(self, user_id, kinds, target_id=None):
+        sql = (
+            f"SELECT {COLUMNS} FROM entries WHERE user_id = ? "
+            f"AND kind IN ({', '.join('?' * len(kinds))})"
+        )
+        params = [user_id, *kinds]
+        if target_id is not None:
+            sql += " AND target_id = ?"
+            params.append(target_id)
+        return self.connection().execute(sql + " ORDER BY id", params)
+
+    def remove(self, last_id):
+        self.connection().execute(
+            "DELETE FROM entries WHERE id <= ?", (last_id,)
+        )
+
+    def __len__(self):
+        return self.connection().execute(
+            "SELECT COUNT(*) FROM entries"
+        ).fetchone()[0]
+
+
+_queue = None
+
+
+def queue():
+    global _queue
+    if _queue is None or _queue.path != settings.WRITE_BEHIND_PATH:
+        _queue = Queue(settings.WRITE_BEHIND_PATH)
+    return _queue
+
+
+def enqueue_comment(comment):
+    queue().append(COMMENT, comment.author_id, comment.post_id, comment.text)
+    WRITE_BEHIND_ENTRIES.inc(kind=COMMENT, stage="queued")
+    FLUSHER.notify()
+
+
+def enqueue_follow(user, author, follow=True):
+    kind = FOLLOW if follow else UNFOLLOW
+    queue().append(kind, user.pk, author.pk)
+    WRITE_BEHIND_ENTRIES.inc(kind=kind, stage="queued")
+    FLUSHER.notify()
+
+
+def pending_comments(comments, post, user):
+    """Комментарии поста из базы и ещё не записанные комментарии user."""
+    if not settings.WRITE_BEHIND_ENABLED or not user.is_authenticated:
+        return comments
+    rows = queue().pending(user.pk, (COMMENT,), post.pk).fetchall()
+    if not rows:
+        return comments
+    comments = list(comments)
+    # Строка уже в базе, но ещё не удалена из очереди: не показывать дважды.
+    saved = {(comment.author_id, comment.created) for comment in comments}
+    pending = []
+    for _, _, _, _, text, created in reversed(rows):
+        created = parse_datetime(created)
+        if (user.pk, created) not in saved:
+            pending.append(Comment(
+                post=post, author=user, text=text, created=created
+            ))
+    return pending + comments
+
+
+def followed_authors(authors, user):
+    """Авторы из подзапроса authors с учётом подписок user в очереди."""
+    if not settings.WRITE_BEHIND_ENABLED:
+        return authors
+    rows = queue().pending(user.pk, (FOLLOW, UNFOLLOW)).fetchall()
+    if not rows:
+        return authors
+    followed = set(authors)
+    for _, kind, _, author_id, _, _ in rows:
+        if kind == FOLLOW:
+            followed.add(author_id)
+        else:
+            followed.discard(author_id)
+    return list(followed)
+
+
+def apply(rows):
+    """Записывает пачку очереди в базу одной транзакцией."""
+    comments = []
+    follows = {}
+    for _, kind, user_id, target_id, text, created in rows:
+        if kind == COMMENT:
+            comments.append(Comment(
+                post_id=target_id, author_id=user_id, text=text,
+                created=parse_datetime(created),
+            ))
+        else:
+            follows[user_id, target_id] = kind == FOLLOW
+    # Пост или пользователь могли удалить, пока запись ждала в очереди.
+    users = User.objects.only("username").in_bulk(
+        {comment.author_id for comment in comments}
+        | {pk for pair in follows for pk in pair}
+    )
+    posts = set(Post.objects.filter(
+        pk__in={comment.post_id for comment in comments}
+    ).values_list("pk", flat=True))
+    queued = len(comments), len(follows)
+    comments = [
+        comment for comment in comments
+        if comment.author_id in users and comment.post_id in posts
+    ]
+    for comment in comments:
+        comment.author = users[comment.author_id]
+    follows = {
+        pair: follow for pair, follow in follows.items()
+        if users.keys() >= set(pair)
+    }
+    WRITE_BEHIND_ENTRIES.inc(
+        queued[0] - len(comments), kind=COMMENT, stage="dropped"
+    )
+    WRITE_BEHIND_ENTRIES.inc(
+        queued[1] - len(follows), kind=FOLLOW, stage="dropped"
+    )
+    comments = unsaved(comments)
+    # Готовые строки, а не bulk_create: отключить auto_now_add у общего
+    # поля модели из этого потока значило бы сломать save() в запросах.
+    adapt = connection.ops.adapt_datetimefield_value
+    with transaction.atomic():
+        insert_rows(Comment, COMMENT_FIELDS, [
+            (
+                comment.post_id, comment.author_id, comment.text,
+                adapt(comment.created),
+            )
+            for comment in comments
+        ])
+        write_follows(follows)
+        transaction.on_commit(lambda: publish(comments))
+    WRITE_BEHIND_ENTRIES.inc(len(comments), kind=COMMENT, stage="flushed")
+    WRITE_BEHIND_ENTRIES.inc(len(follows), kind=FOLLOW, stage="flushed")
+
+
+def unsaved(comments):
+    """Комментарии пачки, которых ещё нет в базе после прошлого слива."""
+    if not comments:
+        return comments
+    saved = set(Comment.objects.filter(
+        author_id__in={comment.author_id for comment in comments},
+        created__in={comment.created for comment in comments},
+    ).values_list("author_id", "post_id", "created"))
+    return [
+        comment for comment in comments
+        if (comment.author_id, comment.post_id, comment.created) not in saved
+    ]
+
+
+def write_follows(follows):
+    """Итог пачки по каждой паре: подписка есть или её нет."""
+    removed = Q()
+    for (user_id, author_id), follow in follows.items():
+        if not follow:
+            removed |= Q(user_id=user_id, author_id=author_id)
+    if removed:
+        Follow.objects.filter(removed).delete()
+    added = {pair for pair, follow in follows.items() if follow}
+    if not added:
+        return
+    existing = set(Follow.objects.filter(
+        user_id__in={user_id for user_id, _ in added},
+        author_id__in={author_id for _, author_id in added},
+    ).values_list("user_id", "author_id"))
+    Follow.objects.bulk_create(
+        [
+            Follow(user_id=user_id, author_id=author_id)
+            for user_id, author_id in sorted(added - existing)
+        ],
+        batch_size=safe_batch_size(Follow, 500),
+    )
+
+
+def publish(comments):
+    for comment in comments:
+        events.publish_comment(comment)
+
+
+@contextmanager
+def flush_lock():
+    """Неблокирующий flock: True, если очередь сливает этот процесс."""
+    path = settings.WRITE_BEHIND_PATH + ".lock"
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def flush():
+    """Переносит очередь в базу пачками; возвращает число записей."""
+    total = 0
+    with flush_lock() as acquired:
+        if not acquired:
+            return 0
+        while True:
+            rows = queue().head(settings.WRITE_BEHIND_BATCH_SIZE)
+            if not rows:
+                break
+            start = time.perf_counter()
+            apply(rows)
+            queue().remove(rows[-1][0])
+            WRITE_BEHIND_DURATION.observe(time.perf_counter() - start)
+            total += len(rows)
+    if total:
+        bulk_write_finished.send(sender=Queue, models=(Comment, Follow))
+    return total
+
+
+class Flusher:
+    """Фоновый поток воркера, который сливает очередь.
+
+    Запускается при первой записи в очередь уже после fork. С
+    WRITE_BEHIND_INTERVAL = 0 поток не запускается, и очередь сливает
+    команда flush_write_behind.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._pid = None
+        self._queued = 0
+
+    def notify(self):
+        if settings.WRITE_BEHIND_INTERVAL <= 0:
+            return
+        with self._condition:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                threading.Thread(target=self._run, daemon=True).start()
+            self._queued += 1
+            if self._queued >= settings.WRITE_BEHIND_BATCH_SIZE:
+                self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait(settings.WRITE_BEHIND_INTERVAL)
+                self._queued = 0
+            try:
+                flush()
+            except Exception:
+                logger.exception("Не удалось слить очередь записи")
+            finally:
+                connection.close()
+
+
+FLUSHER = Flusher()
@@ -1,11 +1,44 @@
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.forms import PasswordResetForm, UserCreationForm
 from django.contrib.auth import get_user_model
 
+from core import jobs
 
 User = get_user_model()
 
+# Письма о действиях пользователя уходят раньше остальных задач.
+EMAIL_PRIORITY = 10
+# Ключи контекста письма, которые воркер собирает сам.
+TOKEN_CONTEXT = ('user', 'uid', 'token')
+
 
 class CreationForm(UserCreationForm):
     class Meta(UserCreationForm.Meta):
         model = User
         fields = ('first_name', 'last_name', 'username', 'email')
+
+
+class QueuedPasswordResetForm(PasswordResetForm):
+    """Письмо со ссылкой сброса собирает и отправляет воркер.
+
+    В задаче только pk пользователя, имена шаблонов и контекст без
+    токена: токен не лежит в таблице задач и не виден в админке.
+    """
+
+    def send_mail(self, subject_template_name, email_template_name,
+                  context, from_email, to_email,
+                  html_email_template_name=None):
+        payload = {
+            'user_id': context['user'].pk,
+            'subject_template_name': subject_template_name,
+            'email_template_name': email_template_name,
+            'html_email_template_name': html_email_template_name,
+            'from_email': from_email,
+            'to_email': to_email,
+            'context': {
+                key: value for key, value in context.items()
+                if key not in TOKEN_CONTEXT
+            },
+        }
+        jobs.enqueue(
+            'users.send_password_reset', payload, priority=EMAIL_PRIORITY
+        )
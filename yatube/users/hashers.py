@@ -0,0 +1,55 @@
+"""PBKDF2 с настраиваемой стоимостью и бюджетом CPU на воркер.
+
+Число итераций берётся из PASSWORD_PBKDF2_ITERATIONS. После его смены
+пароль перехешируется при следующем успешном входе: check_password
+видит must_update и сохраняет новый хеш через set_password.
+
+hashlib считает PBKDF2 без GIL, поэтому потоки одного воркера могут
+занять хешированием все ядра. Одновременно считается не больше
+PASSWORD_HASH_CONCURRENCY хешей; остальные ждут до PASSWORD_HASH_TIMEOUT
+секунд, а затем получают PasswordHashingBusy.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+from core.metrics import PASSWORD_HASH_DURATION, PASSWORD_HASH_REJECTED
+
+
+class PasswordHashingBusy(Exception):
+    pass
+
+
+@lru_cache(maxsize=None)
+def _semaphore(size):
+    return threading.BoundedSemaphore(size)
+
+
+@contextmanager
+def cpu_budget(algorithm):
+    semaphore = _semaphore(settings.PASSWORD_HASH_CONCURRENCY)
+    if not semaphore.acquire(timeout=settings.PASSWORD_HASH_TIMEOUT):
+        PASSWORD_HASH_REJECTED.inc(algorithm=algorithm)
+        raise PasswordHashingBusy('бюджет хеширования паролей исчерпан')
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        semaphore.release()
+        PASSWORD_HASH_DURATION.observe(
+            time.perf_counter() - start, algorithm=algorithm
+        )
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS
+
+    def encode(self, password, salt, iterations=None):
+        with cpu_budget(self.algorithm):
+            return super().encode(password, salt, iterations)
@@ -0,0 +1,29 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.forms import PasswordResetForm
+from django.contrib.auth.tokens import default_token_generator
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from core import jobs
+
+User = get_user_model()
+
+
+@jobs.register('users.send_password_reset')
+def send_password_reset(user_id, subject_template_name, email_template_name,
+                        from_email, to_email, context,
+                        html_email_template_name=None):
+    """Собирает ссылку со свежим токеном и отправляет письмо сброса."""
+    user = User.objects.filter(pk=user_id).first()
+    if user is None:
+        return
+    context = dict(
+        context,
+        user=user,
+        uid=urlsafe_base64_encode(force_bytes(user.pk)),
+        token=default_token_generator.make_token(user),
+    )
+    PasswordResetForm().send_mail(
+        subject_template_name, email_template_name, context, from_email,
+        to_email, html_email_template_name,
+    )
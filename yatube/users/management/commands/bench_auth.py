@@ -0,0 +1,173 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model, password_validation
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core import bench
+from users.hashers import PasswordHashingBusy
+from users.passwords import CommonPasswordValidator
+
+User = get_user_model()
+
+PASSWORD = 'Kx8-benchmark-Pass'
+
+
+def measure(action, requests, warmup=1):
+    latencies = []
+    for iteration in range(warmup + requests):
+        with bench.timer() as elapsed:
+            action(iteration)
+        if iteration >= warmup:
+            latencies.append(elapsed['elapsed'])
+    return bench.summarize(latencies)
+
+
+def validator_cost(requests):
+    """Загрузка списка Django на каждый воркер и проверка по frozenset."""
+    load = measure(
+        lambda _: password_validation.CommonPasswordValidator(),
+        max(requests // 10, 3),
+    )
+    validator = CommonPasswordValidator()
+    check = measure(
+        lambda iteration: validator.validate(f'{PASSWORD}{iteration}'),
+        requests,
+    )
+    return {'django_load_ms': load['p50_ms'], 'check_ms': check['p50_ms']}
+
+
+def hash_cost(iterations, requests):
+    hasher = get_hasher()
+    return measure(
+        lambda _: hasher.encode(PASSWORD, hasher.salt(), iterations),
+        requests,
+    )
+
+
+def budget_cost(threads, requests):
+    """Хеширование из threads потоков с бюджетом CPU воркера."""
+    hasher = get_hasher()
+
+    def encode(_):
+        start = time.perf_counter()
+        try:
+            hasher.encode(PASSWORD, hasher.salt())
+        except PasswordHashingBusy:
+            return None
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        latencies = list(executor.map(encode, range(requests)))
+    wall_time = time.perf_counter() - start
+    done = [latency for latency in latencies if latency is not None]
+    return {
+        **bench.summarize(done, wall_time),
+        'rejected': len(latencies) - len(done),
+    }
+
+
+def request_costs(requests):
+    """Вход и регистрация через Client на временной базе."""
+    User.objects.create_user(username='bench-login', password=PASSWORD)
+    client = Client()
+    login_url = reverse('users:login')
+    signup_url = reverse('users:signup')
+
+    def login(_):
+        response = client.post(
+            login_url, {'username': 'bench-login', 'password': PASSWORD}
+        )
+        assert response.status_code == 302, response.status_code
+        client.logout()
+
+    def signup(iteration):
+        response = client.post(signup_url, {
+            'username': f'bench-signup-{iteration}',
+            'email': f'bench{iteration}@example.com',
+            'password1': PASSWORD,
+            'password2': PASSWORD,
+        })
+        assert response.status_code == 302, response.status_code
+
+    return {
+        'login': measure(login, requests),
+        'signup': measure(signup, requests),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет проверку распространённых паролей, стоимость PBKDF2 '
+        'при разном числе итераций, бюджет CPU и задержку входа и '
+        'регистрации на временной базе.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20)
+        parser.add_argument(
+            '--iterations', default='50000,100000,150000,260000',
+            help='Числа итераций PBKDF2 через запятую.',
+        )
+        parser.add_argument(
+            '--target-ms', type=float, default=100,
+            help='Желаемое время одного хеша для подсказки итераций.',
+        )
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--output', help='Куда сохранить JSON.')
+
+    def handle(self, *args, **options):
+        requests = options['requests']
+        results = {'validator': validator_cost(requests * 10)}
+        self.stdout.write(
+            'Список паролей Django: {django_load_ms:.1f} мс на загрузку, '
+            'проверка по frozenset: {check_ms:.4f} мс'.format(
+                **results['validator']
+            )
+        )
+        results['pbkdf2'] = {}
+        for iterations in map(int, options['iterations'].split(',')):
+            result = hash_cost(iterations, requests)
+            results['pbkdf2'][iterations] = result
+            self.stdout.write(
+                f'PBKDF2 {iterations:>7}: p50 {result["p50_ms"]:.1f} мс'
+            )
+        slowest = max(results['pbkdf2'])
+        per_iteration = results['pbkdf2'][slowest]['p50_ms'] / slowest
+        self.stdout.write(
+            f'Для {options["target_ms"]:.0f} мс на хеш: '
+            f'PASSWORD_PBKDF2_ITERATIONS = '
+            f'{int(options["target_ms"] / per_iteration)}'
+        )
+        result = budget_cost(options['threads'], requests * 2)
+        results['budget'] = result
+        self.stdout.write(
+            f'{options["threads"]} потоков, '
+            f'PASSWORD_HASH_CONCURRENCY = {settings.PASSWORD_HASH_CONCURRENCY}'
+            f': {result["throughput"]:.1f} хешей/с, '
+            f'p95 {result["p95_ms"]:.1f} мс, отказов {result["rejected"]}'
+        )
+        results.update(self.run_requests(requests))
+        if options['output']:
+            bench.save_results(options['output'], results)
+
+    def run_requests(self, requests):
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(DEBUG=False, RATELIMIT_ENABLED=False):
+                results = request_costs(requests)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name}: p50 {result["p50_ms"]:.1f} мс, '
+                f'p95 {result["p95_ms"]:.1f} мс'
+            )
+        return results
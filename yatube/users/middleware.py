@@ -0,0 +1,27 @@
+from django.http import HttpResponse
+
+from .hashers import PasswordHashingBusy
+
+# Через сколько секунд клиенту повторить запрос.
+RETRY_AFTER = 1
+
+
+class HashingBudgetMiddleware:
+    """503 вместо ошибки, если воркер занят хешированием паролей.
+
+    Пароли хешируют не только вход и регистрация, но и смена и сброс
+    пароля, и формы админки, поэтому исключение ловится для всех view.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_exception(self, request, exception):
+        if isinstance(exception, PasswordHashingBusy):
+            response = HttpResponse(status=503)
+            response['Retry-After'] = RETRY_AFTER
+            return response
+        return None
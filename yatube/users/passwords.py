@@ -0,0 +1,34 @@
+"""Проверка распространённых паролей по списку, загруженному один раз.
+
+CommonPasswordValidator Django распаковывает и читает список из 20 тысяч
+паролей в конструкторе, то есть в воркере, который первым обработает
+регистрацию. Здесь список один раз на процесс собирается в frozenset,
+а warm() при старте воркера заранее создаёт валидаторы и хешер.
+"""
+from functools import lru_cache
+
+from django.contrib.auth import hashers, password_validation
+
+
+@lru_cache(maxsize=None)
+def common_passwords(path):
+    return frozenset(
+        password_validation.CommonPasswordValidator(path).passwords
+    )
+
+
+class CommonPasswordValidator(password_validation.CommonPasswordValidator):
+    def __init__(
+        self,
+        password_list_path=password_validation.CommonPasswordValidator
+        .DEFAULT_PASSWORD_LIST_PATH,
+    ):
+        self.passwords = common_passwords(str(password_list_path))
+
+
+def warm():
+    """Создаёт валидаторы из AUTH_PASSWORD_VALIDATORS и хешер по умолчанию."""
+    return (
+        password_validation.get_default_password_validators(),
+        hashers.get_hasher(),
+    )
@@ -0,0 +1,35 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.core import mail
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core import jobs
+from core.models import Job
+
+User = get_user_model()
+
+
+class PasswordResetJobTests(TestCase):
+    def test_reset_email_queued(self):
+        """Письмо сброса пароля ставится в очередь и уходит из воркера."""
+        user = User.objects.create_user(
+            username='user', email='user@example.com', password='Kx8-pass'
+        )
+        response = Client().post(
+            reverse('password_reset'), {'email': 'user@example.com'}
+        )
+        self.assertRedirects(response, reverse('password_reset_done'))
+        self.assertEqual(mail.outbox, [])
+        job = Job.objects.get()
+        self.assertEqual(job.name, 'users.send_password_reset')
+        self.assertNotIn('/auth/reset/', job.payload)
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['user@example.com'])
+        token = re.search(
+            r'/auth/reset/[^/]+/([^/]+)/', mail.outbox[0].body
+        ).group(1)
+        self.assertTrue(default_token_generator.check_token(user, token))
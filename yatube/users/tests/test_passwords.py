@@ -0,0 +1,99 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.metrics import PASSWORD_HASH_REJECTED
+from users import hashers, passwords
+
+User = get_user_model()
+
+PASSWORD = 'Kx8-test-Pass'
+
+
+class CommonPasswordValidatorTests(TestCase):
+    def test_shared_frozenset(self):
+        """Список паролей загружается один раз и общий для валидаторов."""
+        first = passwords.CommonPasswordValidator()
+        second = passwords.CommonPasswordValidator()
+        self.assertIsInstance(first.passwords, frozenset)
+        self.assertIs(first.passwords, second.passwords)
+
+    def test_warm(self):
+        """warm() создаёт валидаторы из настроек заранее."""
+        validators, _ = passwords.warm()
+        self.assertTrue(any(
+            isinstance(validator, passwords.CommonPasswordValidator)
+            for validator in validators
+        ))
+
+    def test_signup_rejects_common(self):
+        """Регистрация с распространённым паролем не проходит."""
+        response = Client().post(reverse('users:signup'), {
+            'username': 'newbie',
+            'password1': 'password123',
+            'password2': 'password123',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(User.objects.filter(username='newbie').exists())
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+class HasherTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='user', password=PASSWORD
+        )
+        self.client = Client()
+
+    def login(self):
+        return self.client.post(
+            reverse('users:login'),
+            {'username': 'user', 'password': PASSWORD},
+        )
+
+    def test_iterations_from_settings(self):
+        """Число итераций берётся из PASSWORD_PBKDF2_ITERATIONS."""
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+
+    def test_rehash_on_login(self):
+        """После смены стоимости пароль перехешируется при входе."""
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            self.assertEqual(self.login().status_code, 302)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$2000$'))
+        self.assertTrue(self.user.check_password(PASSWORD))
+
+    @override_settings(PASSWORD_HASH_CONCURRENCY=1, PASSWORD_HASH_TIMEOUT=0)
+    def test_budget_exhausted(self):
+        """Без свободного бюджета хеширования вход отвечает 503."""
+        rejected = PASSWORD_HASH_REJECTED.value(algorithm='pbkdf2_sha256')
+        semaphore = hashers._semaphore(1)
+        semaphore.acquire()
+        try:
+            response = self.login()
+        finally:
+            semaphore.release()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(
+            PASSWORD_HASH_REJECTED.value(algorithm='pbkdf2_sha256'),
+            rejected + 1,
+        )
+        self.assertEqual(self.login().status_code, 302)
+
+    @override_settings(PASSWORD_HASH_CONCURRENCY=1, PASSWORD_HASH_TIMEOUT=0)
+    def test_budget_exhausted_on_password_change(self):
+        """Смена пароля без бюджета хеширования тоже отвечает 503."""
+        self.client.force_login(self.user)
+        semaphore = hashers._semaphore(1)
+        semaphore.acquire()
+        try:
+            response = self.client.post(reverse('password_change'), {
+                'old_password': PASSWORD,
+                'new_password1': 'Zq7-new-Pass',
+                'new_password2': 'Zq7-new-Pass',
+            })
+        finally:
+            semaphore.release()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
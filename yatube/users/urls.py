@@ -16,4 +16,9 @@ urlpatterns = [
         LoginView.as_view(template_name='users/login.html'),
         name='login'
     ),
+    path(
+        'password_reset/',
+        views.PasswordReset.as_view(),
+        name='password_reset'
+    ),
 ]
@@ -1,9 +1,14 @@
+from django.contrib.auth.views import PasswordResetView
 from django.views.generic import CreateView
 from django.urls import reverse_lazy
-from .forms import CreationForm
+from .forms import CreationForm, QueuedPasswordResetForm
 
 
 class SignUp(CreateView):
     form_class = CreationForm
     success_url = reverse_lazy('posts:index')
     template_name = 'users/signup.html'
+
+
+class PasswordReset(PasswordResetView):
+    form_class = QueuedPasswordResetForm
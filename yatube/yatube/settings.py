@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
+import importlib.util
 import os
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
@@ -41,7 +42,12 @@ INTERNAL_IPS = [
 CACHES = {
     "default": {
         "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-    }
+    },
+    "compression": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "compression",
+        "OPTIONS": {"MAX_ENTRIES": 100},
+    },
 }
 
 INSTALLED_APPS = [
@@ -49,6 +55,7 @@ INSTALLED_APPS = [
     "core.apps.CoreConfig",
     "users.apps.UsersConfig",
     "posts.apps.PostsConfig",
+    "api.apps.ApiConfig",
     "django.contrib.admin",
     "django.contrib.auth",
     "django.contrib.contenttypes",
@@ -60,11 +67,17 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.middleware.MetricsMiddleware",
+    "core.middleware.QueryLogMiddleware",
+    "core.middleware.ProfilerMiddleware",
+    "core.middleware.CompressionMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "core.middleware.RateLimitMiddleware",
+    "users.middleware.HashingBudgetMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "debug_toolbar.middleware.DebugToolbarMiddleware",
@@ -118,13 +131,20 @@ AUTH_PASSWORD_VALIDATORS = [
         "NAME": "django.contrib.auth.password_validation.MinimumLengthValidator",
     },
     {
-        "NAME": "django.contrib.auth.password_validation.CommonPasswordValidator",
+        "NAME": "users.passwords.CommonPasswordValidator",
     },
     {
         "NAME": "django.contrib.auth.password_validation.NumericPasswordValidator",
     },
 ]
 
+PASSWORD_HASHERS = [
+    "users.hashers.PBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+]
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/2.2/topics/i18n/
@@ -156,3 +176,246 @@ EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 
 CSRF_FAILURE_VIEW = "core.views.csrf_failure"
+
+# Negative lookup cache for missing groups, profiles and posts
+
+NEGATIVE_CACHE_TIMEOUT = 60
+NEGATIVE_CACHE_BLOOM = False
+NEGATIVE_CACHE_BLOOM_ERROR_RATE = 0.01
+NEGATIVE_CACHE_BLOOM_TTL = 600
+NEGATIVE_CACHE_BLOOM_REBUILD_INTERVAL = 5
+
+# Request metrics exposed on /metrics/
+
+METRICS_ALLOWED_IPS = INTERNAL_IPS
+
+# Slow query log and per-fingerprint query statistics
+
+LOGS_DIR = os.path.join(BASE_DIR, "logs")
+
+QUERY_LOG_VIEW_MODULES = (
+    "posts.views",
+    "api.views",
+    "users.views",
+    "django.contrib.admin",
+    "django.contrib.auth.views",
+)
+QUERY_LOG_SLOW_MS = 100
+QUERY_LOG_SAMPLE_RATE = 0.1
+QUERY_LOG_STACK = 5
+QUERY_LOG_FLUSH_INTERVAL = 60
+QUERY_LOG_STATS_DIR = os.path.join(LOGS_DIR, "query_stats")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "slow_queries": {
+            "class": "core.log.RotatingFileHandler",
+            "filename": os.path.join(LOGS_DIR, "slow_queries.log"),
+            "maxBytes": 10 * 1024 * 1024,
+            "backupCount": 5,
+            "delay": True,
+        },
+    },
+    "loggers": {
+        "yatube.slow_queries": {
+            "handlers": ["slow_queries"],
+            "level": "WARNING",
+            "propagate": False,
+        },
+    },
+}
+
+# Sampling profiler, results on admin/profiler/
+
+PROFILER_ENABLED = False
+PROFILER_SAMPLE_RATE = 100
+PROFILER_INTERVAL = 0.005
+PROFILER_HEADER = "HTTP_X_YATUBE_PROFILE"
+PROFILER_TOKEN_MAX_AGE = 60 * 60
+PROFILER_MAX_VIEWS = 50
+PROFILER_MAX_STACKS = 500
+
+# Streaming export of user data
+
+EXPORT_CHUNK_SIZE = 2000
+
+# Read-only JSON API
+
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+
+# RSS and Atom feeds
+
+FEEDS_MAX_ITEMS = 50
+FEEDS_CACHE_TIMEOUT = 60 * 60
+
+# Sitemaps, prebuilt by build_sitemaps into SITEMAP_ROOT
+
+SITEMAP_SHARD_SIZE = 50000
+SITEMAP_CACHE_TIMEOUT = 60 * 60
+SITEMAP_ROOT = os.path.join(BASE_DIR, "sitemaps")
+
+# Server-Sent Events; workers relay events through Unix sockets
+
+SSE_MAX_CONNECTIONS = 50
+SSE_HEARTBEAT = 15
+SSE_MAX_DURATION = 5 * 60
+SSE_RETRY_MS = 3000
+SSE_HISTORY = 1000
+SSE_TEXT_LENGTH = 280
+SSE_RELAY_DIR = os.path.join(BASE_DIR, "run", "events")
+
+# Feed fragments for incremental updates
+
+FRAGMENTS_NEWER_LIMIT = 20
+
+# Static files: hashed and precompressed by collectstatic when DEBUG is off,
+# served by core.views.static_serve if STATIC_SERVE is set
+
+STATIC_ROOT = os.path.join(BASE_DIR, "collected_static")
+STATIC_SERVE = False
+STATIC_MAX_AGE = 60 * 60
+STATIC_COMPRESS_EXTENSIONS = (
+    ".css", ".js", ".svg", ".html", ".txt", ".json", ".xml", ".ico", ".map",
+)
+STATIC_COMPRESS_MIN_SIZE = 256
+STATIC_COMPRESS_RATIO = 0.95
+
+if not DEBUG:
+    STATICFILES_STORAGE = "core.storage.CompressedManifestStaticFilesStorage"
+
+# Media served by posts.views.media_serve, offloaded to the web server
+# with "x-accel" (nginx) or "x-sendfile", or sent with os.sendfile
+
+MEDIA_SERVE = True
+MEDIA_SERVE_MODE = "sendfile"
+MEDIA_ACCEL_PREFIX = "/protected-media/"
+MEDIA_MAX_AGE = 24 * 60 * 60
+THUMBNAIL_PREFIX = "cache/"
+
+# Dynamic response compression: codings in order of preference and levels
+# per content type; types not listed here are sent uncompressed. Compressed
+# bodies are kept in their own COMPRESSION_CACHE so that they do not evict
+# rate limit buckets and fragments from the default cache
+
+COMPRESSION_CODINGS = ("zstd", "br", "gzip")
+COMPRESSION_LEVELS = {
+    "text/html": {"zstd": 6, "br": 5, "gzip": 6},
+    "text/plain": {"zstd": 3, "br": 4, "gzip": 6},
+    "text/csv": {"zstd": 3, "br": 4, "gzip": 6},
+    "text/css": {"zstd": 9, "br": 9, "gzip": 9},
+    "text/javascript": {"zstd": 9, "br": 9, "gzip": 9},
+    "application/javascript": {"zstd": 9, "br": 9, "gzip": 9},
+    "application/json": {"zstd": 3, "br": 4, "gzip": 5},
+    "application/x-ndjson": {"zstd": 3, "br": 4, "gzip": 5},
+    "application/xml": {"zstd": 6, "br": 5, "gzip": 6},
+    "application/rss+xml": {"zstd": 6, "br": 5, "gzip": 6},
+    "application/atom+xml": {"zstd": 6, "br": 5, "gzip": 6},
+    "image/svg+xml": {"zstd": 9, "br": 9, "gzip": 9},
+}
+COMPRESSION_MIN_SIZE = 512
+COMPRESSION_CACHE = "compression"
+COMPRESSION_CACHE_MAX_SIZE = 512 * 1024
+COMPRESSION_CACHE_TIMEOUT = 5 * 60
+
+# Templates: with DEBUG off the cached loader parses each template once per
+# process, and wsgi.py compiles all of them when a worker boots
+
+TEMPLATE_LOADERS = [
+    "django.template.loaders.filesystem.Loader",
+    "django.template.loaders.app_directories.Loader",
+]
+TEMPLATES_WARMUP = not DEBUG
+TEMPLATES_WARMUP_EXTENSIONS = (".html", ".txt", ".xml")
+
+if not DEBUG:
+    TEMPLATES[0]["APP_DIRS"] = False
+    TEMPLATES[0]["OPTIONS"]["loaders"] = [
+        ("django.template.loaders.cached.Loader", TEMPLATE_LOADERS),
+    ]
+
+# Optional Jinja2 engine with ports of the feed templates in JINJA2_DIR;
+# feed views render through FEED_TEMPLATE_ENGINE ("django" or "jinja2")
+
+JINJA2_DIR = os.path.join(BASE_DIR, "jinja_templates")
+FEED_TEMPLATE_ENGINE = "django"
+
+if importlib.util.find_spec("jinja2") is not None:
+    TEMPLATES.append({
+        "BACKEND": "django.template.backends.jinja2.Jinja2",
+        "DIRS": [JINJA2_DIR],
+        "OPTIONS": {
+            "environment": "core.jinja2.environment",
+            "context_processors": [
+                "django.contrib.auth.context_processors.auth",
+                "django.contrib.messages.context_processors.messages",
+                "core.context_processors.year.year",
+            ],
+        },
+    })
+
+# Passwords: PBKDF2 cost (changing it rehashes passwords on the next login),
+# how many hashes a worker computes at once and how long the rest wait
+# before login and signup answer 503; validators and the hasher are
+# created when a worker boots
+
+PASSWORD_PBKDF2_ITERATIONS = 150000
+PASSWORD_HASH_CONCURRENCY = 2
+PASSWORD_HASH_TIMEOUT = 2
+PASSWORDS_WARMUP = not DEBUG
+
+# Rate limiting: token buckets per rule for the user and/or the client IP,
+# kept in RATELIMIT_CACHE; "rate" is "N/s", "N/m", "N/h" or "N/d" and
+# "burst" the bucket size. Function views use core.ratelimit.ratelimit,
+# other views are mapped by URL name in RATELIMIT_VIEWS. Requests from
+# RATELIMIT_TRUSTED_PROXIES (addresses or networks) are keyed by the client
+# address in X-Forwarded-For
+
+RATELIMIT_ENABLED = True
+RATELIMIT_CACHE = "default"
+RATELIMIT_TRUSTED_PROXIES = ("127.0.0.1", "::1")
+RATELIMIT_LOCAL_MAX_KEYS = 10000
+RATELIMIT_STATUS = 429
+RATELIMIT_TEMPLATE = "core/429.html"
+RATELIMIT_RULES = {
+    "post_create": {"rate": "10/m", "burst": 20, "keys": ("user",)},
+    "add_comment": {"rate": "30/m", "burst": 20, "keys": ("user",)},
+    "follow": {
+        "rate": "60/m", "burst": 30, "keys": ("user",),
+        "methods": ("GET", "POST"),
+    },
+    "login": {"rate": "10/m", "burst": 10, "keys": ("ip",)},
+    "signup": {"rate": "5/m", "burst": 5, "keys": ("ip",)},
+    "password_reset": {"rate": "10/h", "burst": 5, "keys": ("ip",)},
+}
+RATELIMIT_VIEWS = {
+    "users:login": "login",
+    "users:signup": "signup",
+    "users:password_reset": "password_reset",
+}
+
+# Write-behind for comments and follows: requests validate and append to a
+# local SQLite queue, a thread in each worker writes it to the database in
+# batches every WRITE_BEHIND_INTERVAL seconds or at WRITE_BEHIND_BATCH_SIZE
+# entries; with an interval of 0 only flush_write_behind empties the queue
+
+WRITE_BEHIND_ENABLED = False
+WRITE_BEHIND_PATH = os.path.join(BASE_DIR, "run", "write_behind.sqlite3")
+WRITE_BEHIND_INTERVAL = 0.5
+WRITE_BEHIND_BATCH_SIZE = 500
+
+# Background jobs in the core.Job table, run by run_workers; handlers live in
+# each app's jobs.py. A failed job is retried up to JOBS_MAX_ATTEMPTS times
+# with a pause doubling from JOBS_RETRY_DELAY seconds. A running job's
+# locked_at is refreshed every third of JOBS_LOCK_TIMEOUT, and jobs whose
+# worker has not refreshed it for JOBS_LOCK_TIMEOUT seconds go back to the
+# queue. JOBS_EAGER runs jobs in the request right after commit, for
+# development without workers
+
+JOBS_EAGER = False
+JOBS_POLL_INTERVAL = 1
+JOBS_MAX_ATTEMPTS = 3
+JOBS_RETRY_DELAY = 10
+JOBS_LOCK_TIMEOUT = 10 * 60
@@ -14,9 +14,11 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
+
+from core.views import metrics, profiles, static_serve
+from posts.views import media_serve
 
 handler404 = "core.views.page_not_found"
 handler500 = "core.views.server_error"
@@ -24,16 +26,37 @@ handler403 = "core.views.permission_denied"
 
 urlpatterns = [
     path("", include("posts.urls", namespace="posts")),
+    path(
+        "admin/profiler/",
+        admin.site.admin_view(profiles),
+        name="profiler",
+    ),
     path("admin/", admin.site.urls),
     path("auth/", include("users.urls")),
     path("auth/", include("django.contrib.auth.urls")),
     path("about/", include("about.urls", namespace="about")),
+    path("api/", include("api.urls", namespace="api")),
+    path("metrics/", metrics, name="metrics"),
 ]
 
+if settings.MEDIA_SERVE:
+    urlpatterns += (
+        re_path(
+            r"^{}(?P<path>.*)$".format(settings.MEDIA_URL.lstrip("/")),
+            media_serve,
+            name="media",
+        ),
+    )
+
+if settings.STATIC_SERVE:
+    urlpatterns += (
+        re_path(
+            r"^{}(?P<path>.*)$".format(settings.STATIC_URL.lstrip("/")),
+            static_serve,
+        ),
+    )
+
 if settings.DEBUG:
     import debug_toolbar
 
     urlpatterns += (path("__debug__/", include(debug_toolbar.urls)),)
-    # urlpatterns += static(
-    #     settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
-    # )
@@ -9,8 +9,19 @@ https://docs.djangoproject.com/en/2.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+if settings.TEMPLATES_WARMUP:
+    from core.templating import warm_all
+
+    warm_all()
+
+if settings.PASSWORDS_WARMUP:
+    from users.passwords import warm as warm_passwords
+
+    warm_passwords()